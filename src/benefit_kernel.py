@@ -0,0 +1,122 @@
+"""
+benefit_kernel.py
+效益評估（benefit_appraisal）的數值運算核心。
+
+把「逆送電 / 購電且 NG > 原始TPC / 購電且 NG <= 原始TPC」三分支的逐筆計算，
+收斂成一個只吃 NumPy 陣列的函式 compute_benefit()：
+  - 有安裝 numba 時，使用 @njit 編譯的逐筆迴圈版本。
+  - 沒有安裝時，改用 numpy.where 以布林遮罩一次選取三種情況的向量化版本。
+兩者計算結果相同。
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba 為選用套件，未安裝時改走 NumPy 向量化版本
+    njit = None
+    HAS_NUMBA = False
+
+# 輸出欄位順序，與 compute_benefit() 的 out_* 參數順序一致
+BENEFIT_COLUMNS = (
+    '增加的售電收入', '增加售電的NG購入成本', '增加售電的TG維運成本', '增加售電的碳費',
+    '降低的購電費用', '降低購電的NG購入成本', '降低購電的TG維運成本', '降低購電的碳費',
+)
+
+
+def _compute_benefit_loop(ng_total, orig_tpc, ng_inc_gen, ng_cost_arr, sale_arr, unit_arr, tg_arr, carbon_arr, coef,
+                          out_sale, out_sale_ng, out_sale_tg, out_sale_c,
+                          out_buy, out_buy_ng, out_buy_tg, out_buy_c):
+    """
+    逐筆計算增加售電 / 降低購電的金額與成本，結果直接寫入預先配置好的 out_* 陣列。
+    以 numba 編譯後，八個輸出在同一次掃描中寫出，每筆的中間值只留在暫存器，不另外配置暫存陣列。
+
+    參數:
+        ng_total: NG 總用量 (Nm³/hr)
+        orig_tpc: 還原後的原始TPC (MW)
+        ng_inc_gen: NG 增加的發電量 (MW)
+        ng_cost_arr / sale_arr / unit_arr / tg_arr / carbon_arr:
+            各筆適用的 NG 發電成本、躉售電價、時段購電價、TG 維運成本、碳費 (元/kWh)
+        coef: MW -> kWh 的換算係數 (t_resolution * 1000 / 3600)
+        out_sale ~ out_buy_c: 八個輸出陣列，順序同 BENEFIT_COLUMNS
+    """
+    n = ng_total.shape[0]
+    for i in range(n):
+        sale_mw = 0.0
+        buy_mw = 0.0
+        has_sale = False
+        has_buy = False
+        if ng_total[i] != 0:
+            if orig_tpc[i] <= 0:
+                # 還原後TPC 處於逆送電：NG 增加的發電量全數視為增加售電
+                sale_mw = ng_inc_gen[i]
+                has_sale = True
+            elif ng_inc_gen[i] > orig_tpc[i]:
+                # NG 發電量 > 還原後TPC：超出部份為增加售電，其餘為降低購電
+                sale_mw = ng_inc_gen[i] - orig_tpc[i]
+                buy_mw = orig_tpc[i]
+                has_sale = True
+                has_buy = True
+            else:
+                # NG 發電量 <= 還原後TPC：全數為降低購電
+                buy_mw = ng_inc_gen[i]
+                has_buy = True
+
+        if has_sale:
+            sale_kwh = sale_mw * coef
+            out_sale[i] = sale_kwh * sale_arr[i]
+            out_sale_ng[i] = sale_kwh * ng_cost_arr[i]
+            out_sale_tg[i] = sale_kwh * tg_arr[i]
+            out_sale_c[i] = sale_kwh * carbon_arr[i]
+        else:
+            out_sale[i] = 0.0
+            out_sale_ng[i] = 0.0
+            out_sale_tg[i] = 0.0
+            out_sale_c[i] = 0.0
+
+        if has_buy:
+            buy_kwh = buy_mw * coef
+            out_buy[i] = buy_kwh * unit_arr[i]
+            out_buy_ng[i] = buy_kwh * ng_cost_arr[i]
+            out_buy_tg[i] = buy_kwh * tg_arr[i]
+            out_buy_c[i] = buy_kwh * carbon_arr[i]
+        else:
+            out_buy[i] = 0.0
+            out_buy_ng[i] = 0.0
+            out_buy_tg[i] = 0.0
+            out_buy_c[i] = 0.0
+
+
+def _compute_benefit_numpy(ng_total, orig_tpc, ng_inc_gen, ng_cost_arr, sale_arr, unit_arr, tg_arr, carbon_arr, coef,
+                           out_sale, out_sale_ng, out_sale_tg, out_sale_c,
+                           out_buy, out_buy_ng, out_buy_tg, out_buy_c):
+    """
+    _compute_benefit_loop() 的 NumPy 向量化版本，參數與輸出完全相同。
+    以三個布林遮罩同時選出「逆送電」、「NG > 原始TPC」、「NG <= 原始TPC」三種情況。
+    """
+    active = ng_total != 0
+    m_rev = active & (orig_tpc <= 0)                    # 還原後TPC 處於逆送電
+    m_gt = active & ~m_rev & (ng_inc_gen > orig_tpc)    # NG 發電量 > 還原後TPC
+    m_le = active & ~m_rev & ~m_gt                      # NG 發電量 <= 還原後TPC
+    has_sale = m_rev | m_gt
+    has_buy = m_gt | m_le
+
+    sale_kwh = np.where(m_rev, ng_inc_gen, ng_inc_gen - orig_tpc) * coef
+    buy_kwh = np.where(m_gt, orig_tpc, ng_inc_gen) * coef
+
+    out_sale[:] = np.where(has_sale, sale_kwh * sale_arr, 0.0)
+    out_sale_ng[:] = np.where(has_sale, sale_kwh * ng_cost_arr, 0.0)
+    out_sale_tg[:] = np.where(has_sale, sale_kwh * tg_arr, 0.0)
+    out_sale_c[:] = np.where(has_sale, sale_kwh * carbon_arr, 0.0)
+    out_buy[:] = np.where(has_buy, buy_kwh * unit_arr, 0.0)
+    out_buy_ng[:] = np.where(has_buy, buy_kwh * ng_cost_arr, 0.0)
+    out_buy_tg[:] = np.where(has_buy, buy_kwh * tg_arr, 0.0)
+    out_buy_c[:] = np.where(has_buy, buy_kwh * carbon_arr, 0.0)
+
+
+# fastmath 只開啟不影響 NaN/inf 判斷的旗標（不含 nnan/ninf），缺值時的分支結果才會與 NumPy 版本一致
+_FASTMATH_FLAGS = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+# 模組載入時只建立一次；cache=True 讓編譯結果寫入 __pycache__，之後啟動免再花首次編譯時間
+compute_benefit = (njit(cache=True, fastmath=_FASTMATH_FLAGS)(_compute_benefit_loop) if HAS_NUMBA
+                   else _compute_benefit_numpy)
@@ -1,4 +1,7 @@
 from __future__ import annotations
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from typing import Iterable, Literal, Dict, Optional
 import pandas as pd
@@ -10,6 +13,34 @@ logger = get_logger(__name__)
 
 SummaryType = Literal["RANGE", "MAXIMUM", "MINIMUM", "AVERAGE","TOTAL"]
 
+# 整個程式共用一個 PIServer 連線，避免每次搜尋都重新連線/驗證；search 時以 lock 保護
+_PI_SERVER: Optional[Pi.PIServer] = None
+_PI_SERVER_LOCK = threading.Lock()
+
+def _get_pi_server() -> Pi.PIServer:
+    """
+    回傳共用的 PIServer 連線，第一次呼叫時才建立；程式結束時由 atexit 關閉。
+    呼叫端需持有 _PI_SERVER_LOCK。
+    """
+    global _PI_SERVER
+    if _PI_SERVER is None:
+        _PI_SERVER = Pi.PIServer().__enter__()      # 等同 with Pi.PIServer() 的連線動作，但不在離開時斷線
+        atexit.register(_close_pi_server)
+    return _PI_SERVER
+
+def _close_pi_server() -> None:
+    global _PI_SERVER
+    with _PI_SERVER_LOCK:
+        if _PI_SERVER is not None:
+            try:
+                _PI_SERVER.__exit__(None, None, None)
+            except Exception as e:
+                logger.warning('關閉 PIServer 連線失敗 : %s', e)
+            _PI_SERVER = None
+
+# query() / current_values() 同時送出請求的執行緒上限 (I/O 等待為主，呼叫 AF SDK 期間不佔用 GIL)
+_MAX_WORKERS = 16
+
 def _normalize_raw_values(raw_dict: dict) -> dict:
     """
     將 raw_dict 中的原始值轉為 float 或 None，以便後續轉為數值型態。
@@ -18,7 +49,7 @@ def _normalize_raw_values(raw_dict: dict) -> dict:
       1. 枚舉型 (AFEnumerationValue)：記 WARNING，設為 None。
       2. 字串 (例如 'Bad', 'OFF', 'N/A')：記 WARNING，設為 None。
       3. None 或 np.nan：保留。
-      4. 其他類型 (int, float, 數字字串)：保留，留待 pd.to_numeric 處理。
+      4. 其他類型 (int, float, 數字字串)：保留，留待 _to_float 處理。
 
     Args:
         raw_dict (dict): key 為 tag name，value 為 原始 p.current_value。
@@ -39,14 +70,30 @@ def _normalize_raw_values(raw_dict: dict) -> dict:
             raw_dict[tag_name] = None
             continue
 
-        # 3) 如果 val 本身就是 None 或 np.nan，就跳過（後面 to_numeric 會自動轉成 NaN）
+        # 3) 如果 val 本身就是 None 或 np.nan，就跳過（後面 _to_float 會轉成 NaN）
         if val is None or (isinstance(val, float) and np.isnan(val)):
             continue
 
-        # 4) 到這裡 val 很可能是 int、float、也可能是「看起來像數字的字串」→ 交給 to_numeric 處理
+        # 4) 到這裡 val 很可能是 int、float、也可能是「看起來像數字的字串」→ 交給 _to_float 處理
 
     return raw_dict
 
+def _to_float(val) -> float:
+    """
+    將 _normalize_raw_values() 處理後的單一值轉為 float，無法轉型者回傳 NaN。
+    PI 回傳的值絕大多數已是 int / float，先以 isinstance 走快速路徑，其餘才嘗試 float()。
+    """
+    if isinstance(val, float):
+        return val
+    if isinstance(val, int):
+        return float(val)
+    if val is None:
+        return np.nan
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return np.nan
+
 class PIClient:
     """
     封裝 PIconnect 取數邏輯，提供即時值與歷史統計查詢功能。
@@ -93,8 +140,8 @@ class PIClient:
             ERROR: 搜尋例外時記錄錯誤。
         """
         try:
-            with Pi.PIServer() as server:
-                return server.search(tag)[0]
+            with _PI_SERVER_LOCK:
+                return _get_pi_server().search(tag)[0]
         except Exception as e:
             logger.error('單點搜尋失敗 %s : %s', tag, e)
             return None
@@ -114,6 +161,20 @@ class PIClient:
         """
         tags = list(tags)   # 將傳入的Iterable[str} (可能是generator,set,Index)轉成可重複使用的list
         result: Dict[str, Pi.PIPoint] = {}
+
+        # 快取中沒有的 tag 先以一次 server.search(list) 批次搜尋，省去逐一搜尋的往返
+        missing = [t for t in dict.fromkeys(tags) if t not in self._point_cache]
+        if len(missing) > 1:
+            try:
+                with _PI_SERVER_LOCK:
+                    found = {p.name.lower(): p for p in _get_pi_server().search(missing)}
+                for tag in missing:
+                    point = found.get(tag.lower())
+                    if point is not None:
+                        self._point_cache[tag] = point
+            except Exception as e:
+                logger.error('批次搜尋失敗，改為逐一搜尋 : %s', e)
+
         for tag in tags:
             # 先試從 cache（_search_point 本身也快取）
             point = self._point_cache.get(tag)
@@ -138,7 +199,7 @@ class PIClient:
 
         行為流程：
           1. 搜尋 PIPoint。
-          2. 取得 current_value。
+          2. 以執行緒池同時取得各點的 current_value。
           3. 呼叫 _normalize_raw_values 處理非數值型態。
           4. 轉為 float，無法轉型者以 NaN 取代。
           5. 記錄被強制轉 NaN 的 tag 名稱及原始值。
@@ -152,22 +213,25 @@ class PIClient:
         # 1) 如果遲線失敗，pts 就會是空字典 {}
         pts = self.search_points(tags)
 
-        # 2) 先把「原始值」收齊
-        raw = {t: p.current_value for t, p in pts.items()}
+        # 2) 先把「原始值」收齊；每個 current_value 都是一次 PI 往返，改由執行緒池同時送出
+        tag_names = list(pts)
+        with ThreadPoolExecutor(max_workers=max(1, min(_MAX_WORKERS, len(tag_names)))) as ex:
+            raw = dict(zip(tag_names, ex.map(lambda t: pts[t].current_value, tag_names)))
 
         # 3) 屬性/字串檢查，非數值一律轉成None
         raw = _normalize_raw_values(raw)
 
-        # 4) 逐一轉float，失敗就Nan
-        numeric = pd.to_numeric(pd.Series(raw), errors="coerce")
+        # 4) 逐一轉float，失敗就Nan (直接寫入 float64 陣列，不經過 object Series)
+        values = np.fromiter((_to_float(v) for v in raw.values()), dtype=np.float64, count=len(raw))
+        numeric = pd.Series(values, index=pd.Index(list(raw), dtype=object))
 
-        # 5) 找出被轉成 NaN 的項目（且原本不是 NaN / None）
-        mask = numeric.isna() & pd.Series(raw).notna()
-        if mask.any():
+        # 5) 找出被轉成 NaN 的項目（且原本不是 NaN / None）；只檢查結果為 NaN 的少數幾筆
+        coerced = [t for t in numeric.index[np.isnan(values)] if pd.notna(raw[t])]
+        if coerced:
             logger.warning(
                 "Coerced %d / %d tags to NaN → %s",
-                mask.sum(), len(numeric),
-                ", ".join(f"{t} = {raw[t]}" for t in numeric[mask].index)
+                len(coerced), len(numeric),
+                ", ".join(f"{t} = {raw[t]}" for t in coerced)
             )
             """
             例如：
@@ -212,15 +276,37 @@ class PIClient:
         備註：
             本方法將略過搜尋失敗或 summaries 失敗的tag
         """
-        dfs = []
-        for tag in tags:
-            point = self._search_point(tag)
-            df = point.summaries(st, et, interval, code)                # 1
-            dfs.append(pd.to_numeric(df[summary], errors="coerce"))     # 2
+        tags = list(tags)
+        points = self.search_points(tags)                               # 1) 批次搜尋 PIPoint
 
-        raw = pd.concat(dfs, axis=1)                # 3
-        raw.index = raw.index.tz_localize(None) + pd.offsets.Second(tz_offset_sec)  # 4
-        raw.columns = list(tags)                    # 5
+        def fetch(tag: str) -> pd.Series:
+            point = points.get(tag)
+            if point is None:
+                raise KeyError(f"找不到 PI tag：{tag}")
+            df = point.summaries(st, et, interval, code)                # 2) 各 tag 的 summaries 同時送出
+            return pd.to_numeric(df[summary], errors="coerce")          # 3
+
+        unique_tags = list(dict.fromkeys(tags))
+        with ThreadPoolExecutor(max_workers=max(1, min(_MAX_WORKERS, len(unique_tags)))) as ex:
+            series = dict(zip(unique_tags, ex.map(fetch, unique_tags)))
+
+        # 4) 同一組 st/et/interval 的 summaries 時間索引相同：直接以 2D 陣列一次建立 DataFrame，
+        #    不經過 pd.concat 逐欄對齊合併；索引不一致時才退回 concat。依傳入順序組回 (重複的 tag 也保留)
+        index = series[tags[0]].index
+        if all(s.index.equals(index) for s in series.values()):
+            raw = pd.DataFrame(np.column_stack([series[t].to_numpy(dtype=float) for t in tags]),
+                               index=index, columns=tags)
+        else:
+            raw = pd.concat([series[t] for t in tags], axis=1)
+            raw.columns = tags
+        # 5) 去掉時區 (保留當地時鐘時間)；位移為 0 時不再產生一份新的索引，
+        #    非 0 時以 timedelta64 直接加在底層陣列上，不建立 DateOffset
+        index = raw.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        if tz_offset_sec:
+            index = index + np.timedelta64(tz_offset_sec, "s")
+        raw.index = index
 
         if fillna_method in ("ffill", "bfill"):     # 6
             raw = getattr(raw, fillna_method)()
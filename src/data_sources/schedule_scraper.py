@@ -29,8 +29,16 @@ Returned data frames (past/current/future) include at least:
 """
 
 from __future__ import annotations
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+try:
+    import lxml  # noqa: F401  有安裝 lxml 時，BeautifulSoup 改用 C 實作(libxml2)的解析器
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
 import re, urllib3
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from dataclasses import dataclass, field
 from typing import Optional, Dict, List, Tuple, Sequence, Any
 import pandas as pd
@@ -87,17 +95,25 @@ _HEIGHT_RULES: Dict[str, Dict[str, Dict[str, Any]]] = {
 
 # Title patterns used by MES page when hovering the area map.
 # 針對2138 title 中，出現不含"A"、"B" 文字內容時，可能會造成該排程無法被辨識
-_TIME_PATTERNS: Dict[str, str] = {
-    'EAFA': r"EAF[AB]?時間:\s*(\d{2}:\d{2}:\d{2})\s*~\s*(\d{2}:\d{2}:\d{2})",
-    'EAFB': r"EAF[AB]?時間:\s*(\d{2}:\d{2}:\d{2})\s*~\s*(\d{2}:\d{2}:\d{2})",
-    'LF1-1': r"LF1-1時間:\s*(\d{2}:\d{2}:\d{2})\s*~\s*(\d{2}:\d{2}:\d{2})",
-    'LF1-2': r"LF1-2時間:\s*(\d{2}:\d{2}:\d{2})\s*~\s*(\d{2}:\d{2}:\d{2})",
+_TIME_PATTERNS: Dict[str, re.Pattern] = {
+    'EAFA': re.compile(r"EAF[AB]?時間:\s*(\d{2}:\d{2}:\d{2})\s*~\s*(\d{2}:\d{2}:\d{2})"),
+    'EAFB': re.compile(r"EAF[AB]?時間:\s*(\d{2}:\d{2}:\d{2})\s*~\s*(\d{2}:\d{2}:\d{2})"),
+    'LF1-1': re.compile(r"LF1-1時間:\s*(\d{2}:\d{2}:\d{2})\s*~\s*(\d{2}:\d{2}:\d{2})"),
+    'LF1-2': re.compile(r"LF1-2時間:\s*(\d{2}:\d{2}:\d{2})\s*~\s*(\d{2}:\d{2}:\d{2})"),
 }
 
 # 2133：title 辨識
 _RE_SCC = re.compile(r"SCC開始時間\s*:\s*(\d{2}:\d{2}:\d{2}).*?SCC結束時間\s*:\s*(\d{2}:\d{2}:\d{2})", re.S)
 # 2138：把某些 title 判為「輔助層」
 _AUX_TITLE_PAT = re.compile(r"(送電)", re.I)
+# <area> 解析共用：coords 內的整數、title 內的爐號
+_RE_INT = re.compile(r"\d+")
+_RE_FURNACE = re.compile(r"爐號[＝>:\s]*([A-Za-z0-9]+)")
+
+@lru_cache(maxsize=None)
+def _aux_time_pattern(process_type: str) -> re.Pattern:
+    """2138 輔助層（送電刻度）的 HH:MM ~ HH:MM 樣板，每個製程只編譯一次。"""
+    return re.compile(rf"{re.escape(process_type)}送電:\s*(\d{{2}}:\d{{2}})\s*~\s*(\d{{2}}:\d{{2}})")
 
 """
 # 建立一個全域變數(ulrlib3.PoolManger 的實例)，用來管理HTTP連線，可重複使用連線(比每次都重新開socket 快很多),
@@ -118,7 +134,13 @@ _POOL = urllib3.PoolManager(retries= urllib3.util.retry.Retry(
     backoff_factor=1,
     status_forcelist=[500,502,503,504],
     ),
-    timeout=10.0)
+    timeout=10.0,
+    maxsize=4)      # 同一主機最多保留 4 條 keep-alive 連線，讓 _fetch_soups() 同時抓取的頁面都能重複使用連線
+
+# 各頁只用到部份標籤：2138/2133 只讀 <area>，2137/2143 只讀 <span id=...>；
+# 以 SoupStrainer 讓解析器略過其它標籤，不為整頁建立節點樹
+_ONLY_AREA = SoupStrainer("area")
+_ONLY_SPAN = SoupStrainer("span")
 
 @dataclass
 class ScheduleResult:
@@ -234,8 +256,9 @@ def scrape_schedule(
     # ------------------------------------------------------------------
     # 1. Schedule rectangles from 2138 ---------------------------------
     # ------------------------------------------------------------------
-    soup_2138 = _fetch_soup(URL_2138, _POOL)
-    soup_2137 = _fetch_soup(URL_2137, _POOL)
+    # 四個頁面同時抓取；2137/2143 的 soup 也直接交給狀態解析函式，不再重抓一次
+    soup_2138, soup_2137, soup_2133, soup_2143 = _fetch_soups((URL_2138, URL_2137, URL_2133, URL_2143), _POOL,
+                                                              (_ONLY_AREA, _ONLY_SPAN, _ONLY_AREA, _ONLY_SPAN))
     failure_2138: Optional[bool] = None
     failure_2137: Optional[bool] = None
     reason: str = ""
@@ -248,13 +271,14 @@ def scrape_schedule(
 
     if not (failure_2138 or failure_2137):
         areas = soup_2138.find_all("area")
+        today = now.date()
         raw_sched: List[Tuple[int, datetime, datetime, str, str, str]] = []
         fixed_2138 = _FIXED_LANES_2138
         multi_proc = []  # 儲存發生相同爐號重覆進同一個製程時的記錄，並用來判斷是否做後續動作。
 
         for area in areas:
             title = area.get("title", "")
-            coords = [int(x) for x in re.findall(r"\d+", area.get("coords", ""))]
+            coords = [int(x) for x in _RE_INT.findall(area.get("coords", ""))]
 
             if len(coords) < 4:
                 continue
@@ -266,7 +290,7 @@ def scrape_schedule(
 
             res = _classify_rectangle("2138", coords, title, fixed_2138)
 
-            furnace_match = re.search(r"爐號[＝>:\s]*([A-Za-z0-9]+)", title)
+            furnace_match = _RE_FURNACE.search(title)
             furnace_id = furnace_match.group(1) if furnace_match else "未知"
 
             # The times in the green rectangles don't include seconds, so we have to handle them separately.
@@ -275,11 +299,10 @@ def scrape_schedule(
             re 在匹配時，改用findall 以list 的方式，回傳所有匹配的資料
             """
             if res.label == "輔助":
-                m = re.findall(rf"{process_type}送電:\s*(\d{{2}}:\d{{2}})\s*~\s*(\d{{2}}:\d{{2}})", title)
+                m = _aux_time_pattern(process_type).findall(title)
             else:
-                m = re.findall(_TIME_PATTERNS[process_type], title)
+                m = _TIME_PATTERNS[process_type].findall(title)
 
-            today = now.date().isoformat()
             if not m:
                 continue
             """ 
@@ -288,14 +311,14 @@ def scrape_schedule(
             """
             if len(m) < 2:
                start_ts, end_ts = m[0]
-               start = pd.to_datetime(f"{today} {start_ts}")
-               end = pd.to_datetime(f"{today} {end_ts}")
+               start = _clock_on(today, start_ts)
+               end = _clock_on(today, end_ts)
                raw_sched.append((coords[0], start, end, furnace_id, process_type, res.label))
             else:
                 for i in range(len(m)):
                     start_ts, end_ts = m[i]
-                    start = pd.to_datetime(f"{today} {start_ts}")
-                    end = pd.to_datetime(f"{today} {end_ts}")
+                    start = _clock_on(today, start_ts)
+                    end = _clock_on(today, end_ts)
                     multi_proc.append((coords[0], start, end, furnace_id, process_type, res.label))
 
         if multi_proc:
@@ -396,7 +419,7 @@ def scrape_schedule(
         # ------------------------------------------------------------------
         # 2. Process status from 2137 and merge with 2138 ------------------
         # ------------------------------------------------------------------
-        labels_2137 = _scrape_2137_labels(pool=_POOL, now=now)
+        labels_2137 = _scrape_2137_labels(pool=_POOL, now=now, soup=soup_2137)
         status_2137_df = pd.DataFrame(labels_2137)
         status_2137 = (status_2137_df
         .T
@@ -460,8 +483,6 @@ def scrape_schedule(
     # ------------------------------------------------------------------
     # 3. Schedule rectangles from 2133 ---------------------------------
     # ------------------------------------------------------------------
-    soup_2133 = _fetch_soup(URL_2133, _POOL)
-    soup_2143 = _fetch_soup(URL_2143, _POOL)
     a_2133 = _parse_2133_areas(soup_2133)
     raw_sched: List[Tuple[int, datetime, datetime, str, str, str]] = []
     fixed_2133 = _FIXED_LANES_2133
@@ -489,7 +510,7 @@ def scrape_schedule(
         areas_2133 = soup_2133.find_all("area")
         for area in areas_2133:
             title = area.get("title", "")
-            coords = [int(x) for x in re.findall(r"\d+", area.get("coords", ""))]
+            coords = [int(x) for x in _RE_INT.findall(area.get("coords", ""))]
             if len(coords) < 4:
                 continue
             x1, y1, x2, y2 = coords
@@ -502,7 +523,7 @@ def scrape_schedule(
                 continue
 
             res = _classify_rectangle("2133", coords, title, fixed_2133)
-            furnace_match = re.search(r"爐號[＝>:\s]*([A-Za-z0-9]+)", title)
+            furnace_match = _RE_FURNACE.search(title)
             furnace_id = furnace_match.group(1) if furnace_match else "未知"
 
             # x→time（用分段線性插值；先把查詢點插到 xs/ts上）
@@ -531,7 +552,7 @@ def scrape_schedule(
         # ------------------------------------------------------------------
         # 4. Process status from 2143 and merge with 2133 ------------------
         # ------------------------------------------------------------------
-        labels_2143 = _scrape_lf_status_2143(pool=_POOL, now=now)  # 你新增的 2137 抓取函式；或先用硬編輯測試
+        labels_2143 = _scrape_lf_status_2143(pool=_POOL, now=now, soup=soup_2143)  # 你新增的 2137 抓取函式；或先用硬編輯測試
         status_2143 = (pd.DataFrame(labels_2143)
         .T
         .reset_index()
@@ -633,7 +654,8 @@ def scrape_schedule(
 # INTERNAL HELPERS
 # ---------------------------------------------------------------------------
 def _scrape_2137_labels(*, pool: Optional[urllib3.PoolManager] = None,
-                       now: Optional[pd.Timestamp] = None) -> dict:
+                       now: Optional[pd.Timestamp] = None,
+                       soup: Optional[BeautifulSoup] = None) -> dict:
     """
     抓取 2137 狀態頁（電爐場），回傳各通道的「爐號 / 開始 / 結束 / 狀態」字典。
 
@@ -658,8 +680,8 @@ def _scrape_2137_labels(*, pool: Optional[urllib3.PoolManager] = None,
        OA 時間 (ph_lblShowNow_header)
       }
     """
-    pool = pool or _POOL
-    soup = _fetch_soup(URL_2137, pool)
+    if soup is None:            # 呼叫端已抓過頁面時直接沿用
+        soup = _fetch_soup(URL_2137, pool or _POOL)
     if soup is None:
         return {}
 
@@ -672,7 +694,8 @@ def _scrape_2137_labels(*, pool: Optional[urllib3.PoolManager] = None,
         mm = str(mm or "").strip()
         if not hh or not mm or not hh.isdigit() or not mm.isdigit():
             return None
-        t = pd.to_datetime(f"{now_date.date().isoformat()} {int(hh):02d}:{int(mm):02d}:00")
+        d = now_date.date()
+        t = pd.Timestamp(d.year, d.month, d.day, int(hh), int(mm))
         # 防止讀取到的"開始處理時間"為前一天，造成「開始時間」、「預計完成時間」的日期錯誤
         # 目前暫時用解析出來的時間，與現在時間的差距是否超過10小時間判斷，並處理。
         if abs(t-now) > pd.Timedelta(hours=10):
@@ -737,7 +760,8 @@ def _scrape_2137_labels(*, pool: Optional[urllib3.PoolManager] = None,
 
 
 def _scrape_lf_status_2143(pool: Optional[urllib3.PoolManager]=None,
-                           now: Optional[pd.Timestamp] = None
+                           now: Optional[pd.Timestamp] = None,
+                           soup: Optional[BeautifulSoup] = None
                            ) -> dict:
     """
     抓取 2143（LF 即時）頁面，回傳 LF1/LF2 的「爐號 / 開始 / 結束 / 狀態 / 停機時間」。
@@ -770,8 +794,8 @@ def _scrape_lf_status_2143(pool: Optional[urllib3.PoolManager]=None,
         "LF2": {...}
       }
     """
-    pool = pool or _POOL
-    soup = _fetch_soup(URL_2143, pool)
+    if soup is None:            # 呼叫端已抓過頁面時直接沿用
+        soup = _fetch_soup(URL_2143, pool or _POOL)
     if soup is None:
         return {"ok": False, "reason": "連線逾時或頁面無資料"}
     if not now:
@@ -922,14 +946,13 @@ def _preprocess_schedule(raw_sched: List, is_2138: bool = True):
         df1[['實際開始時間', '實際結束時間']] = df1[['實際開始時間', '實際結束時間']].apply(pd.to_datetime)
         return df1
 
-    # ---------- 將 raw_sched 轉為 DataFrame、排序並做跨日展開 ----------
-    df = pd.DataFrame(raw_sched)
-    sorted_df = df.sort_values([4, 0, 1])  # 依 製程(第4欄)、x座標(第0欄)、開始時間(第1欄)
-    sorted_list = list(sorted_df.itertuples(index=False, name=None))
+    # ---------- raw_sched 直接以 tuple 排序並做跨日展開，最後才一次建立 DataFrame ----------
+    # 依 製程(第4欄)、x座標(第0欄)、開始時間(第1欄)；sorted() 為穩定排序，與 sort_values 的結果相同
+    sorted_list = sorted(raw_sched, key=itemgetter(4, 0, 1))
 
     adjusted_cross_day_list = _adjust_cross_day(sorted_list, pd.Timestamp.now())
-    adjusted_cross_day_df = pd.DataFrame(adjusted_cross_day_list)
-    adjusted_cross_day_df.columns = ['x座標', '開始時間', '結束時間', '爐號', '製程', '類別']
+    adjusted_cross_day_df = pd.DataFrame(adjusted_cross_day_list,
+                                         columns=['x座標', '開始時間', '結束時間', '爐號', '製程', '類別'])
 
     # ---------- 分拆 plan / actual / aux ----------
     planed = adjusted_cross_day_df.loc[adjusted_cross_day_df['類別'].eq("表定")].copy()
@@ -1183,7 +1206,7 @@ def _parse_2133_areas(soup: BeautifulSoup) -> List[dict]:
     out = []
     for a in soup_2133.find_all("area"):
         title = a.get("title", "") or ""
-        coords = [int(x) for x in re.findall(r"\d+", a.get("coords",""))]
+        coords = [int(x) for x in _RE_INT.findall(a.get("coords",""))]
         if len(coords) < 4:
             continue
         x1,y1,x2,y2 = coords[:4]
@@ -1328,7 +1351,7 @@ def _collect_scc_calibration_by_lane(
     view_left, view_right = compute_view_bounds(candidates)
 
     by_lane: Dict[str, List[Tuple[int, pd.Timestamp]]] = {"SCC1": [], "SCC2": [], "SCC3": []}
-    today = now.normalize().date().isoformat()
+    today = now.normalize().date()
 
     for r in candidates:
         lane = lane_by_y(float(r["y_mid"]))
@@ -1339,8 +1362,8 @@ def _collect_scc_calibration_by_lane(
         if not m:
             continue
         s, e = m.groups()
-        t0 = pd.to_datetime(f"{today} {s}")
-        t1 = pd.to_datetime(f"{today} {e}")
+        t0 = _clock_on(today, s)
+        t1 = _clock_on(today, e)
         if t1 < t0:  # 同一矩形內跨午夜
             t1 += pd.Timedelta(days=1)
 
@@ -1430,7 +1453,8 @@ def _fix_cross_day_sequence(
         prev = t
     return out
 
-def _fetch_soup(url: str, pool: urllib3.PoolManager) -> Optional[BeautifulSoup]:
+def _fetch_soup(url: str, pool: urllib3.PoolManager,
+                parse_only: Optional[SoupStrainer] = None) -> Optional[BeautifulSoup]:
     """以 urllib3.PoolManager 取得 HTML 並回傳 BeautifulSoup 物件。
 
     重試（Retry）與逾時（timeout）由傳入的 pool 物件設定管理；
@@ -1439,6 +1463,7 @@ def _fetch_soup(url: str, pool: urllib3.PoolManager) -> Optional[BeautifulSoup]:
     Args:
         url (str): 目標頁面 URL。
         pool (urllib3.PoolManager): 已帶有 Retry/timeout 設定的連線池。
+        parse_only (SoupStrainer, optional): 只解析符合的標籤 (例如 _ONLY_AREA)；None 時解析整頁。
 
     Returns:
         Optional[BeautifulSoup]: 成功時的 soup 物件；失敗（非 200 或例外）時回傳 None。
@@ -1450,7 +1475,7 @@ def _fetch_soup(url: str, pool: urllib3.PoolManager) -> Optional[BeautifulSoup]:
     try:
         r = pool.request("GET", url)  # 重試與 timeout 由 pool 決定
         if r.status == 200:
-            return BeautifulSoup(r.data, "html.parser")
+            return BeautifulSoup(r.data, _HTML_PARSER, parse_only=parse_only)
         else:
             logger.warning(f"GET {url} 回應非 200：HTTP {r.status}")
             return None
@@ -1463,6 +1488,28 @@ def _fetch_soup(url: str, pool: urllib3.PoolManager) -> Optional[BeautifulSoup]:
         logger.exception(f"抓取 {url} 發生未預期錯誤：{e}")
         return None
 
+def _clock_on(day, clock: str) -> pd.Timestamp:
+    """把 'HH:MM' 或 'HH:MM:SS' 組成 day 當天的 Timestamp。
+
+    時間格式固定，直接以整數建構 Timestamp，省去 pd.to_datetime(f"{day} {clock}") 的字串格式推斷。
+    """
+    parts = clock.split(":")
+    return pd.Timestamp(day.year, day.month, day.day, int(parts[0]), int(parts[1]),
+                        int(parts[2]) if len(parts) > 2 else 0)
+
+
+def _fetch_soups(urls: Sequence[str], pool: urllib3.PoolManager,
+                 parse_only: Optional[Sequence[Optional[SoupStrainer]]] = None) -> List[Optional[BeautifulSoup]]:
+    """同時抓取多個頁面，回傳順序與 urls 相同（各頁失敗時為 None，行為同 _fetch_soup）。
+
+    PoolManager 可跨執行緒共用；各頁面等待回應的時間重疊，總耗時約等於最慢的一頁。
+    parse_only 與 urls 一一對應，傳給各頁的 _fetch_soup()。
+    """
+    strainers = parse_only if parse_only is not None else [None] * len(urls)
+    with ThreadPoolExecutor(max_workers=max(1, len(urls))) as ex:
+        return list(ex.map(lambda args: _fetch_soup(args[0], pool, parse_only=args[1]), zip(urls, strainers)))
+
+
 def _sort_schedules(raw: List[Tuple[int, datetime, datetime, str, str]]):
     """
     依製程群組、X 軸座標、起始時間排序。
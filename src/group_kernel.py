@@ -0,0 +1,60 @@
+"""
+group_kernel.py
+歷史需量 (history_demand_of_groups) 的群組加總核心。
+
+把「各迴路 96 個週期的 kWh -> MW 換算，再依群組 (Group1 的 B 類負載) 加總」
+收斂成一個只吃 NumPy 陣列的函式 aggregate_groups()：
+  - 有安裝 numba 時，使用 @njit 編譯的單執行緒迴圈版本，換算與加總在同一次掃描完成。
+  - 沒有安裝時，改用「群組 one-hot 矩陣 × 資料矩陣」的 NumPy 向量化版本。
+兩者計算結果相同 (NaN 視為 0，與 pandas groupby().sum() 一致)。
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba 為選用套件，未安裝時改走 NumPy 向量化版本
+    njit = None
+    HAS_NUMBA = False
+
+
+def _aggregate_groups_loop(mat, gid, n_groups, scale):
+    """
+    逐筆把 mat 的每一列乘上 scale 後，累加到 gid 指定的群組列。
+
+    參數:
+        mat: (迴路數, 週期數) 的 float64 陣列
+        gid: 各迴路所屬群組的整數編號 (0 ~ n_groups-1)；-1 代表不納入任何群組
+        n_groups: 群組數
+        scale: 換算係數 (kWh -> MW/15min 為 4.0)
+    回傳:
+        (n_groups, 週期數) 的加總結果
+    """
+    n_rows, n_cols = mat.shape
+    out = np.zeros((n_groups, n_cols))
+    for j in range(n_cols):
+        for i in range(n_rows):
+            g = gid[i]
+            if g >= 0:
+                v = mat[i, j]
+                if v == v:      # 略過 NaN
+                    out[g, j] += v * scale
+    return out
+
+
+def _aggregate_groups_numpy(mat, gid, n_groups, scale):
+    """
+    _aggregate_groups_loop() 的 NumPy 向量化版本，參數與輸出完全相同。
+    以 (n_groups, 迴路數) 的 one-hot 矩陣與資料矩陣相乘，一次完成所有群組、所有週期的加總。
+    """
+    onehot = np.zeros((n_groups, mat.shape[0]))
+    rows = np.flatnonzero(gid >= 0)
+    onehot[gid[rows], rows] = 1.0
+    return onehot @ np.where(np.isnan(mat), 0.0, mat) * scale
+
+
+# 模組載入時只建立一次；cache=True 讓編譯結果寫入 __pycache__，之後啟動免再花首次編譯時間。
+# 不開 parallel：資料只有約 178 x 96，多執行緒沒有好處；且主執行緒與 DashboardThread 可能同時呼叫，
+# 未安裝 TBB 時 numba 的 workqueue 執行緒層遇到並行呼叫會直接終止程式
+aggregate_groups = (njit(cache=True)(_aggregate_groups_loop) if HAS_NUMBA
+                    else _aggregate_groups_numpy)
@@ -4,7 +4,10 @@ from logging_utils import setup_logging, log_exceptions, timeit, get_logger
 setup_logging("./logs/app.log", level="INFO")
 logger = get_logger(__name__)
 
-import sys, re, math, time, os, shutil
+import sys, math, time, os, shutil, threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -14,7 +17,9 @@ from PyQt6 import QtCore, QtWidgets, QtGui
 from PyQt6.QtGui import QLinearGradient
 from UI import Ui_MainWindow
 from tariff_version import get_current_rate_type_v6, get_ng_generation_cost_v2, format_range
-from make_item import make_item
+from make_item import make_item, set_table_item
+from benefit_kernel import compute_benefit, BENEFIT_COLUMNS
+from group_kernel import aggregate_groups
 from visualization import TrendChartCanvas, TrendWindow, plot_tag_trends, PieChartArea, StackedAreaCanvas, GanttCanvas
 from ui_handler import setup_ui_behavior
 from data_sources.pi_client import PIClient
@@ -23,6 +28,255 @@ from data_sources.data_analysis import analyze_production_avg_cycle, estimate_sp
 from enum import Enum, auto
 from utils.mes_sample_tool import save_mes_snapshot, use_mes_snapshots
 
+try:
+    import python_calamine  # noqa: F401  有安裝時，parameter.xlsx 改用 Rust 實作的 calamine 讀取
+    _EXCEL_ENGINE = "calamine"
+except ImportError:     # python-calamine 為選用套件，未安裝時沿用 pandas 預設的 openpyxl
+    _EXCEL_ENGINE = None
+
+# tw3 TGs / TG1~TG4 即時量的 NG tooltip 樣板 (只需代入 NG 流量 flow、NG 貢獻電量 mw)
+_TT_TEMPLATE_TGS = ('<div style="background-color:#FFFFCC; padding:5px; border-radius:5px;">'
+                    '<b>NG 流量:</b> <span style="color:#0000FF;">{flow:.2f} Nm³/hr</span><br>'
+                    '<b>NG 貢獻電量:</b> <span style="color:#FF0000;">{mw:.2f} MW</span></div>')
+_TT_TEMPLATE_TG_CHILD = ('<div style="background-color:#F0F0F0; padding:5px; border-radius:5px;">'
+                         '<b>NG 流量:</b> <span style="color:#0000FF;">{flow:.2f} Nm³/hr</span><br>'
+                         '<b>NG 貢獻電量:</b> <span style="color:#FF0000;">{mw:.2f} MW</span></div>')
+
+# 更新/展開事件中反覆使用的筆刷；QBrush 為隱式共享，模組載入時建立一次，各處 setForeground/setBackground 共用
+_BRUSH_BLACK = QtGui.QBrush(QtGui.QColor(0, 0, 0))
+_BRUSH_RED = QtGui.QBrush(QtGui.QColor(255, 0, 0))
+_BRUSH_BLUE = QtGui.QBrush(QtGui.QColor(0, 0, 255))
+_BRUSH_TRANSPARENT = QtGui.QBrush(QtGui.QColor(0, 0, 0, 0))
+_BRUSH_SCHEDULE_CURRENT = QtGui.QBrush(QtGui.QColor("#FCF8BC"))    # tw4 生產中排程的淡黃色背景
+_BRUSH_WHITE = QtGui.QBrush(QtGui.QColor(255, 255, 255))
+_BRUSH_TREE_SUB = QtGui.QBrush(QtGui.QColor(180, 180, 180))      # tree widget 第 2 層以下的即時量數值
+_BRUSH_AVG_BACK = QtGui.QBrush(QtGui.QColor("#D6EAF8"))          # 歷史平均欄背景
+_BRUSH_AVG_TEXT = QtGui.QBrush(QtGui.QColor("#154360"))          # 歷史平均欄文字
+
+
+@lru_cache(maxsize=None)
+def _ui_font(point_size: int, bold: bool = False, family: Optional[str] = "微軟正黑體") -> QtGui.QFont:
+    """
+    排程、需量表等週期性重建時共用的字型；QFont 建構需查詢字型資料庫，
+    且須在 QApplication 建立後才能呼叫，因此不在模組載入時建立，而是第一次使用時建立後快取。
+    family 為 None 時沿用應用程式預設字型，只設定字級。
+    """
+    if family is None:
+        font = QtGui.QFont()
+        font.setPointSize(point_size)
+    else:
+        font = QtGui.QFont(family, point_size)
+    if bold:
+        font.setWeight(QtGui.QFont.Weight.Bold)
+    return font
+
+
+# tableWidget_4 各項目的 (名稱背景色, 數值背景色, 名稱文字色, 數值文字色)
+_BENEFIT_COLOR_CONFIG = {
+    '減少外購電金額': ('#8064A2', '#DDD0EC', 'white', 'blue'),
+    '增加外售電金額': ('#769d64', '#D8E4BC', 'white', 'blue'),
+    'NG 發電成本': ('#F79646', '#FBE4D5', 'white', 'red'),
+    'TG 維運成本': ('#F79646', '#FBE4D5', 'white', 'red'),
+    '總效益': ('#D9D9D9', '#EAF1FA', 'black', None)
+}
+_BENEFIT_DEFAULT = ('#FFFFFF', '#FFFFFF', 'black', 'black')
+
+# tableWidget_5 各時段列的背景色
+_PERIOD_BACKGROUND = {
+    '夏尖峰': '#FFD9B3',
+    '夏半尖峰': '#FFE5CC',
+    '夏離峰': '#FFF1E0',
+    '夏週六半': '#FFF8F0',
+    '非夏半尖峰': '#D0E6FF',
+    '非夏離峰': '#E3F0FF',
+    '非夏週六半': '#F0F8FF',
+    '小計': '#D9D9D9'
+}
+
+# check_box_event 切換負載顯示方式用：(tree 名稱, 節點 path, 迴路編號文字, 設備名稱文字)
+_TREE_NODE_LABELS = (
+    ('tw1', (0, 0, 0), '2H180', '#1 鼓風機'),
+    ('tw1', (0, 0, 1), '2H280', '#2 鼓風機'),
+    ('tw1', (0, 0, 2), '1H350', '#3 鼓風機'),
+    ('tw1', (0, 1), '4KA19', '#1 燒結風車'),
+    ('tw1', (0, 2, 0), '4KB19', '#2-1'),
+    ('tw1', (0, 2, 1), '4KB29', '#2-2'),
+    ('tw1', (0, 3, 0), '2KA41', '#1'),
+    ('tw1', (0, 3, 1), '2KB41', '#2'),
+    ('tw1', (1, 0), 'AJ320', 'EAF 集塵'),
+    ('tw1', (1, 1, 0), '5KA18', '#1'),
+    ('tw1', (1, 1, 1), '5KA28', '#2'),
+    ('tw1', (1, 1, 2), '5KB18', '#3'),
+    ('tw1', (1, 1, 3), '5KB28', '#4'),
+    ('tw1', (3, 0, 0), '3KA14', '1-1'),
+    ('tw1', (3, 0, 1), '3KA15', '1-2'),
+    ('tw1', (3, 1, 0), '3KA24', '2-1'),
+    ('tw1', (3, 1, 1), '3KA25', '2-2'),
+    ('tw1', (3, 2, 0), '3KB12', '3-1'),
+    ('tw1', (3, 2, 1), '3KB22', '3-2'),
+    ('tw1', (3, 2, 2), '3KB28', '3-3'),
+    ('tw1', (3, 3, 0), '3KA16', '#1'),
+    ('tw1', (3, 3, 1), '3KA26', '#2'),
+    ('tw1', (3, 3, 2), '3KA17', '#3'),
+    ('tw1', (3, 3, 3), '3KA27', '#4'),
+    ('tw1', (3, 3, 4), '3KB16', '#5'),
+    ('tw1', (3, 3, 5), '3KB26', '#6'),
+    ('tw1', (3, 3, 6), '3KB17', '#7'),
+    ('tw1', (3, 3, 7), '3KB27', '#8'),
+    ('tw1', (3, 4, 0), '2KA19', 'IDF1 & BFP1,2'),
+    ('tw1', (3, 4, 1), '2KA29', 'IDF2 & BFP3,4'),
+    ('tw1', (3, 4, 2), '2KB19', 'IDF3 & BFP5,6'),
+    ('tw1', (3, 4, 3), '2KB29', 'IDF4 & BFP7,8'),
+    ('tw2', (1,), 'AH120', '電爐'),
+    ('tw2', (2,), 'AH190', '#1 精煉爐'),
+    ('tw2', (3,), 'AH130', '#2 精煉爐'),
+    ('tw2', (4,), '1H450', '#1 轉爐精煉爐'),
+    ('tw2', (5,), '1H360', '#2 轉爐精煉爐'),
+    ('tw3', (0, 0), '2H120 & 2H220', 'TG1'),
+    ('tw3', (0, 1), '5H120 & 5H220', 'TG2'),
+    ('tw3', (0, 2), '1H120 & 1H220', 'TG3'),
+    ('tw3', (0, 3), '1H320 & 1H420', 'TG4'),
+    ('tw3', (1, 0), '4KA18', 'TRT#1'),
+    ('tw3', (1, 1), '5KB19', 'TRT#2'),
+    ('tw3', (2, 0), '4H120', 'CDQ#1'),
+    ('tw3', (2, 1), '4H220', 'CDQ#2'),
+)
+
+# tw1 / tw1_2 的單一迴路葉節點 (path, tag)；即時量 (col 1) 與歷史平均 (col 2) 共用同一份規格
+_TW1_LEAVES = (
+    ((0, 0, 0), '2H180'),
+    ((0, 0, 1), '2H280'),
+    ((0, 0, 2), '1H350'),
+    ((0, 1), '4KA19'),
+    ((0, 2, 0), '4KB19'),
+    ((0, 2, 1), '4KB29'),
+    ((0, 3, 0), '2KA41'),
+    ((0, 3, 1), '2KB41'),
+    ((0, 4), 'W2'),
+    ((1, 0), 'AJ320'),
+    ((1, 1, 0), '5KA18'),
+    ((1, 1, 1), '5KA28'),
+    ((1, 1, 2), '5KB18'),
+    ((1, 1, 3), '5KB28'),
+    ((1, 2), 'W3'),
+    ((3, 0, 0), '3KA14'),
+    ((3, 0, 1), '3KA15'),
+    ((3, 1, 0), '3KA24'),
+    ((3, 1, 1), '3KA25'),
+    ((3, 2, 0), '3KB12'),
+    ((3, 2, 1), '3KB22'),
+    ((3, 2, 2), '3KB28'),
+    ((3, 3, 0), '3KA16'),
+    ((3, 3, 1), '3KA26'),
+    ((3, 3, 2), '3KA17'),
+    ((3, 3, 3), '3KA27'),
+    ((3, 3, 4), '3KB16'),
+    ((3, 3, 5), '3KB26'),
+    ((3, 3, 6), '3KB17'),
+    ((3, 3, 7), '3KB27'),
+    ((3, 4, 0), '2KA19'),
+    ((3, 4, 1), '2KA29'),
+    ((3, 4, 2), '2KB19'),
+    ((3, 4, 3), '2KB29'),
+    ((3, 5), 'W5'),
+    ((4,), 'WA'),
+)
+
+# tw2 / tw2_2 的單一設備節點 (path, tag)；數值接近 0 時顯示 '--' (b=0)
+_TW2_LEAVES = (
+    ((1,), 'AH120'),
+    ((2,), 'AH190'),
+    ((3,), 'AH130'),
+    ((4,), '1H450'),
+    ((5,), '1H360'),
+)
+
+# tw1 / tw3 展開事件：展開時 (True) 與收合時 (False) 的 (第一欄, 第二欄) 對齊，及即時量欄的前景色
+_ALIGN_EXPANDED = {
+    True: (QtCore.Qt.AlignmentFlag.AlignLeft, QtCore.Qt.AlignmentFlag.AlignLeft),
+    False: (QtCore.Qt.AlignmentFlag.AlignCenter, QtCore.Qt.AlignmentFlag.AlignRight),
+}
+_BRUSH_EXPANDED = {True: _BRUSH_TRANSPARENT, False: _BRUSH_BLACK}
+# tw1 展開時要隱藏即時量的子節點 (top-level 索引, 子項索引)；W4 (2) 僅更新對齊
+_TW1_TOGGLE_CHILDREN = (
+    (0, 0), (0, 2), (0, 3),                     # w2: 鼓風機群、#2 燒結風車群、#2 屋頂風扇&runner 群
+    (1, 1),                                     # w3: 轉爐除塵
+    (3, 0), (3, 1), (3, 2), (3, 3), (3, 4),     # w5: O2#1、O2#2、O2#3、空壓機群、IDF 群
+)
+
+# 小計節點 path -> pre_check 的 describe 索引 b (未列出者用預設值)；歷史與即時的 W4 節點顯示規則不同
+_TW1_HIST_B = {(2,): 0, (2, 0): 0, (2, 1): 0}
+_TW1_RT_B = {(2, 0): 4}
+_TW2_B = {(0,): 0}
+
+# pre_check / pre_check2 在數值異常或接近 0 時的顯示文字 (以索引 b 選用)
+_DESCRIBE = ('--', '停機', '資料異常', '未使用', '0 MW', '未發電')
+
+def _describe_texts(pending_data: pd.Series, fmt: str, b: int) -> pd.Series:
+    """
+    pre_check_series / pre_check2_series 共用：NaN -> '資料異常'、> 0.1 依 fmt 格式化、其餘 -> _DESCRIBE[b]。
+    先整批填入描述文字，只對實際會顯示數值 (> 0.1) 的元素做字串格式化，停機、未使用的迴路不再白做一次 %-format。
+    """
+    arr = pending_data.to_numpy(dtype=float, na_value=np.nan)
+    text = np.full(arr.shape, _DESCRIBE[b], dtype=object)
+    text[np.isnan(arr)] = _DESCRIBE[2]
+    show = np.flatnonzero(arr > 0.1)
+    if show.size:
+        text[show] = [fmt % v for v in arr[show].tolist()]
+    return pd.Series(text, index=pending_data.index)
+
+# pre_check 依類別 c 的數值格式 (預先綁定的 str.format，.2f 本身即會四捨五入)；未列出的類別視為 'power'
+_PRE_CHECK_FMT = {
+    'gas': '{:.1f}'.format,
+    'h': '{:.2f}'.format,
+    'power': '{:.2f} MW'.format,
+}
+
+# 一天 96 個 15 分鐘週期的起始時間 ('00:00' ~ '23:45')，作為 history_datas_of_groups 的時間欄位名稱
+_TIME_LIST = pd.date_range('00:00', '23:45', freq='15min').strftime('%H:%M').tolist()
+_TIME_POS = {t: j for j, t in enumerate(_TIME_LIST)}     # 'HH:MM' -> 欄位位置
+
+# 效益評估的七個電價時段 (依 tableWidget_5 顯示順序)；'未知分類' 為 get_current_rate_type_v6 查無時段時的標籤
+_TOU_PERIODS = ('夏尖峰', '夏半尖峰', '夏離峰', '夏週六半', '非夏半尖峰', '非夏離峰', '非夏週六半')
+_TOU_PERIOD_DTYPE = pd.CategoricalDtype(categories=_TOU_PERIODS + ('未知分類',), ordered=True)
+
+# cost_benefit 中只在計算過程使用、不顯示也不是金額的電量欄位，改存 float32 以減半記憶體；
+# 金額欄位 (NT$ 加總需要完整精度) 與畫面會顯示的 NG 總用量、即時/原始TPC 維持 float64
+_BENEFIT_F32_COLUMNS = ['中龍發電量', '全廠用電量', 'NG 增加的發電度數', 'NG 增加的發電量']
+
+# 效益表 tooltip 共用的 HTML 外框與「單價（適用期間）」單行樣板
+_TOOLTIP_WRAP = "<html><body><div style='white-space:pre; font-size:9pt;'>{}</div></body></html>"
+_VERSION_LINE = ("<span style='color:#004080;'>{price:.4f} 元/kWH</span> "
+                 "<span style='color:#999999;'>（適用：{start} ~ {end}）</span>")
+
+@lru_cache(maxsize=256)
+def _cost_cell_tooltip_html(ng_cost: float, tg_cost: float) -> str:
+    """ 以 (NG, TG) 成本的原始數值快取 tooltip HTML；小計列與時段列常產生相同內容 """
+    return _TOOLTIP_WRAP.format(
+        f"NG 發電成本：<span style='color:#C00000;'>${ng_cost:,.0f}</span> 元<br>"
+        f"TG 維運成本：<span style='color:#C00000;'>${tg_cost:,.0f}</span> 元"
+    )
+
+# _label_positions() 的快取：[(index, 首次出現位置, 最後出現位置), ...]，最近使用的放最前面
+_LABEL_POS_CACHE: list = []
+
+def _label_positions(labels: pd.Index) -> tuple:
+    """
+    回傳 labels 中各名稱「首次出現」與「最後出現」的位置 dict。
+    即時值與歷史值的 index 在每次更新之間都相同，只在第一次 (或 index 改變時) 建立位置表，
+    之後以 Index.equals() 的 C 層比對確認即可沿用；只保留最近兩組 (即時、歷史)。
+    """
+    for i, (cached, first, last) in enumerate(_LABEL_POS_CACHE):
+        if cached is labels or cached.equals(labels):
+            if i:
+                _LABEL_POS_CACHE.insert(0, _LABEL_POS_CACHE.pop(i))
+            return first, last
+    last = {name: i for i, name in enumerate(labels)}                    # 區段結尾取最後一次出現的位置
+    first = {name: i for i, name in reversed(list(enumerate(labels)))}  # 區段起點取第一次出現的位置
+    _LABEL_POS_CACHE.insert(0, (labels, first, last))
+    del _LABEL_POS_CACHE[2:]
+    return first, last
+
 def get_path(filename: str, is_config: bool = False) -> Path:
     """
     統一路徑取得函式：
@@ -65,6 +319,154 @@ def get_path(filename: str, is_config: bool = False) -> Path:
         dev_base = Path(__file__).resolve().parents[1]
         return dev_base / filename
 
+@contextmanager
+def frozen_widgets(*widgets):
+    """
+    批次更新 Qt 元件時使用：暫停重繪、訊號與排序，離開 with 區塊後再恢復原狀態並重繪一次。
+
+    使用方式：
+        with frozen_widgets(self.tableWidget_4, self.tableWidget_5):
+            ... 大量 setItem / setText ...
+    """
+    states = []
+    for w in widgets:
+        sorting = w.isSortingEnabled() if hasattr(w, "isSortingEnabled") else None
+        if sorting:
+            w.setSortingEnabled(False)
+        states.append((w, w.updatesEnabled(), w.blockSignals(True), sorting))
+        w.setUpdatesEnabled(False)
+    try:
+        yield
+    finally:
+        for w, updates, signals_blocked, sorting in reversed(states):
+            if sorting:
+                w.setSortingEnabled(True)
+            w.blockSignals(signals_blocked)
+            w.setUpdatesEnabled(updates)
+
+def _unique_versions(vers) -> list:
+    """
+    去除重複的電價版本 dict ({'value', 'version'})，保留第一次出現的順序；缺值 (NaN) 與空 dict 略過。
+    版本 dict 不可 hash，改以 (value, version) 為去重的鍵，清單中仍是原本的 dict。
+    """
+    unique = {}
+    for ver in vers:
+        if isinstance(ver, dict) and ver:
+            unique.setdefault((ver.get('value'), ver.get('version')), ver)
+    return list(unique.values())
+
+def _restyle(widget, css: str):
+    """
+    樣式表內容不同時才呼叫 setStyleSheet()。
+    setStyleSheet() 即使內容相同也會重新 polish 元件並送出 StyleChange，造成整個元件重繪。
+    """
+    if widget.styleSheet() != css:
+        widget.setStyleSheet(css)
+
+def _set_item_text(item, col: int, text: str):
+    """
+    QTreeWidgetItem 該欄文字不同時才呼叫 setText()。
+    setText() 即使文字相同也會送出 itemChanged / dataChanged，讓 view 重新排版並重繪該列；
+    多數迴路在相鄰兩次更新之間的顯示文字不變，比對後可省去大部分的寫入。
+    """
+    if item.text(col) != text:
+        item.setText(col, text)
+
+@lru_cache(maxsize=32)
+def _query_past_window(st: pd.Timestamp, et: pd.Timestamp, tags: tuple, summary: str, interval: str) -> pd.DataFrame:
+    """ 已完全結束的時間區間，PI 的歷史值不會再變動；同樣的查詢條件直接沿用上一次的結果 """
+    return pi_client.query(st=st, et=et, tags=tags, summary=summary, interval=interval)
+
+def _query_cbl_window(st: pd.Timestamp, et: pd.Timestamp, tags: tuple, summary: str, interval: str) -> pd.DataFrame:
+    """
+    CBL 參考日的 PI 查詢。使用者調整日期/時段重新計算時，參考日區間多半與上一次相同，
+    區間已結束 (et <= 現在) 時走 _query_past_window() 的快取；仍包含今天的區間每次重新查詢。
+    回傳的 DataFrame 會被共用，呼叫端不可原地修改。
+    """
+    if et <= pd.Timestamp.now():
+        return _query_past_window(st, et, tags, summary, interval)
+    return pi_client.query(st=st, et=et, tags=tags, summary=summary, interval=interval)
+
+def _cbl_demands(cbl_date: list, by_kwh: bool, start_time: pd.Timedelta, n_hours: int, n_days: int) -> pd.DataFrame:
+    """
+    CBL 參考日需量的 PI 查詢與 pandas 運算；不讀寫任何 Qt 元件，可直接在子執行緒 (CblThread) 中執行。
+    參數由 MyMainWindow._cbl_params() 在主執行緒讀出。
+
+    計算方式
+    --------
+    - kWh 模式（by_kwh）：
+        讀取 1510/1520 兩條 kWh tag，將同時刻兩者相加後乘以 4，視為 15 分鐘需量序列。
+    - P 模式：
+        以 summary="AVERAGE", interval='6s' 讀取功率，將負值剪成 0，並做 resample('15T').mean()，
+        再把兩條迴路相加為該時刻之 15 分鐘需量。
+
+    回傳
+    ----
+    pandas.DataFrame
+        欄為各參考日（日期），列為該參考日中「指定時段」涵蓋的 15 分鐘需量。
+        該結果通常會再被 mean(axis=0, skipna=True) 取得 CBL。
+
+    備註
+    ----
+    - P 模式先 clip(lower=0) 再平均，確保需量不被負值拉低。
+    - 取樣起訖時刻依開始時間與時長（不可跨日）逐日對應。
+    """
+    # 根據 by_kwh (radioButton_5)，判斷用kwh 或p 計算需量。
+    st = pd.Timestamp(cbl_date[-1])
+    et = pd.Timestamp(cbl_date[0] + pd.offsets.Day(1))
+    if by_kwh:
+        tags=('W511_MS1/161KV/1510/kwh11', 'W511_MS1/161KV/1520/kwh11')
+        buffer2 = _query_cbl_window(st, et, tags, "RANGE", "15m")     # 2
+        arr = buffer2.to_numpy(dtype=np.float64)
+        values = (arr[:, 0] + arr[:, 1]) * 4        # 3 兩迴路相加 x4，直接在陣列上一次算完
+    else:
+        tags=('W511_MS1/161KV/1510/P', 'W511_MS1/161KV/1520/P')
+        buffer2 = _query_cbl_window(st, et, tags, "AVERAGE", "6s")    # 2
+        buffer2 = buffer2.clip(lower=0)
+        buffer2 = buffer2.resample('15T').mean()
+        arr = buffer2.to_numpy(dtype=np.float64)
+        values = arr[:, 0] + arr[:, 1]              # 3
+    times = buffer2.index.to_numpy()                # values 各點對應的時間
+
+    """
+        1. 每天要取樣的起始時間點, 存成list
+        2. 以 searchsorted 一次找出各參考日時段 [起點, 起點 + span] 在 times 中的位置範圍
+        3. 各參考日的取樣點數與「距當天起始時間的偏移量」都相同時 (資料完整的一般情況)，
+           以位置矩陣一次取出 (週期數, 天數) 的數值，直接建成 DataFrame
+        4. 有缺漏資料而長度不一時，改為逐日切出、以偏移量為 index 做 concat 對齊
+    """
+    # 起始時刻與時段長度在迴圈外各算一次；各參考日的起點以 DatetimeIndex + Timedelta 一次算出
+    span = np.timedelta64((n_hours * 4 - 1) * 15, 'm')
+    days = cbl_date[:n_days]
+    keys = [d.date() for d in days]
+
+    starts = (pd.DatetimeIndex(days) + start_time).to_numpy()     # 1
+    lo = np.searchsorted(times, starts, side='left')                # 2
+    hi = np.searchsorted(times, starts + span, side='right')
+
+    n = int(hi[0] - lo[0]) if len(lo) else 0
+    if n and (hi - lo == n).all():
+        pos = lo[:, None] + np.arange(n)                            # (天數, 週期數) 的位置矩陣
+        offsets = times[pos] - starts[:, None]
+        if (offsets == offsets[0]).all():                           # 3
+            return pd.DataFrame(values[pos].T, index=pd.TimedeltaIndex(offsets[0]), columns=keys)
+
+    demands_buffer = {}                                             # 4
+    for key, p_start, i, j in zip(keys, starts, lo, hi):
+        demands_buffer[key] = pd.Series(values[i:j], index=pd.TimedeltaIndex(times[i:j] - p_start))
+    demands = pd.concat(demands_buffer, axis=1)
+
+    return demands
+
+def _centered_item(text: str) -> QtWidgets.QTableWidgetItem:
+    """
+    建立水平、垂直都置中的 QTableWidgetItem；對齊在加入表格前設定好，不必 setItem 後再以 item() 取回設定。
+    (舊程式用的 4 | 4 只等於 AlignHCenter，沒有垂直置中)
+    """
+    item = QtWidgets.QTableWidgetItem(text)
+    item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+    return item
+
 # 設定全域未捕捉異常的 hook
 def handle_uncaught(exc_type, exc_value, exc_traceback):
     # 如果是 Ctrl+C 等 KeyboardInterrupt，就交還給預設行為
@@ -76,17 +478,19 @@ def handle_uncaught(exc_type, exc_value, exc_traceback):
 
 class DashboardThread(QtCore.QThread):
     """
-    在背景固定頻率（預設每 11 秒）呼叫 MainWindow.dashboard_value() 以抓取即時值，
-    並透過 sig_pie_series(pd.Series) 把pie chart 要用的 c_values 發送回 **主執行緒**。
-    同時呼叫 main_win.make_stacked_frames()，丟回堆疊圖需要的 DataFrame
+    在背景固定頻率（預設每 11 秒）呼叫 MainWindow.fetch_dashboard_values() 以抓取即時值，
+    並透過 sig_dashboard(dict) 把要顯示的結果、sig_pie_series(pd.Series) 把pie chart 要用的 c_values
+    發送回 **主執行緒**。同時呼叫 main_win.make_stacked_frames()，丟回堆疊圖需要的 DataFrame
 
     特性
     ------
-    - 支援 requestInterruption() 平滑中斷
-    - 內建例外處理與狀態列（statusBar）訊息
-    - 每次循環將 dashboard_value() 的 pd.Series(shape≈226) 發出，用於 pie 圖繪製
+    - 只做資料取得（PI 查詢與計算），**不在子執行緒動任何 Qt UI**；表格、標籤、狀態列都由主執行緒的槽更新
+    - 支援 requestInterruption() 平滑中斷；週期之間以 Event.wait() 等待，不再每 0.5 秒醒來輪詢，收到中斷時立即返回
+    - 內建例外處理，錯誤訊息同樣以 sig_dashboard 送回主執行緒顯示於狀態列
+    - 每次循環將 c_values 的 pd.Series(shape≈226) 發出，用於 pie 圖繪製
     """
     # 新增把資料送回主執行緒的 signal
+    sig_dashboard = QtCore.pyqtSignal(object)       # payload: fetch_dashboard_values() 回傳的 dict
     sig_pie_series = QtCore.pyqtSignal(object)      # 用來傳 pd.Series (shape=226)
     sig_stack_df = QtCore.pyqtSignal(object)        # 堆疊圖, payload 會是dict
 
@@ -94,18 +498,25 @@ class DashboardThread(QtCore.QThread):
         super().__init__(main_win)
         self.main_win = main_win
         self.interval = interval
+        self._wake = threading.Event()      # requestInterruption() 時設定，讓週期間的等待立即結束
+
+    def requestInterruption(self) -> None:
+        super().requestInterruption()
+        self._wake.set()
 
     def run(self) -> None:
         # 只要沒有被 requestInterruption() 就持續執行
         while not self.isInterruptionRequested():
             try:
-                c_values: pd.Series = self.main_win.dashboard_value()
+                payload = self.main_win.fetch_dashboard_values(by_kwh=self.main_win.demand_by_kwh)
+                self.sig_dashboard.emit(payload)
                 # 正常才發射給主執行緒
+                c_values = payload.get("c_values")
                 if isinstance(c_values, pd.Series):
                     self.sig_pie_series.emit(c_values)
             except Exception:
                 logger.error("DashboardThread 未捕捉例外", exc_info=True)
-                self.main_win.statusBar().showMessage("⚠ 更新即時值失敗，請檢查 PI Server 連線", 0)
+                self.sig_dashboard.emit({"error": "⚠ 更新即時值失敗，請檢查 PI Server 連線"})
 
             # 2) 新增堆疊圖資料（單位 & 燃料）
             try:
@@ -132,11 +543,8 @@ class DashboardThread(QtCore.QThread):
             except Exception:
                 logger.error("DashboardThread 產生堆疊圖資料失敗", exc_info=True)
 
-            # 分段 sleep，以便快速響應中斷
-            slept = 0.0
-            while slept < self.interval and not self.isInterruptionRequested():
-                time.sleep(0.5)
-                slept += 0.5
+            # 阻塞等待到下一個週期；中斷時 _wake 被設定而提早醒來
+            self._wake.wait(self.interval)
         logger.info("DashboardThread 己收到中斷，停止執行。")
 
 class MesMode(Enum):
@@ -223,6 +631,33 @@ class ScheduleThread(QtCore.QThread):
                 slept += 0.5
         logger.info("ScheduleThread 己收到中斷，停止執行。")
 
+class TableValueDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    依欄位統一繪製表格數值欄的樣式 (背景、文字顏色、字型、對齊)，
+    不必在每個 QTableWidgetItem 上逐格 setBackground / setForeground / setFont。
+
+    參數:
+        column_styles (dict): {column: (背景色, 文字色, 是否粗體)}，顏色可為 '#RRGGBB' 字串。
+        parent (QObject, optional): 父物件，通常是套用此 delegate 的表格。
+    """
+    def __init__(self, column_styles: dict, parent=None):
+        super().__init__(parent)
+        # 畫筆/字型只在建立時產生一次，paint 時直接沿用
+        self._styles = {}
+        for col, (back, text, bold) in column_styles.items():
+            font = QtGui.QFont('微軟正黑體', 12)
+            font.setBold(bold)
+            self._styles[col] = (QtGui.QBrush(QtGui.QColor(back)), QtGui.QColor(text), font)
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        style = self._styles.get(index.column())
+        if style is None:
+            return
+        option.backgroundBrush, text_color, option.font = style
+        option.palette.setColor(QtGui.QPalette.ColorRole.Text, text_color)
+        option.displayAlignment = QtCore.Qt.AlignmentFlag.AlignRight
+
 class LoadingOverlay(QtWidgets.QWidget):
     """
         可在特定期間，用來阻止主視窗所有互動
@@ -360,6 +795,29 @@ class PiReader(QtCore.QThread):
             self.data_ready.emit(self.key, e)
 
 
+class CblThread(QtCore.QThread):
+    """
+    在子執行緒中計算 CBL 參考日需量 (_cbl_demands)，避免 PI 查詢與 pandas 運算期間主視窗凍結。
+
+    屬性:
+        token (int): 發出此次查詢時的序號；主執行緒只採用最新序號的結果，較早送出的查詢結果直接丟棄。
+        params (dict): MyMainWindow._cbl_params() 在主執行緒讀出的參數。
+    """
+    result_ready = QtCore.pyqtSignal(int, object)   # (token, DataFrame 或 exception)
+
+    def __init__(self, token: int, params: dict, parent=None):
+        super().__init__(parent)
+        self.token = token
+        self.params = params
+
+    def run(self):
+        try:
+            self.result_ready.emit(self.token, _cbl_demands(**self.params))
+        except Exception as e:
+            logger.exception("CBL 需量計算失敗")
+            self.result_ready.emit(self.token, e)
+
+
 class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
     def __init__(self):
         super(MyMainWindow, self).__init__()
@@ -369,10 +827,16 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.pi_client = pi_client
         excel_path = get_path("parameter.xlsx", is_config=True)
         # -------- 從外部資料讀取設定檔，並儲存成這個實例本身的成員變數 -----------
-        self.tag_list = pd.read_excel(excel_path, sheet_name=0).dropna(how='all')
-        self.special_dates = pd.read_excel(excel_path, sheet_name=1)
-        self.unit_prices = pd.read_excel(excel_path, sheet_name=2, index_col=0)
-        self.time_of_use = pd.read_excel(excel_path, sheet_name=3)
+        # 活頁簿只開啟、解析一次，再分別取出 4 個工作表
+        with pd.ExcelFile(excel_path, engine=_EXCEL_ENGINE) as xl:
+            self.tag_list = xl.parse(0).dropna(how='all')
+            self.special_dates = xl.parse(1)
+            self.unit_prices = xl.parse(2, index_col=0)
+            self.time_of_use = xl.parse(3)
+        self._cache_tag_list_slices()
+        self._refresh_special_dates()
+        self._ng_cost_cache_src = None      # ng_generation_cost() 快取所對應的 unit_prices 物件
+        self._ng_cost_cache = {}            # 日期 -> get_ng_generation_cost_v2() 結果
 
         # ---------------統一設定即時值、平均值的背景及文字顏色----------------------
         self.real_time_text = "#145A32"   # 即時量文字顏色 深綠色文字
@@ -380,6 +844,8 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.average_text = "#154360"     # 平均值文字顏色 深藍色文字
         self.average_back = "#D6EAF8"     # 平均值背景顏色 淡藍色背景
         self.history_datas_of_groups = pd.DataFrame()  # 用來紀錄整天的各負載分類的週期平均值
+        self._hist_arr = np.empty((0, len(_TIME_LIST)))  # history_datas_of_groups 的 96 個週期欄位 (float64 矩陣)
+        self._hist_index = pd.Index([])                 # 與 _hist_arr 列順序相同的 index
         self.hsm_attribute = pd.DataFrame()            # 用來紀錄從HSM 用電資料分析出來的特性
         self._history_results ={}           # 在on_data_ready() 中用來暫存結果 dict
         self._pending_column = None         # 等待更新(update_history_to_tws()) 的欄位key
@@ -389,8 +855,22 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.pie: Optional["PieChartArea"] = None       # 和 pie chart 有關
         self.loader = LoadingOverlay(self)  # 彈出半透明loading 的
         self._styling_in_progress = False
+        self._tw2_sized = False             # tableWidget_2 欄寬/列高只需依內容調整一次 (HH:MM 與數值格式固定)
+        self._tw_sized_shape = None         # tableWidget 最後一次依內容調整時的 (row, column) 數量
+        self._cbl_token = 0                 # 最新一次 CBL 查詢的序號，CblThread 帶回的舊序號結果會被丟棄
+        self._cbl_n_days = 0                # 最新一次 CBL 查詢的參考天數
+        self._tg_state = {}                 # tw3 TGs(-1)、TG1~TG4(0~3) 上一次 NG 貢獻電量是否 > 0
+        self._tg_tip = {}                   # tw3 TGs(-1)、TG1~TG4(0~3) 上一次 tooltip 使用的 (NG 流量, 換算係數)
+        self._tree_item_cache = {}          # _cached_item() 用：(id(tree), path) -> QTreeWidgetItem
+        self._label_items = None            # check_box_event() 用：[(item, tag_text, name_text), ...]，首次切換時建立
+        self._leaf_items = {}               # _set_leaves() 用：(tree, 規格表) -> 葉節點 item 清單
+        self._benefit_layout_ready = False  # tableWidget_4/5 的固定結構(表頭、欄寬)是否已建立
+        self.tw3.setUniformRowHeights(True)  # tw3 各列高度一致，省去逐列計算高度
 
         self.radioButton_5.setChecked(True)  # 支援選擇 KWH 或 P 值的查詢方式 (這個項目要先做)
+        # 背景執行緒不直接讀 radioButton_5，改讀這個隨 toggled 訊號同步的旗標
+        self.demand_by_kwh: bool = self.radioButton_5.isChecked()
+        self.radioButton_5.toggled.connect(self._on_demand_mode_toggled)
         self.dashboard_value()
         # 建立趨勢圖元件並加入版面配置
         self.trend_chart = TrendChartCanvas(self)
@@ -736,6 +1216,17 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         # 啟動執行緒
         self.scheduler_thread.start()
 
+    @staticmethod
+    def _schedule_span_text(df: pd.DataFrame) -> pd.Series:
+        """
+        將排程的開始/結束時間整欄轉成 tw4 顯示用的 "HH:MM:SS ~ HH:MM:SS" 文字。
+        :param df: 含 '開始時間'、'結束時間' 兩欄的排程 DataFrame
+        :return: 與 df 相同 index 的文字 Series
+        """
+        start = pd.to_datetime(df["開始時間"]).dt.strftime("%H:%M:%S")
+        end = pd.to_datetime(df["結束時間"]).dt.strftime("%H:%M:%S")
+        return start + " ~ " + end
+
     def update_tw4_schedule(self, res):
         """
         以階層節點更新 tw4（QTreeWidget）的製程排程清單。
@@ -763,120 +1254,128 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         current_df = res.current
         future_df = res.future
 
-        self.tw4.clear()
-
         process_map = {"EAF": None, "LF1-1": None, "LF1-2": None}
 
-        for process_name in process_map.keys():
-            process_parent = QtWidgets.QTreeWidgetItem(self.tw4)
-            process_parent.setText(0, process_name)
-            self.tw4.addTopLevelItem(process_parent)
-
-            # **過濾當前製程的排程**
-            active_schedules = pd.concat([
-                current_df.assign(類別="current"),
-                future_df.assign(類別="future")
-            ], ignore_index=True).sort_values(by="開始時間")
-            active_schedules = active_schedules[
-                (active_schedules["製程"] == process_name) |
-                ((process_name == "EAF") & active_schedules["製程"].isin(["EAFA", "EAFB"]))
-                ]
-
-            past_schedules = past_df[
-                (past_df["製程"] == process_name) |
-                ((process_name == "EAF") & past_df["製程"].isin(["EAFA", "EAFB"]))
-                ].sort_values(by="開始時間")
-
-            # **處理 "生產或等待中"**
-            active_parent = QtWidgets.QTreeWidgetItem(process_parent)
-            active_parent.setFont(0, QtGui.QFont("微軟正黑體", 10))
-            active_parent.setText(0, "生產或等待中")
-            process_parent.addChild(active_parent)
-
-            if not active_schedules.empty:
-                """
-                從iterrows() 改為itertuples() 的說明:
-                1. 效能較快、且省記憶體
-                2. itertuples(index=False)：避免產生多餘的 Index 欄位。
-                2. row.開始時間、row.類別 等是透過屬性方式存取。
-                3. hasattr(row, "製程狀態") 是為了避免製程狀態 欄位在某些 DataFrame 裡不存在（如 future_df），防止程式報錯。
-                """
-                for row in active_schedules.itertuples(index=False):
-                    start_time = row.開始時間.strftime("%H:%M:%S")
-                    end_time = row.結束時間.strftime("%H:%M:%S")
-                    category = row.類別
-                    status = str(row.製程狀態) if hasattr(row, "製程狀態") and pd.notna(row.製程狀態) else "N/A"
-
-                    if row.製程 == "EAFA":
-                        process_display = "EAF"
-                        status += " (A爐)"
-                        furnace = "(A爐)"
-                    elif row.製程 == "EAFB":
-                        process_display = "EAF"
-                        status += " (B爐)"
-                        furnace = "(B爐)"
-                    else:
-                        process_display = row.製程
-                        furnace = ""
-                    if process_display != process_name:
-                        continue
-
-                    item = QtWidgets.QTreeWidgetItem(active_parent)
-                    item.setFont(0, QtGui.QFont("微軟正黑體", 10))
-                    item.setFont(1, QtGui.QFont("微軟正黑體", 10))
-                    item.setText(0, f"{start_time} ~ {end_time}")
-                    item.setText(1, status)
-
-                    # **狀態欄 (column 2) 文字置中**
-                    item.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignCenter)
-
-                    if category == "current":
-                        item.setBackground(0, QtGui.QBrush(QtGui.QColor("#FCF8BC")))  # **淡黃色背景**
-                        item.setBackground(1, QtGui.QBrush(QtGui.QColor("#FCF8BC")))
-                    elif category == "future":
-                        minutes = int((row.開始時間 - pd.Timestamp.now()).total_seconds() / 60)
-                        if process_name == "EAF":
-                            item.setText(1, f"{furnace} 預計{minutes} 分鐘後開始生產")
+        # ** 顯示文字、距開始的分鐘數以欄位向量一次算好，迴圈內不再逐列 strftime / Timestamp.now() **
+        now = pd.Timestamp.now()
+        active_all = pd.concat([
+            current_df.assign(類別="current"),
+            future_df.assign(類別="future")
+        ], ignore_index=True).sort_values(by="開始時間")
+        active_all = active_all.assign(
+            時段=self._schedule_span_text(active_all),
+            分鐘=(pd.to_datetime(active_all["開始時間"]) - now).dt.total_seconds() / 60,
+        )
+        past_all = past_df.sort_values(by="開始時間")
+        past_all = past_all.assign(時段=self._schedule_span_text(past_all))
+        font10 = _ui_font(10)
+        align_center = QtCore.Qt.AlignmentFlag.AlignCenter
+
+        # ** 清空與重建整棵 tw4 期間暫停重繪，全部節點建好、展開後只重繪一次 **
+        # ** 節點先以不掛父節點的方式建立，再以 addChildren / addTopLevelItems 整批插入 **
+        with frozen_widgets(self.tw4):
+            self.tw4.clear()
+
+            process_parents = []
+            for process_name in process_map.keys():
+                process_parent = QtWidgets.QTreeWidgetItem([process_name])
+                process_parents.append(process_parent)
+
+                # **過濾當前製程的排程**
+                active_schedules = active_all[
+                    (active_all["製程"] == process_name) |
+                    ((process_name == "EAF") & active_all["製程"].isin(["EAFA", "EAFB"]))
+                    ]
+
+                past_schedules = past_all[
+                    (past_all["製程"] == process_name) |
+                    ((process_name == "EAF") & past_all["製程"].isin(["EAFA", "EAFB"]))
+                    ]
+
+                # **處理 "生產或等待中"**
+                active_parent = QtWidgets.QTreeWidgetItem(["生產或等待中"])
+                active_parent.setFont(0, font10)
+                active_items = []
+
+                if not active_schedules.empty:
+                    """
+                    從iterrows() 改為itertuples() 的說明:
+                    1. 效能較快、且省記憶體
+                    2. itertuples(index=False)：避免產生多餘的 Index 欄位。
+                    2. row.開始時間、row.類別 等是透過屬性方式存取。
+                    3. hasattr(row, "製程狀態") 是為了避免製程狀態 欄位在某些 DataFrame 裡不存在（如 future_df），防止程式報錯。
+                    """
+                    for row in active_schedules.itertuples(index=False):
+                        category = row.類別
+                        status = str(row.製程狀態) if hasattr(row, "製程狀態") and pd.notna(row.製程狀態) else "N/A"
+
+                        if row.製程 == "EAFA":
+                            process_display = "EAF"
+                            status += " (A爐)"
+                            furnace = "(A爐)"
+                        elif row.製程 == "EAFB":
+                            process_display = "EAF"
+                            status += " (B爐)"
+                            furnace = "(B爐)"
                         else:
-                            item.setText(1, f"預計{minutes} 分鐘後開始生產")
-                        item.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignCenter)  # **未來排程置中**
+                            process_display = row.製程
+                            furnace = ""
+                        if process_display != process_name:
+                            continue
+
+                        item = QtWidgets.QTreeWidgetItem([row.時段, status])
+                        item.setFont(0, font10)
+                        item.setFont(1, font10)
+
+                        # **狀態欄 (column 2) 文字置中**
+                        item.setTextAlignment(1, align_center)
+
+                        if category == "current":
+                            item.setBackground(0, _BRUSH_SCHEDULE_CURRENT)     # **淡黃色背景**
+                            item.setBackground(1, _BRUSH_SCHEDULE_CURRENT)
+                        elif category == "future":
+                            minutes = int(row.分鐘)
+                            if process_name == "EAF":
+                                item.setText(1, f"{furnace} 預計{minutes} 分鐘後開始生產")
+                            else:
+                                item.setText(1, f"預計{minutes} 分鐘後開始生產")
+                            item.setTextAlignment(1, align_center)  # **未來排程置中**
+
+                        active_items.append(item)
+                    active_parent.addChildren(active_items)
 
-                    active_parent.addChild(item)
+                else:
+                    # **若無生產或等待中排程，在 column 2 顯示 "目前無排程"，並置中**
+                    active_parent.setFont(1, font10)
+                    active_parent.setText(1, "目前無排程")
+                    active_parent.setTextAlignment(1, align_center)
+
+                # **處理 "過去排程"**
+                past_parent = QtWidgets.QTreeWidgetItem(["過去排程"])
+                past_parent.setFont(0, font10)
+
+                if not past_schedules.empty:
+                    past_items = []
+                    for span_text in past_schedules["時段"]:
+                        item = QtWidgets.QTreeWidgetItem([span_text, "已完成"])
+                        item.setFont(0, font10)
+                        item.setFont(1, font10)
+                        item.setTextAlignment(1, align_center)  # **過去排程置中**
+
+                        past_items.append(item)
+                    past_parent.addChildren(past_items)
 
-            else:
-                # **若無生產或等待中排程，在 column 2 顯示 "目前無排程"，並置中**
-                active_parent.setFont(1, QtGui.QFont("微軟正黑體", 10))
-                active_parent.setText(1, "目前無排程")
-                active_parent.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignCenter)
-
-            # **處理 "過去排程"**
-            past_parent = QtWidgets.QTreeWidgetItem(process_parent)
-            past_parent.setFont(0, QtGui.QFont("微軟正黑體", 10))
-            past_parent.setText(0, "過去排程")
-            process_parent.addChild(past_parent)
-
-            if not past_schedules.empty:
-                for _, row in past_schedules.iterrows():
-                    start_time = row["開始時間"].strftime("%H:%M:%S")
-                    end_time = row["結束時間"].strftime("%H:%M:%S")
-
-                    item = QtWidgets.QTreeWidgetItem(past_parent)
-                    item.setFont(0, QtGui.QFont("微軟正黑體", 10))
-                    item.setFont(1, QtGui.QFont("微軟正黑體", 10))
-                    item.setText(0, f"{start_time} ~ {end_time}")
-                    item.setText(1, "已完成")
-                    item.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignCenter)  # **過去排程置中**
-
-                    past_parent.addChild(item)
+                else:
+                    # **若無過去排程，在 column 2 顯示 "無相關排程"，並置中**
+                    past_parent.setFont(1, font10)
+                    past_parent.setText(1, "無相關排程")
+                    past_parent.setTextAlignment(1, align_center)
 
-            else:
-                # **若無過去排程，在 column 2 顯示 "無相關排程"，並置中**
-                past_parent.setFont(1, QtGui.QFont("微軟正黑體", 10))
-                past_parent.setText(1, "無相關排程")
-                past_parent.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignCenter)
+                process_parent.addChildren([active_parent, past_parent])
 
-        # **確保所有節點展開**
-        self.tw4.expandAll()  # ✅ 確保所有製程展開
+            self.tw4.addTopLevelItems(process_parents)
+            # **確保所有節點展開**
+            self.tw4.expandAll()  # ✅ 確保所有製程展開
         self.statusBar().showMessage(f"排程已更新({res.fetched_at:%H:%M:%S})")
 
         self.update_tw2_2_column2_from_schedule(past_df, current_df, future_df)
@@ -983,9 +1482,10 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             # （C）完全無排程
             return "目前未有排程"
 
-        # 寫回 tw2_2（HSM 仍由 real_time_hsm_cycle() 處理）
-        for proc in ("EAF", "LF1-1", "LF1-2", "LF1", "LF2"):
-            set_status_row(proc, status_for(proc))
+        # 寫回 tw2_2（HSM 仍由 real_time_hsm_cycle() 處理）；五列的文字/提示/字型寫完才重繪一次
+        with frozen_widgets(self.tw2_2):
+            for proc in ("EAF", "LF1-1", "LF1-2", "LF1", "LF2"):
+                set_status_row(proc, status_for(proc))
 
     def _reapply_tree_header_styles(self):
         if getattr(self, "_styling_in_progress", False):
@@ -998,14 +1498,16 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                     continue
                 try:
                     h = w.header()
+                    # 樣式、字級已是目標值時不重設：否則 setStyleSheet 觸發的 Polish/StyleChange 事件
+                    # 會經由 eventFilter 再排入一次 _reapply_tree_header_styles，表頭不斷重繪
                     if w in (getattr(self, "tw3", None), getattr(self, "tw3_2", None)):
-                        h.setStyleSheet(
+                        _restyle(h,
                             "QHeaderView::section { "
                             "background: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #0e6499, stop:1 #9fdeab); "
                             "color: white; font-weight: bold; }"
                         )
                     else:
-                        h.setStyleSheet(
+                        _restyle(h,
                             "QHeaderView::section { "
                             "background: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #52e5e7, stop:1 #130cb7); "
                             "color: white; font-weight: bold; }"
@@ -1013,8 +1515,9 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
                     # (可選) 若你看到 header 字級被改動，這裡鎖定字級，例如 10pt
                     hf = h.font()
-                    hf.setPointSize(11)  # 你的既有字級是多少就填多少
-                    h.setFont(hf)
+                    if hf.pointSize() != 11:
+                        hf.setPointSize(11)  # 你的既有字級是多少就填多少
+                        h.setFont(hf)
                 except Exception:
                     pass
         finally:
@@ -1049,7 +1552,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         pandas.DataFrame
             時間索引為 DatetimeIndex，欄為「迴路名稱」；適合作為 make_stacked_frames() 的輸入。
         """
-        tag_reference = self.tag_list.set_index('name').copy()
+        tag_reference = self._tag_reference
         generator_tag = tag_reference.loc['2H120':'5KB19', 'tag_name']
         gas_tag = tag_reference.loc['BFG#1':'TG4 sCOG', 'tag_name']
         tags = pd.concat([generator_tag, gas_tag]).tolist()
@@ -1303,7 +1806,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         idx = df.index
 
         # --- 0) 熱值/轉換參數（與 _pie_common_factors 相同來源） ---
-        calorics = get_ng_generation_cost_v2(self.unit_prices)
+        calorics = self.ng_generation_cost()
         # 常數（kJ/Nm³、kW per (kJ/s) → 你的專案封裝為 steam_power）
         ng_heat = float(calorics.get('ng_heat', 0.0))
         cog_heat = float(calorics.get('cog_heat', 0.0))
@@ -1549,14 +2052,13 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                 四台 TG 的實際總發電量（MW）。
         """
 
+        seg, _ = self._segment_summer(value)     # 以位置表 + 前綴和取區段加總，不再逐次做 label 切片
+
         def get_sum(idx_or_slice):
             try:
-                sub = value.loc[idx_or_slice]
-            except Exception:
+                return seg(idx_or_slice.start, idx_or_slice.stop)
+            except KeyError:        # 缺少的索引視為 0
                 return 0.0
-            if isinstance(sub, pd.Series):
-                return float(pd.to_numeric(sub, errors="coerce").fillna(0).sum())
-            return float(sub) if pd.notna(sub) else 0.0
 
         dynamic_mix_heat, ng_k, mg_k, cog_k, calorics = self._pie_common_factors(value)
 
@@ -1623,12 +2125,13 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
           cog_to_power_factor   : COG 流量 -> MW 的係數
           calorics              : 原 get_ng_generation_cost_v2(self.unit_prices) 結果（日後若要取其它欄位會用到）
         """
-        calorics = get_ng_generation_cost_v2(self.unit_prices)
+        calorics = self.ng_generation_cost()
 
         # 動態 MG 熱質（
-        bfg_sum = value.loc['BFG#1':'BFG#2'].sum()
-        ldg_in = value.loc['LDG Input']
-        denom = value.loc['BFG#1': 'LDG Input'].sum()
+        seg, at = self._segment_summer(value)
+        bfg_sum = seg('BFG#1', 'BFG#2')
+        ldg_in = at('LDG Input')
+        denom = seg('BFG#1', 'LDG Input')
         dynamic_mix_heat = (bfg_sum * calorics['bfg_heat'] + ldg_in * calorics['ldg_heat']) / max(denom, 1e-9)
 
         ng_to_power_factor = calorics['ng_heat'] / calorics['steam_power'] / 1000.0
@@ -1663,9 +2166,10 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         dynamic_mix_heat, ng_k, mg_k, cog_k, _ = self._pie_common_factors(value)
 
         # --- 該 TG 的三種氣體流量 ---
-        ng_flow = float(value.loc[slice(f'TG{tg_no} NG', f'TG{tg_no} sNG')].sum())
-        cog_flow = float(value.loc[slice(f'TG{tg_no} COG', f'TG{tg_no} sCOG')].sum())
-        mg_flow = float(value.loc[f'TG{tg_no} Mix'])
+        seg, at = self._segment_summer(value)
+        ng_flow = seg(f'TG{tg_no} NG', f'TG{tg_no} sNG')
+        cog_flow = seg(f'TG{tg_no} COG', f'TG{tg_no} sCOG')
+        mg_flow = at(f'TG{tg_no} Mix')
 
         # --- 流量 -> 估算 MW ---
         ng_mw = ng_flow * ng_k
@@ -1681,7 +2185,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             4: ('1H320', '1H420'),
         }
         a, b = real_map[tg_no]
-        mw_real = float(value.loc[a:b].sum())
+        mw_real = seg(a, b)
         
         eps = 1e-6
         inactive = (
@@ -1723,6 +2227,8 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.dashboard_thread = DashboardThread(self, interval=11.0)
         self.dashboard_thread.setObjectName("DashboardThread")
         # 連線都在 start() 之前做，且一次連齊
+        self.dashboard_thread.sig_dashboard.connect(self.apply_dashboard_values,
+                                                    QtCore.Qt.ConnectionType.QueuedConnection)
         self.dashboard_thread.sig_pie_series.connect(self._on_pie_series,
                                                      QtCore.Qt.ConnectionType.QueuedConnection)
         self.dashboard_thread.sig_stack_df.connect(self.on_stack_df, QtCore.Qt.ConnectionType.UniqueConnection)
@@ -1732,10 +2238,17 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
     def real_time_hsm_cycle(self):
         """
-        近 15 分鐘估算 HSM 生產狀態並顯示四階段文字：
+        近 15 分鐘估算 HSM 生產狀態並顯示四階段文字 (主執行緒用；背景執行緒請分開呼叫
+        hsm_cycle_text() 與 show_hsm_cycle())。
+        """
+        self.show_hsm_cycle(self.hsm_cycle_text())
+
+    def hsm_cycle_text(self) -> str:
+        """
+        近 15 分鐘估算 HSM 生產狀態並回傳四階段文字 (只查 PI 與計算，不碰 Qt 元件)：
         暫停生產 → （偵測到第一個峰）→ 開始生產，計算速度及秏能中… → （兩峰以上且算得出數值）→ x.x 卷/15分鐘 (約 x.xx MW/卷) → （B>420s）→ 暫停生產
         """
-        tag_reference = self.tag_list.set_index('name').copy()
+        tag_reference = self._tag_reference
         hsm_tags = tag_reference.loc['9H140':'9KB33', 'tag_name'].tolist()
 
         et = pd.Timestamp.now().floor('S')
@@ -1765,7 +2278,10 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             text = f"{curr:.1f} 卷/15分鐘 (約 {mw_item:.2f} MW/卷)"
         else:
             text = "暫停生產中"
+        return text
 
+    def show_hsm_cycle(self, text: str):
+        """ 將 HSM 生產狀態文字寫入 tw2_2 (必須在主執行緒執行) """
         # 寫入 tw2_2：row=0 假定為 HSM，col=2 為「產線即時狀況」
         try:
             item = self._item_at(self.tw2_2, (0,))
@@ -1803,6 +2319,43 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         name = item.text()
         self.listWidget_3.addItems([name])
 
+    def _cache_tag_list_slices(self):
+        """
+        tag_list 載入後不再變動，即時值與歷史需量每次更新都會用到的切片、tag 清單與群組編號只在這裡算一次：
+          - _tag_reference: 以 name 為 index 的 tag_list (只供 .loc 讀取)
+          - _rt_*: 有 tag_name 的列 (即時值)，及其 W2~WA 群組編號
+          - _groups_demand / _production_line_tags / _wx_*: 有 tag_name2 的列 (kWh 歷史需量)，及其群組編號
+        """
+        self._tag_reference = self.tag_list.set_index('name')
+
+        rt_rows = self.tag_list.loc[self.tag_list['tag_name'].notna()]
+        self._name_list = rt_rows['tag_name'].tolist()
+        self._rt_index = pd.Index(rt_rows['name'], name='name')
+        self._rt_gid, self._rt_wx_index = self._wx_group_ids(rt_rows)
+
+        mask = ~pd.isnull(self.tag_list.loc[:, 'tag_name2'])  # 作為用來篩選出tag中含有有kwh11 的布林索引器
+        self._groups_demand = self.tag_list.loc[mask, 'tag_name2':'Group2']
+        self._groups_demand.index = self.tag_list.loc[mask, 'name']
+        self._production_line_tags = self._groups_demand.loc[:, 'tag_name2'].tolist()
+        self._wx_gid, self._wx_index = self._wx_group_ids(self._groups_demand)
+
+    @staticmethod
+    def _wx_group_ids(groups_demand: pd.DataFrame):
+        """
+        將 Group1 介於 W2~WA、且 Group2 為 B (廠區用電) 的迴路，依 Group1 編成 0 ~ n-1 的群組編號，
+        供 aggregate_groups() 使用；範圍與 groupby(['Group1', 'Group2']).loc['W2':'WA', 'B'] 相同。
+        :param groups_demand: 含 Group1、Group2 欄位，列順序與資料矩陣一致的 DataFrame
+        :return: (gid, wx_index)。gid 為各列的群組編號 (-1 代表不納入)，wx_index 為各群組的 Group1 名稱
+        """
+        g1 = groups_demand['Group1']
+        selected = (g1.notna() & (groups_demand['Group2'] == 'B')
+                    & (g1.astype(str) >= 'W2') & (g1.astype(str) <= 'WA')).to_numpy()
+        labels = sorted(g1[selected].unique())
+        lookup = {name: i for i, name in enumerate(labels)}
+        gid = np.fromiter((lookup[name] if sel else -1 for name, sel in zip(g1, selected)),
+                          dtype=np.intp, count=len(g1))
+        return gid, pd.Index(labels, name='Group1')
+
     @QtCore.pyqtSlot(object, object)
     def on_data_ready(self, tags: tuple, result: object):
         """
@@ -1824,7 +2377,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                b. 從 HSM 相關欄位計算主線功率（original_date）與濾除訊號（filter_date），
                   以 15T 切窗後逐窗呼叫 analyze_production_avg_cycle(...) 估算生產件數、每件耗電等指標。
                c. 解除 _isFetching 與 UI 鎖定、隱藏 loading，並呼叫
-                  update_history_to_tws(self.history_datas_of_groups.loc[:, self._pending_column]) 更新畫面，
+                  update_history_to_tws(self._history_column(self._pending_column)) 更新畫面，
                   最後將 _pending_column 設回 None。
 
         回傳：
@@ -1848,29 +2401,22 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             # -------- 計算特定週期，各設備群組(分類)的平均值 -----------
             df1 = self._history_results[tuple(self.thread1.key)]
 
-            mask = ~pd.isnull(self.tag_list.loc[:, 'tag_name2'])  # 作為用來篩選出tag中含有有kwh11 的布林索引器
-            groups_demand = self.tag_list.loc[mask, 'tag_name2':'Group2']
-            groups_demand.index = self.tag_list.loc[mask, 'name']
-            df1.columns = groups_demand.index
-            df1 = df1.T  # 將query_result 轉置 shape:(96,178) -> (178,96)
-            df1.reset_index(inplace=True, drop=True)  # 重置及捨棄原本的 index
-            df1.index = groups_demand.index  # 將index 更新為各迴路或gas 的名稱 (套用groups_demands.index 即可)
-            time_list = [t.strftime('%H:%M') for t in pd.date_range('00:00', '23:45', freq='15min')]
-            df1.columns = time_list  # 用週期的起始時間，作為各column 的名稱
-            df1.loc[:, '00:00':'23:45'] = df1.loc[:, '00:00':'23:45'] * 4  # kwh -> MW/15 min
+            groups_demand = self._groups_demand     # __init__ 時已依 tag_name2 篩選好的迴路及群組
+            kwh = df1.to_numpy(dtype=np.float64).T  # 將query_result 轉置 shape:(96,178) -> (178,96)
+            time_list = _TIME_LIST
+            # index 為各迴路或gas 的名稱，column 為週期的起始時間；kwh -> MW/15 min
+            df1 = pd.DataFrame(kwh * 4, index=groups_demand.index, columns=time_list)
             groups_demand = pd.concat([groups_demand, df1], axis=1, copy=False)
 
-            wx_list = list()  # 暫存各wx的計算結果用
-            for _ in time_list:
-                # 利用 group by 的功能，依Group1(單位)、Group2(負載類型)進行分組，將分組結果套入sum()的方法
-                wx_grouped = groups_demand.groupby(['Group1', 'Group2'])[_].sum()
-                c = wx_grouped.loc['W2':'WA', 'B']
-                c.name = _
-                c.index = c.index.get_level_values(0)  # 重新將index 設置為原multiIndex 的第一層index 內容
-                wx_list.append(c)
-            wx = pd.DataFrame([wx_list[_] for _ in range(96)])
-            # 將wx 計算結果轉置，並along index 合併於groups_demand 下方, 並將結果存在class 變數中
-            self.history_datas_of_groups = pd.concat([groups_demand, wx.T], axis=0)
+            # 依Group1(單位)、Group2(負載類型)分組：W2~WA 的 B 類 (廠區用電) 各自加總，
+            # kWh -> MW 換算與 96 個週期的加總在 aggregate_groups() 同一次掃描完成
+            wx = pd.DataFrame(aggregate_groups(kwh, self._wx_gid, len(self._wx_index), 4.0),
+                              index=self._wx_index, columns=time_list)
+            # 將wx 計算結果 along index 合併於groups_demand 下方, 並將結果存在class 變數中
+            self.history_datas_of_groups = pd.concat([groups_demand, wx], axis=0)
+            # 捲軸切換週期時直接取數值矩陣的欄 (view)，不必每次對混合型別的 DataFrame 做 .loc 欄位查詢
+            self._hist_arr = np.vstack((df1.to_numpy(), wx.to_numpy()))
+            self._hist_index = self.history_datas_of_groups.index
 
             # -------- 分析特定週期的 HSM生產時生 -----------
             df2 = self._history_results[tuple(self.thread2.key)]
@@ -1900,7 +2446,8 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             self.loader.hide()
 
             # 整合完 self.history_datas_of_group 之後，呼叫更新畫面
-            self.update_history_to_tws(self.history_datas_of_groups.loc[:, self._pending_column])
+            with self._frozen_dashboard():
+                self.update_history_to_tws(self._history_column(self._pending_column))
             # 清除 pending，避免重複
             self._pending_column = None
 
@@ -1920,13 +2467,10 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         # ---------- 準備兩組 tags 清單 ------------
         # ---用來查各種歷史需量值的tags
-        mask = ~pd.isnull(self.tag_list.loc[:, 'tag_name2'])  # 作為用來篩選出tag中含有有kwh11 的布林索引器
-        groups_demand = self.tag_list.loc[mask, 'tag_name2':'Group2']
-        groups_demand.index = self.tag_list.loc[mask, 'name']
-        production_line_tags = groups_demand.loc[:, 'tag_name2'].dropna().tolist()  # 把DataFrame 中標籤名為tag_name2 的值，轉成list輸出
+        production_line_tags = self._production_line_tags     # tag_name2 (kwh11) 清單，__init__ 時已建立
 
         # 用來查詢 HSM 歷史 p值的 tags
-        tag_reference = self.tag_list.set_index('name').copy()
+        tag_reference = self._tag_reference
         hsm_tags = tag_reference.loc['9H140':'9KB33', 'tag_name'].tolist()
 
         # 每次查詢前，讓 Overlay 顯示
@@ -1963,7 +2507,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         """ 試調分析 HSM 用電資訊 """
         # -- 設定區 --
         interval = self.spinBox_6.value()
-        tag_reference = self.tag_list.set_index('name').copy()
+        tag_reference = self._tag_reference
         start = pd.Timestamp(self.dateTimeEdit_5.dateTime().toString())
         end = pd.Timestamp(self.dateTimeEdit_5.dateTime().toString()) + pd.offsets.Minute(self.spinBox_5.value())
 
@@ -1994,7 +2538,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         interval = self.spinBox_6.value()
         tags = []
         tags2 = []
-        tag_reference = self.tag_list.set_index('name').copy()
+        tag_reference = self._tag_reference
 
         # 1. 先決定 tag 與區間，可由 UI 元件收集
         for i in range(self.listWidget_3.count()):
@@ -2079,7 +2623,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         """
         初始化 tw1、tw2、tw3 以及 tw1_2、tw2_2、tw3_2 的樹狀表格內容格式。
 
-        - 遍歷每個 topLevelItem，呼叫 init_tree_item() 完成對齊與配色。
+        - 以 (tree, 頂層顏色) 規格表逐一呼叫 init_tree_items() 完成對齊與配色。
         - tw1/tw1_2 的頂層即時量使用獨立顏色，tw2/tw2_2、tw3/tw3_2 則沿用一般規則。
         - 新增對 *_2 TreeWidget 的支援，僅套用共有欄位（0、1）的樣式。
 
@@ -2088,76 +2632,66 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         """
 
         # 定義顏色
-        brush_sub = QtGui.QBrush(QtGui.QColor(180, 180, 180))  # 用於第 2 層及以上的即時量數值
-        brush_sub.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
+        brush_sub = _BRUSH_TREE_SUB  # 用於第 2 層及以上的即時量數值
 
         brush_top = QtGui.QBrush(QtGui.QColor(self.real_time_text))  # 用於 tw1 的頂層數值
         brush_top.setStyle(QtCore.Qt.BrushStyle.SolidPattern)
 
-        # 遍歷 tw1, tw2, tw3，並統一初始化子項目
-        for tree in [self.tw1, self.tw2, self.tw3]:
-            for i in range(tree.topLevelItemCount()):
-                # tw1 需要額外設定頂層的文字顏色，tw2 和 tw3 則不需要
-                self.init_tree_item(tree.topLevelItem(i), level=0,
-                               level0_color=(brush_top if tree == self.tw1 else None),
-                               level_sub_color=brush_sub)
-
-        # (2025/09/07): 初始化tw1_2, tw2_2, tw3_2, 但僅影響共有欄位(0、1)
-        for tree in [getattr(self, "tw1_2", None), getattr(self, "tw2_2", None), getattr(self, "tw3_2", None)]:
-            if tree is None:
-                continue
-            for i in range(tree.topLevelItemCount()):
-                # tw1_2 延續 tw1 的頂層顏色，其餘同tw2/3
-                self.init_tree_item(
-                    tree.topLevelItem(i),
-                    level=0,
-                    level0_color=(brush_top if tree is getattr(self, "tw1_2", None) else None),
-                    level_sub_color=brush_sub
-                )
+        # 每棵樹只需決定「頂層即時量顏色」；tw1_2 延續 tw1 的頂層顏色，其餘同 tw2/3
+        # (2025/09/07): tw1_2, tw2_2, tw3_2 僅影響共有欄位(0、1)
+        tree_specs = [(self.tw1, brush_top), (self.tw2, None), (self.tw3, None),
+                      (getattr(self, "tw1_2", None), brush_top),
+                      (getattr(self, "tw2_2", None), None),
+                      (getattr(self, "tw3_2", None), None)]
+        tree_specs = [(tree, color) for tree, color in tree_specs if tree is not None]
+
+        # 整批設定期間暫停重繪，結束後只重繪一次
+        with frozen_widgets(*(tree for tree, _ in tree_specs)):
+            for tree, level0_color in tree_specs:
+                self.init_tree_items(tree, level0_color=level0_color, level_sub_color=brush_sub)
 
-    def init_tree_item(self, item, level, level0_color=None, level_sub_color=None, ):
+    @staticmethod
+    def init_tree_items(tree, level0_color=None, level_sub_color=None):
         """
-        建立並初始化一個 QTreeWidgetItem，並依照指定的 widget 與 column 規則套用字型與對齊方式。
+        依照指定的 widget 與 column 規則，一次走訪整棵樹並套用對齊方式與即時量顏色。
 
         規則：
-        - 所有欄位都會套用預設字型大小。
         - tw1 ~ tw3：
             - column 1、2 → 文字靠右、垂直置中。
         - tw*_2：
             - column 1 → 文字靠右、垂直置中。
             - column 2 → 文字置中。
-        - 其它 widget → 全部置中。
+        - column 0：第 1 層靠左，其餘置中。
+        - 即時量 (column 1) 顏色：頂層用 level0_color，第 2 層以後用 level_sub_color。
+
+        對齊旗標與欄數只依樹決定，先算好一次；走訪時以堆疊取代遞迴，每個節點只取一次。
         """
-        tw = item.treeWidget()
-        name = tw.objectName() or ""  # 以 objectName 辨識 tw1_2 / tw2_2 / tw3_2
+        name = tree.objectName() or ""  # 以 objectName 辨識 tw1_2 / tw2_2 / tw3_2
         is_secondary = name in ("tw1_2", "tw2_2", "tw3_2")
-
-        # 設定欄位對齊方式
-        align0 = QtCore.Qt.AlignmentFlag.AlignCenter if level != 1 else QtCore.Qt.AlignmentFlag.AlignLeft
-        align1 = QtCore.Qt.AlignmentFlag.AlignRight
-        align_2 = (
-            QtCore.Qt.AlignmentFlag.AlignCenter if is_secondary
-            else QtCore.Qt.AlignmentFlag.AlignRight
-        )
-
-        max_cols = tw.columnCount()
-        if max_cols > 0:
-            item.setTextAlignment(0, align0)
-        if max_cols > 1:
-            item.setTextAlignment(1, align1)
-        if max_cols > 2:
-            item.setTextAlignment(2, align_2)
-
-        # 設定顏色
-        if level == 0 and level0_color is not None and item.treeWidget().columnCount() > 1:
-            item.setForeground(1, level0_color) # 頂層即時量顏色
-
-        elif level >= 2 and level_sub_color is not None and item.treeWidget().columnCount() > 1:
-            item.setForeground(1, level_sub_color)  # 內層即時量顏色
-
-        # 遞迴處理子節點
-        for i in range(item.childCount()):
-            self.init_tree_item(item.child(i), level + 1, level0_color, level_sub_color)
+        max_cols = min(tree.columnCount(), 3)
+
+        align_center = QtCore.Qt.AlignmentFlag.AlignCenter
+        align_right = QtCore.Qt.AlignmentFlag.AlignRight
+        align_2 = align_center if is_secondary else align_right
+        # 各層的欄位對齊：level 1 的 column 0 靠左，其餘層置中
+        aligns_level1 = (QtCore.Qt.AlignmentFlag.AlignLeft, align_right, align_2)[:max_cols]
+        aligns_other = (align_center, align_right, align_2)[:max_cols]
+        has_value_col = max_cols > 1
+
+        stack = [(tree.topLevelItem(i), 0) for i in range(tree.topLevelItemCount())]
+        while stack:
+            item, level = stack.pop()
+            for col, align in enumerate(aligns_level1 if level == 1 else aligns_other):
+                item.setTextAlignment(col, align)
+
+            # 設定顏色
+            if has_value_col:
+                if level == 0 and level0_color is not None:
+                    item.setForeground(1, level0_color)     # 頂層即時量顏色
+                elif level >= 2 and level_sub_color is not None:
+                    item.setForeground(1, level_sub_color)  # 內層即時量顏色
+
+            stack.extend((item.child(i), level + 1) for i in range(item.childCount()))
 
     def beautify_tree_widgets(self):
         """
@@ -2175,7 +2709,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         - 表頭字級統一（例如 11pt；若你想回到舊字級，改 header_point_sz 即可）。
 
         注意：
-        本函式不處理「即時量(col=1) / 平均值(col=2)」的 item 顏色；請沿用你在 init_tree_item() /
+        本函式不處理「即時量(col=1) / 平均值(col=2)」的 item 顏色；請沿用你在 init_tree_items() /
         產樹流程中對每個 QTreeWidgetItem 的 setForeground/setBackground，避免重複設定。
         """
 
@@ -2193,173 +2727,165 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         header_point_sz = 11  # 與你目前檔案相符的字級；需要微調可改這個數字
 
-        # ---- 依名稱套主題並統一字級 ----
-        for name in ("tw1", "tw2", "tw1_2", "tw2_2"):
-            w = getattr(self, name, None)
-            if not w:
-                continue
-            h = w.header()
-            h.setStyleSheet(style_blue)
-            hf = h.font()
-            hf.setPointSize(header_point_sz)
-            h.setFont(hf)
-
-        for name in ("tw3", "tw3_2"):
-            w = getattr(self, name, None)
-            if not w:
-                continue
-            h = w.header()
-            h.setStyleSheet(style_green)
-            hf = h.font()
+        # 表頭樣式、欄寬、逐項配色期間暫停重繪與訊號，結束後只重繪一次
+        trees = [w for w in (getattr(self, name, None) for name in
+                             ("tw1", "tw2", "tw3", "tw4", "tw1_2", "tw2_2", "tw3_2")) if w is not None]
+        with frozen_widgets(*trees):
+            # ---- 依名稱套主題並統一字級 ----
+            for name in ("tw1", "tw2", "tw1_2", "tw2_2"):
+                w = getattr(self, name, None)
+                if not w:
+                    continue
+                h = w.header()
+                h.setStyleSheet(style_blue)
+                hf = h.font()
+                hf.setPointSize(header_point_sz)
+                h.setFont(hf)
+
+            for name in ("tw3", "tw3_2"):
+                w = getattr(self, name, None)
+                if not w:
+                    continue
+                h = w.header()
+                h.setStyleSheet(style_green)
+                hf = h.font()
+                hf.setPointSize(header_point_sz)
+                h.setFont(hf)
+
+            # ---- 欄寬 ----
+            column_widths = {"tw1": [175, 90, 65], "tw2": [175, 90, 65], "tw3": [175, 90, 65]}
+
+            for name in ("tw1", "tw2", "tw3"):
+                w = getattr(self, name, None)
+                if not w:
+                    continue
+                w.setColumnWidth(0, column_widths[name][0])
+                w.setColumnWidth(1, column_widths[name][1])
+                w.setColumnWidth(2, column_widths[name][2])
+
+            # 確保 tw4 有 objectName（非必要，但有助於未來 CSS 定位）
+            if not self.tw4.objectName():
+                self.tw4.setObjectName("tw4")
+
+            # 將 tw4 表頭改成橘粉漸層（與先前一致）
+            self.tw4.header().setStyleSheet(
+                "QHeaderView::section { "
+                "background: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #fad7a1, stop:1 #e96d71); "
+                "color: white; font-weight: bold; }"
+            )
+            hf = self.tw4.header().font()
             hf.setPointSize(header_point_sz)
-            h.setFont(hf)
-
-        # ---- 欄寬 ----
-        column_widths = {"tw1": [175, 90, 65], "tw2": [175, 90, 65], "tw3": [175, 90, 65]}
-
-        for name in ("tw1", "tw2", "tw3"):
-            w = getattr(self, name, None)
-            if not w:
-                continue
-            w.setColumnWidth(0, column_widths[name][0])
-            w.setColumnWidth(1, column_widths[name][1])
-            w.setColumnWidth(2, column_widths[name][2])
-
-        # 確保 tw4 有 objectName（非必要，但有助於未來 CSS 定位）
-        if not self.tw4.objectName():
-            self.tw4.setObjectName("tw4")
-
-        # 將 tw4 表頭改成橘粉漸層（與先前一致）
-        self.tw4.header().setStyleSheet(
-            "QHeaderView::section { "
-            "background: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #fad7a1, stop:1 #e96d71); "
-            "color: white; font-weight: bold; }"
-        )
-        hf = self.tw4.header().font()
-        hf.setPointSize(header_point_sz)
-        self.tw4.header().setFont(hf)
-
-        # tw4 欄寬與固定
-        if getattr(self, "tw4", None):
-            self.tw4.setColumnWidth(0, 190)
-            self.tw4.setColumnWidth(1, 210)  # 你原本也有 200 或 210，統一成 210 可視需求調
-            self.tw4.header().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Fixed)
-            self.tw4.header().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.Fixed)
-
-        # tw1_2 / tw3_2：對應 tw1 / tw3 的前兩欄欄寬（僅共通欄）
-        if getattr(self, "tw1_2", None):
-            self.tw1_2.setColumnWidth(0, column_widths["tw1"][0])
-            self.tw1_2.setColumnWidth(1, column_widths["tw1"][1])
-
-        if getattr(self, "tw3_2", None):
-            self.tw3_2.setColumnWidth(0, column_widths["tw3"][0])
-            self.tw3_2.setColumnWidth(1, column_widths["tw3"][1])
-
-        # tw2_2：你先前指定的 0/1/2 欄寬（第 1 欄沿用 tw2 的寬度）
-        if getattr(self, "tw2_2", None):
-            self.tw2_2.setColumnWidth(0, 130)
-            self.tw2_2.setColumnWidth(1, column_widths["tw2"][1])
-            if self.tw2_2.columnCount() > 2:
-                self.tw2_2.setColumnWidth(2, 270)
-
-        # **確保 tw4.clear() 不影響 header**
-        self.tw4.setHeaderLabels(["製程種類 & 排程時間", "狀態"])
-
-        # tw1/tw2/tw3：col=1(即時量) + col=2(平均值)
-        for widget in [self.tw1, self.tw2, self.tw3]:
-            if widget is None:
-                continue
-            it = QtWidgets.QTreeWidgetItemIterator(widget)
-            while it.value():
-                item = it.value()
-                # col=1 即時量
-                if widget.columnCount() > 1:
-                    item.setFont(1, QtGui.QFont("微軟正黑體", 12))
-                    item.setBackground(1, QtGui.QBrush(QtGui.QColor(self.real_time_back)))
-                    item.setForeground(1, QtGui.QBrush(QtGui.QColor(self.real_time_text)))
-                    item.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignRight)
-                # col=2 平均值
-                if widget.columnCount() > 2:
-                    item.setFont(2, QtGui.QFont("微軟正黑體", 12, QtGui.QFont.Weight.Bold))
-                    item.setBackground(2, QtGui.QBrush(QtGui.QColor("#D6EAF8")))
-                    item.setForeground(2, QtGui.QBrush(QtGui.QColor("#154360")))
-                    item.setTextAlignment(2, QtCore.Qt.AlignmentFlag.AlignRight)
-                it += 1
-
-        # tw*_2：僅 col=1（即時量）配色；col=2 留給你的排程/字級 9 pt 流程處理
-        for widget in [getattr(self, "tw1_2", None), getattr(self, "tw2_2", None), getattr(self, "tw3_2", None)]:
-            if widget is None or widget.columnCount() <= 1:
-                continue
-            it = QtWidgets.QTreeWidgetItemIterator(widget)
-            while it.value():
-                item = it.value()
-                item.setFont(1, QtGui.QFont("微軟正黑體", 12))
-                item.setBackground(1, QtGui.QBrush(QtGui.QColor(self.real_time_back)))
-                item.setForeground(1, QtGui.QBrush(QtGui.QColor(self.real_time_text)))
-                item.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignRight)
-                it += 1
-
-        # **針對 tw1 & tw3 (TGs, TG1~TG4) 的即時量，讓它能隨展開事件改變顏色**
-        self.tw1.itemExpanded.connect(self.tw1_expanded_event)
-        self.tw1.itemCollapsed.connect(self.tw1_expanded_event)
-        self.tw3.itemExpanded.connect(self.tw3_expanded_event)
-        self.tw3.itemCollapsed.connect(self.tw3_expanded_event)
+            self.tw4.header().setFont(hf)
+
+            # tw4 欄寬與固定
+            if getattr(self, "tw4", None):
+                self.tw4.setColumnWidth(0, 190)
+                self.tw4.setColumnWidth(1, 210)  # 你原本也有 200 或 210，統一成 210 可視需求調
+                self.tw4.header().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Fixed)
+                self.tw4.header().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.Fixed)
+
+            # tw1_2 / tw3_2：對應 tw1 / tw3 的前兩欄欄寬（僅共通欄）
+            if getattr(self, "tw1_2", None):
+                self.tw1_2.setColumnWidth(0, column_widths["tw1"][0])
+                self.tw1_2.setColumnWidth(1, column_widths["tw1"][1])
+
+            if getattr(self, "tw3_2", None):
+                self.tw3_2.setColumnWidth(0, column_widths["tw3"][0])
+                self.tw3_2.setColumnWidth(1, column_widths["tw3"][1])
+
+            # tw2_2：你先前指定的 0/1/2 欄寬（第 1 欄沿用 tw2 的寬度）
+            if getattr(self, "tw2_2", None):
+                self.tw2_2.setColumnWidth(0, 130)
+                self.tw2_2.setColumnWidth(1, column_widths["tw2"][1])
+                if self.tw2_2.columnCount() > 2:
+                    self.tw2_2.setColumnWidth(2, 270)
+
+            # **確保 tw4.clear() 不影響 header**
+            self.tw4.setHeaderLabels(["製程種類 & 排程時間", "狀態"])
+
+            # ** 字型、筆刷在迴圈外建立一次，各節點共用 (Qt 會複製一份值，不會互相影響) **
+            # ** 各欄對齊統一由 tws_init() -> init_tree_items() 在同一次走訪中設定，這裡不再重複 **
+            font_rt = _ui_font(12)
+            font_avg = _ui_font(12, bold=True)
+            brush_rt_back = QtGui.QBrush(QtGui.QColor(self.real_time_back))
+            brush_rt_text = QtGui.QBrush(QtGui.QColor(self.real_time_text))
+            brush_avg_back = _BRUSH_AVG_BACK
+            brush_avg_text = _BRUSH_AVG_TEXT
+
+            # tw1/tw2/tw3：col=1(即時量) + col=2(平均值)
+            for widget in [self.tw1, self.tw2, self.tw3]:
+                if widget is None:
+                    continue
+                n_cols = widget.columnCount()
+                it = QtWidgets.QTreeWidgetItemIterator(widget)
+                while it.value():
+                    item = it.value()
+                    # col=1 即時量
+                    if n_cols > 1:
+                        item.setFont(1, font_rt)
+                        item.setBackground(1, brush_rt_back)
+                        item.setForeground(1, brush_rt_text)
+                    # col=2 平均值
+                    if n_cols > 2:
+                        item.setFont(2, font_avg)
+                        item.setBackground(2, brush_avg_back)
+                        item.setForeground(2, brush_avg_text)
+                    it += 1
+            self._tg_state.clear()  # tw3 前景色已重設，讓 update_tw3_tips_and_colors 重新套用 NG 顏色
+
+            # tw*_2：僅 col=1（即時量）配色；col=2 留給你的排程/字級 9 pt 流程處理
+            for widget in [getattr(self, "tw1_2", None), getattr(self, "tw2_2", None), getattr(self, "tw3_2", None)]:
+                if widget is None or widget.columnCount() <= 1:
+                    continue
+                it = QtWidgets.QTreeWidgetItemIterator(widget)
+                while it.value():
+                    item = it.value()
+                    item.setFont(1, font_rt)
+                    item.setBackground(1, brush_rt_back)
+                    item.setForeground(1, brush_rt_text)
+                    it += 1
 
     def beautify_table_widgets(self):
         """ 使用 setStyleSheet() 統一美化 tableWidget_3 的表頭 """
 
-        # **透過 setStyleSheet() 設定表頭統一風格**
-        self.tableWidget_3.setStyleSheet(
-            "QHeaderView::section { background: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #FF5D5D, stop:1 #FFB648); color: white; font-weight: bold;}")
-
-
-        # **設定 Column 寬度**
-        column_widths = [90, 100, 65]  # 各欄位的固定寬度
-        for i, width in enumerate(column_widths):
-            self.tableWidget_3.setColumnWidth(i, width)
-
-        # 設定總類加總 (全廠用電量) 的配色
-        item = self.tableWidget_3.item(0, 0)
-        gradient = QLinearGradient(0,0,1,1)      # 設定比例
-        gradient.setCoordinateMode(QLinearGradient.CoordinateMode.ObjectBoundingMode)     # 讓漸層根據 item 大小調整
-        gradient.setColorAt(0, QtGui.QColor("#52e5e7"))
-        gradient.setColorAt(1, QtGui.QColor("#130cb7"))
-        brush = QtGui.QBrush(gradient)
-        item.setBackground(brush)       # 設定漸層背景 (與tw1,2 header 相同的漸層配色)
-        item.setForeground((QtGui.QBrush(QtGui.QColor('white'))))   # 設定文字顏色為白色
-
-        # 設定總類加總 (中龍發電量) 的配色
-        item = self.tableWidget_3.item(1, 0)
-        gradient.setColorAt(0, QtGui.QColor("#0e6499"))
-        gradient.setColorAt(1, QtGui.QColor("#9fdeab"))
-        brush = QtGui.QBrush(gradient)
-        item.setBackground(brush)       # 設定漸層背景 (與tw3 header 相同的漸層配色)
-        item.setForeground((QtGui.QBrush(QtGui.QColor('white'))))   # 設定文字顏色為白色
-
-        self.tableWidget_3.setItem(2, 0, make_item('太陽能', bold=False, bg_color='#f6ffc6',font_size=12))
-        self.tableWidget_3.setItem(3, 0, make_item('台電供電量\n(需量)', bold=False, font_size=8))
-
-        # **設定欄位樣式，使其與 tw1, tw2, tw3 保持一致**
-        for row in range(self.tableWidget_3.rowCount()):
-            # 即時量 (column 2)
-            item = self.tableWidget_3.item(row, 1)
-            if item is None:
-                item = QtWidgets.QTableWidgetItem()
-                self.tableWidget_3.setItem(row, 1, item)
-            item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignRight)
-            item.setText(item.text())
-            item.setBackground(QtGui.QBrush(QtGui.QColor(self.real_time_back)))
-            item.setForeground(QtGui.QBrush(QtGui.QColor(self.real_time_text)))
-
-            # 平均值 (column 3)
-            item = self.tableWidget_3.item(row, 2)
-            if item is None:
-                item = QtWidgets.QTableWidgetItem()
-                self.tableWidget_3.setItem(row, 2, item)
-            item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignRight)
-            item.setText(item.text())
-            item.setBackground(QtGui.QBrush(QtGui.QColor(self.average_back)))
-            item.setForeground(QtGui.QBrush(QtGui.QColor(self.average_text)))
+        with frozen_widgets(self.tableWidget_3):
+            # **透過 setStyleSheet() 設定表頭統一風格**
+            self.tableWidget_3.setStyleSheet(
+                "QHeaderView::section { background: qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:1, stop:0 #FF5D5D, stop:1 #FFB648); color: white; font-weight: bold;}")
+
+
+            # **設定 Column 寬度**
+            column_widths = [90, 100, 65]  # 各欄位的固定寬度
+            for i, width in enumerate(column_widths):
+                self.tableWidget_3.setColumnWidth(i, width)
+
+            # 設定總類加總 (全廠用電量) 的配色
+            item = self.tableWidget_3.item(0, 0)
+            gradient = QLinearGradient(0,0,1,1)      # 設定比例
+            gradient.setCoordinateMode(QLinearGradient.CoordinateMode.ObjectBoundingMode)     # 讓漸層根據 item 大小調整
+            gradient.setColorAt(0, QtGui.QColor("#52e5e7"))
+            gradient.setColorAt(1, QtGui.QColor("#130cb7"))
+            brush = QtGui.QBrush(gradient)
+            item.setBackground(brush)       # 設定漸層背景 (與tw1,2 header 相同的漸層配色)
+            item.setForeground(_BRUSH_WHITE)   # 設定文字顏色為白色
+
+            # 設定總類加總 (中龍發電量) 的配色
+            item = self.tableWidget_3.item(1, 0)
+            gradient.setColorAt(0, QtGui.QColor("#0e6499"))
+            gradient.setColorAt(1, QtGui.QColor("#9fdeab"))
+            brush = QtGui.QBrush(gradient)
+            item.setBackground(brush)       # 設定漸層背景 (與tw3 header 相同的漸層配色)
+            item.setForeground(_BRUSH_WHITE)   # 設定文字顏色為白色
+
+            self.tableWidget_3.setItem(2, 0, make_item('太陽能', bold=False, bg_color='#f6ffc6',font_size=12))
+            self.tableWidget_3.setItem(3, 0, make_item('台電供電量\n(需量)', bold=False, font_size=8))
+
+            # **設定欄位樣式，使其與 tw1, tw2, tw3 保持一致**
+            # 即時量 (column 2)、平均值 (column 3) 的顏色/字型/對齊交給 delegate 依欄位繪製，不逐格設定
+            self.tableWidget_3.setItemDelegate(TableValueDelegate({
+                1: (self.real_time_back, self.real_time_text, False),
+                2: (self.average_back, self.average_text, True),
+            }, self.tableWidget_3))
 
     def check_box2_event(self):
         """
@@ -2420,149 +2946,105 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                 ### 切換負載的顯示方式 ###
         :return:
         """
-        if self.checkBox.isChecked():
-            self.tw1.topLevelItem(0).child(0).child(0).setText(0, '2H180')
-            self.tw1.topLevelItem(0).child(0).child(1).setText(0, '2H280')
-            self.tw1.topLevelItem(0).child(0).child(2).setText(0, '1H350')
-            self.tw1.topLevelItem(0).child(1).setText(0, '4KA19')
-            self.tw1.topLevelItem(0).child(2).child(0).setText(0, '4KB19')
-            self.tw1.topLevelItem(0).child(2).child(1).setText(0, '4KB29')
-            self.tw1.topLevelItem(0).child(3).child(0).setText(0, '2KA41')
-            self.tw1.topLevelItem(0).child(3).child(1).setText(0, '2KB41')
-            self.tw1.topLevelItem(1).child(0).setText(0, 'AJ320')
-            self.tw1.topLevelItem(1).child(1).child(0).setText(0, '5KA18')
-            self.tw1.topLevelItem(1).child(1).child(1).setText(0, '5KA28')
-            self.tw1.topLevelItem(1).child(1).child(2).setText(0, '5KB18')
-            self.tw1.topLevelItem(1).child(1).child(3).setText(0, '5KB28')
-            self.tw1.topLevelItem(3).child(0).child(0).setText(0, '3KA14')
-            self.tw1.topLevelItem(3).child(0).child(1).setText(0, '3KA15')
-            self.tw1.topLevelItem(3).child(1).child(0).setText(0, '3KA24')
-            self.tw1.topLevelItem(3).child(1).child(1).setText(0, '3KA25')
-            self.tw1.topLevelItem(3).child(2).child(0).setText(0, '3KB12')
-            self.tw1.topLevelItem(3).child(2).child(1).setText(0, '3KB22')
-            self.tw1.topLevelItem(3).child(2).child(2).setText(0, '3KB28')
-            self.tw1.topLevelItem(3).child(3).child(0).setText(0, '3KA16')
-            self.tw1.topLevelItem(3).child(3).child(1).setText(0, '3KA26')
-            self.tw1.topLevelItem(3).child(3).child(2).setText(0, '3KA17')
-            self.tw1.topLevelItem(3).child(3).child(3).setText(0, '3KA27')
-            self.tw1.topLevelItem(3).child(3).child(4).setText(0, '3KB16')
-            self.tw1.topLevelItem(3).child(3).child(5).setText(0, '3KB26')
-            self.tw1.topLevelItem(3).child(3).child(6).setText(0, '3KB17')
-            self.tw1.topLevelItem(3).child(3).child(7).setText(0, '3KB27')
-            self.tw1.topLevelItem(3).child(4).child(0).setText(0, '2KA19')
-            self.tw1.topLevelItem(3).child(4).child(1).setText(0, '2KA29')
-            self.tw1.topLevelItem(3).child(4).child(2).setText(0, '2KB19')
-            self.tw1.topLevelItem(3).child(4).child(3).setText(0, '2KB29')
-            self.tw2.topLevelItem(1).setText(0,'AH120')
-            self.tw2.topLevelItem(2).setText(0,'AH190')
-            self.tw2.topLevelItem(3).setText(0,'AH130')
-            self.tw2.topLevelItem(4).setText(0,'1H450')
-            self.tw2.topLevelItem(5).setText(0,'1H360')
-            self.tw3.topLevelItem(0).child(0).setText(0, '2H120 & 2H220')
-            self.tw3.topLevelItem(0).child(1).setText(0, '5H120 & 5H220')
-            self.tw3.topLevelItem(0).child(2).setText(0, '1H120 & 1H220')
-            self.tw3.topLevelItem(0).child(3).setText(0, '1H320 & 1H420')
-            self.tw3.topLevelItem(1).child(0).setText(0, '4KA18')
-            self.tw3.topLevelItem(1).child(1).setText(0, '5KB19')
-            self.tw3.topLevelItem(2).child(0).setText(0, '4H120')
-            self.tw3.topLevelItem(2).child(1).setText(0, '4H220')
-        else:
-            self.tw1.topLevelItem(0).child(0).child(0).setText(0, '#1 鼓風機')
-            self.tw1.topLevelItem(0).child(0).child(1).setText(0, '#2 鼓風機')
-            self.tw1.topLevelItem(0).child(0).child(2).setText(0, '#3 鼓風機')
-            self.tw1.topLevelItem(0).child(1).setText(0, '#1 燒結風車')
-            self.tw1.topLevelItem(0).child(2).child(0).setText(0, '#2-1')
-            self.tw1.topLevelItem(0).child(2).child(1).setText(0, '#2-2')
-            self.tw1.topLevelItem(0).child(3).child(0).setText(0, '#1')
-            self.tw1.topLevelItem(0).child(3).child(1).setText(0, '#2')
-            self.tw1.topLevelItem(1).child(0).setText(0, 'EAF 集塵')
-            self.tw1.topLevelItem(1).child(1).child(0).setText(0, '#1')
-            self.tw1.topLevelItem(1).child(1).child(1).setText(0, '#2')
-            self.tw1.topLevelItem(1).child(1).child(2).setText(0, '#3')
-            self.tw1.topLevelItem(1).child(1).child(3).setText(0, '#4')
-            self.tw1.topLevelItem(3).child(0).child(0).setText(0, '1-1')
-            self.tw1.topLevelItem(3).child(0).child(1).setText(0, '1-2')
-            self.tw1.topLevelItem(3).child(1).child(0).setText(0, '2-1')
-            self.tw1.topLevelItem(3).child(1).child(1).setText(0, '2-2')
-            self.tw1.topLevelItem(3).child(2).child(0).setText(0, '3-1')
-            self.tw1.topLevelItem(3).child(2).child(1).setText(0, '3-2')
-            self.tw1.topLevelItem(3).child(2).child(2).setText(0, '3-3')
-            self.tw1.topLevelItem(3).child(3).child(0).setText(0, '#1')
-            self.tw1.topLevelItem(3).child(3).child(1).setText(0, '#2')
-            self.tw1.topLevelItem(3).child(3).child(2).setText(0, '#3')
-            self.tw1.topLevelItem(3).child(3).child(3).setText(0, '#4')
-            self.tw1.topLevelItem(3).child(3).child(4).setText(0, '#5')
-            self.tw1.topLevelItem(3).child(3).child(5).setText(0, '#6')
-            self.tw1.topLevelItem(3).child(3).child(6).setText(0, '#7')
-            self.tw1.topLevelItem(3).child(3).child(7).setText(0, '#8')
-            self.tw1.topLevelItem(3).child(4).child(0).setText(0, 'IDF1 & BFP1,2')
-            self.tw1.topLevelItem(3).child(4).child(1).setText(0, 'IDF2 & BFP3,4')
-            self.tw1.topLevelItem(3).child(4).child(2).setText(0, 'IDF3 & BFP5,6')
-            self.tw1.topLevelItem(3).child(4).child(3).setText(0, 'IDF4 & BFP7,8')
-            self.tw2.topLevelItem(1).setText(0,'電爐')
-            self.tw2.topLevelItem(2).setText(0,'#1 精煉爐')
-            self.tw2.topLevelItem(3).setText(0,'#2 精煉爐')
-            self.tw2.topLevelItem(4).setText(0,'#1 轉爐精煉爐')
-            self.tw2.topLevelItem(5).setText(0,'#2 轉爐精煉爐')
-            self.tw3.topLevelItem(0).child(0).setText(0, 'TG1')
-            self.tw3.topLevelItem(0).child(1).setText(0, 'TG2')
-            self.tw3.topLevelItem(0).child(2).setText(0, 'TG3')
-            self.tw3.topLevelItem(0).child(3).setText(0, 'TG4')
-            self.tw3.topLevelItem(1).child(0).setText(0, 'TRT#1')
-            self.tw3.topLevelItem(1).child(1).setText(0, 'TRT#2')
-            self.tw3.topLevelItem(2).child(0).setText(0, 'CDQ#1')
-            self.tw3.topLevelItem(2).child(1).setText(0, 'CDQ#2')
+        # 節點參照只在第一次切換時解析，之後直接走訪 (item, 迴路編號, 設備名稱) 清單
+        if self._label_items is None:
+            self._label_items = [(self._cached_item(getattr(self, tree_name), path), tag_text, name_text)
+                                 for tree_name, path, tag_text, name_text in _TREE_NODE_LABELS]
+
+        # 勾選時顯示迴路編號，否則顯示設備名稱；整批改字期間暫停重繪
+        show_tag = self.checkBox.isChecked()
+        with frozen_widgets(self.tw1, self.tw2, self.tw3):
+            for item, tag_text, name_text in self._label_items:
+                item.setText(0, tag_text if show_tag else name_text)
 
     def dashboard_value(self):
         """
-        ### 處理 Dashboard 各表格的即時量呈現，製程排程的更新 ###
-        1. 從 parameter.xlse 讀取出tag name 相關對照表, 轉換為list 指定給的 name_list這個變數
+        ### 處理 Dashboard 各表格的即時量呈現 (同步版本，只在主執行緒呼叫，例如 __init__) ###
+        背景執行緒請改用 fetch_dashboard_values() 取資料，再以訊號交給 apply_dashboard_values() 更新 UI。
+        :return: 即時值 pd.Series；PI 連線失敗時為 None
+        """
+        return self.apply_dashboard_values(self.fetch_dashboard_values(by_kwh=self.demand_by_kwh))
+
+    def fetch_dashboard_values(self, by_kwh: bool = True) -> dict:
+        """
+        ### 取得 Dashboard 需要的即時資料 (不碰任何 Qt 元件，可在背景執行緒呼叫) ###
+        1. 取出 __init__ 時由 tag_list 建立的 tag name 清單 (name_list)
         2. 透過pi_client 類別實例中的方法，一次性搜尋多個tag 的PIPoint 物件，並透過PIPoint 的屬性，
            向 PI Data Archive 發出一次性查詢，並把結果用 pd.Series (tag_name, current_value)
            的型式回傳，其中current_value 已被強制從object->float，如有文字，則用Nan取代。
-        3. 透過 pd.merge() 的方法，把tag_list 其色columns 以tag_name為中心做關聯式合併。
-        4. 從 buffer 這個dataframe 取出 value 這一列，而index 則採用name 這一列。
-        5. 利用 group by 的功能，依Group1(單位)、Group2(負載類型)進行分組，將分組結果套入sum()的方法
-        6. 使用slice (切片器) 來指定 MultiIndex 的範圍，指定各一級單位B類型(廠區用電)的計算結果，
-           指定到wx 這個Series,並重新設定index
+        3. 依 name_list 的順序對齊即時值 (與 tag_list 的列順序相同)。
+        4. 以 tag_list 的 name 作為 c_values 的 index。
+        5. 依 __init__ 時建立的群組編號，加總各一級單位 (W2~WA) B類型(廠區用電) 的即時值，
+        6. 指定到wx 這個Series，index 為各一級單位名稱
         7. 將wx 內容新增到c_values 之後。
-        :return:
+        8. 預估需量 (只算一次) 與 HSM 生產狀態文字；兩者與步驟 2 的即時值查詢同時進行。
+        :param by_kwh: True 用 kWh、False 用 P 值估算需量 (對應 radioButton_5)
+        :return: dict，成功時含 c_values / demand / hsm_text；PI 連線失敗時只含 error
         """
 
-        name_list = self.tag_list['tag_name'].dropna().tolist()     # 1
-        try:
-            current = pi_client.current_values(name_list)           # 2
-            # 如果之前有錯誤訊息，先清掉
-            self.statusBar().clearMessage()
-        except Exception as e:
-            logger.error(f"[dashboard_value] PI 連線失敗:{e}")
-            # 在 statusBar 顯示一條不會自動消失的警告
-            self.statusBar().showMessage("⚠⚠ 無法連線到 PI Server，請檢查網路或憑證 ⚠⚠", 0)
-            return # 直接結束，避免後面用到 current 而再度崩潰！
+        name_list = self._name_list     # 1
+        # 即時值、預估需量、HSM 生產狀態是三組互不相依的 PI 查詢，同時送出以重疊網路等待時間
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            f_current = ex.submit(pi_client.current_values, name_list)     # 2
+            f_demand = ex.submit(self.predict_demand, by_kwh)
+            f_hsm = ex.submit(self.hsm_cycle_text)
+            try:
+                current = f_current.result()
+            except Exception as e:
+                logger.error(f"[dashboard_value] PI 連線失敗:{e}")
+                return {"error": "⚠⚠ 無法連線到 PI Server，請檢查網路或憑證 ⚠⚠"}
+            demand, hsm_text = f_demand.result(), f_hsm.result()
 
         #save_sample_df(current, "tests/data/test_series.csv", fmt="csv")
-        buffer = pd.DataFrame({
-            'tag_name': name_list,
-            'value': current.values
-        })
-        buffer = pd.merge(self.tag_list, buffer, on='tag_name')  # 3
-        c_values = buffer.loc[:,'value']
-        c_values.index = buffer.loc[:,'name']     # 4
-        wx_grouped = buffer.groupby(['Group1','Group2'])['value'].sum()     # 5
-        wx = wx_grouped.loc[(slice('W2','WA')),'B']      # 6
-        wx.index = wx.index.get_level_values(0)
+        # current 的 index 只含搜尋成功的 tag；依 name_list 順序對齊，搜尋失敗者為 NaN
+        values = current.reindex(name_list).to_numpy(dtype=np.float64)     # 3
+        c_values = pd.Series(values, index=self._rt_index)      # 4
+        # 單一時間點的 1-D 陣列直接以 bincount 依群組加總 (NaN 視為 0)；背景執行緒不呼叫 numba kernel
+        valid = self._rt_gid >= 0
+        wx = pd.Series(np.bincount(self._rt_gid[valid], weights=np.nan_to_num(values[valid]),
+                                   minlength=len(self._rt_wx_index)),
+                       index=self._rt_wx_index)     # 5, 6
         c_values = pd.concat([c_values, wx],axis=0)  # 7
-        self.realtime_update_to_tws(c_values)
+
+        return {"c_values": c_values,                   # 8
+                "demand": demand,
+                "hsm_text": hsm_text}
+
+    @QtCore.pyqtSlot(object)
+    def apply_dashboard_values(self, payload: dict):
+        """
+        ### 把 fetch_dashboard_values() 的結果更新到 UI (必須在主執行緒執行) ###
+        - 有 error 時，在 statusBar 顯示一條不會自動消失的警告。
+        - 否則清掉之前的錯誤訊息，更新 tree/table widget、預估需量與 HSM 生產狀態。
+        :param payload: fetch_dashboard_values() 回傳的 dict
+        :return: 即時值 pd.Series；失敗時為 None
+        """
+        error = payload.get("error")
+        if error:
+            self.statusBar().showMessage(error, 0)
+            return None
+
+        # 如果之前有錯誤訊息，先清掉
+        self.statusBar().clearMessage()
+        c_values = payload["c_values"]
+        with self._frozen_dashboard(with_secondary=True):
+            self.realtime_update_to_tws(c_values)
 
         # update predict demand
-        self.label_23.setText(str(f'%s MW' %(self.predict_demand())))
-        self.label_42.setText(str(f'%s MW' % (self.predict_demand())))
+        demand_text = f'{payload["demand"]} MW'
+        self.label_23.setText(demand_text)
+        self.label_42.setText(demand_text)
 
         # 更新hsm 目前速率及每卷需量
-        self.real_time_hsm_cycle()
+        self.show_hsm_cycle(payload["hsm_text"])
         return c_values
 
-    def predict_demand(self):
+    @QtCore.pyqtSlot(bool)
+    def _on_demand_mode_toggled(self, checked: bool):
+        """ radioButton_5 切換時同步 demand_by_kwh，供背景執行緒讀取 """
+        self.demand_by_kwh = checked
+
+    def predict_demand(self, by_kwh: Optional[bool] = None):
         """
         預估本 15 分鐘週期完成時的「最終需量」（即將來到的區段平均功率）。
 
@@ -2586,6 +3068,11 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             * 以 summary="AVERAGE"、秒級 interval 讀取功率，先 clip(lower=0)，對未來時間造成的 NaN 以 0 補，
               再 resample('15T').mean() 將目前週期的均值視為「已累積」，並用近 300 秒平均推估剩餘貢獻。
 
+        參數
+        ----
+        by_kwh : bool, optional
+            True 為 kWh 模式、False 為 P 模式；None 時依 radioButton_5 (只能在主執行緒省略)。
+
         回傳
         ----
         float
@@ -2605,7 +3092,9 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         diff_between_now_and_et = (et - pd.Timestamp.now().floor('s')).total_seconds()  # 此週期剩餘時間
 
         # 根據radioButton_5，判斷用kwh 或p 計算需量。
-        if self.radioButton_5.isChecked():
+        if by_kwh is None:
+            by_kwh = self.radioButton_5.isChecked()
+        if by_kwh:
             tags=('W511_MS1/161KV/1510/kwh11', 'W511_MS1/161KV/1520/kwh11')
             # 查詢目前週期的累計需量值
             query_result = pi_client.query(st=st, et=et, tags=tags)
@@ -2690,12 +3179,12 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         if current_date_widget3.normalize() == now.normalize():
             # 過濾出符合時間格式的欄位，取得目前已查詢的最晚時間欄位
 
-            time_columns = [col for col in self.history_datas_of_groups.columns if re.match(r'^\d{2}:\d{2}$', str(col))]
-            # 過濾掉全部為 NaN 的欄位
-            valid_time_columns = [t for t in time_columns if self.history_datas_of_groups[t].dropna().size > 5]
-            if valid_time_columns:
-                last_completed_time_str = max(valid_time_columns,
-                                              key=lambda t: pd.Timestamp(f"{current_date_widget3.date()} {t}"))
+            # 過濾掉全部為 NaN 的欄位 (一次計算各欄的非 NaN 筆數)
+            counts = np.count_nonzero(~np.isnan(self._hist_arr), axis=0)
+            valid_pos = np.flatnonzero(counts > 5)
+            if valid_pos.size:
+                # 欄位依時間先後排列，最後一個有效欄即為最晚完成的週期
+                last_completed_time_str = _TIME_LIST[valid_pos[-1]]
                 max_time = pd.Timestamp(f"{current_date_widget3.date()} {last_completed_time_str}")
                 # 如果指定的時間區域，已超過現有資料的時間範圍（表示有新完成的區間）
                 if et > max_time:
@@ -2716,7 +3205,115 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         # 先記錄要更新的 column，作為後續呼叫更新畫面時的key
         self._pending_column = st.strftime('%H:%M')
         # 整合完 self.history_datas_of_group 之後，呼叫更新畫面
-        self.update_history_to_tws(self.history_datas_of_groups.loc[:, self._pending_column])
+        with self._frozen_dashboard():
+            self.update_history_to_tws(self._history_column(self._pending_column))
+
+    def _history_column(self, key: str) -> pd.Series:
+        """
+        取出 history_datas_of_groups 中 key ('HH:MM') 週期的各群組平均值，
+        等同 history_datas_of_groups.loc[:, key]，但直接由 _hist_arr 以欄位位置取 view。
+        """
+        return pd.Series(self._hist_arr[:, _TIME_POS[key]], index=self._hist_index, name=key)
+
+    @staticmethod
+    def _segment_summer(current_p):
+        """
+        update_history_to_tws / realtime_update_to_tws 需要對同一筆資料做數十次 current_p['A':'B'].sum()。
+        先以 nancumsum 建立前綴和，之後每個區段加總只需兩次查表相減，不必每次重新切片 Series；
+        名稱 -> 位置的對照表由 _label_positions() 快取，index 不變時不再逐一走訪。
+        :param current_p: 以 tag 名稱為 index 的 pd.Series
+        :return: (seg, at)
+                 seg(start, end): 結果等同 current_p[start:end].sum() (NaN 視為 0)
+                 at(tag): 單一 tag 的原始值 (保留 NaN)，以位置表直接取值，不再經過 label 查找
+        """
+        values = current_p.to_numpy(dtype=float, na_value=np.nan)
+        prefix = np.concatenate(([0.0], np.nancumsum(values)))
+        first, last = _label_positions(current_p.index)     # 名稱 -> 位置表在 index 不變時沿用
+
+        def seg(start, end):
+            i, j = first[start], last[end] + 1
+            return float(prefix[j] - prefix[i]) if j > i else 0.0
+
+        def at(tag):
+            return float(values[last[tag]])
+        return seg, at
+
+    @staticmethod
+    def _tree_subtotals(seg, at):
+        """
+        update_history_to_tws / realtime_update_to_tws 共用：tw1~tw3 各小計節點的數值，每筆資料只算一次。
+        :param seg, at: _segment_summer() 回傳的區段加總與單一 tag 取值函式
+        :return: (nodes, totals)
+                 nodes: {'tw1' / 'tw2' / 'tw3': [(path, value), ...]}
+                 totals: error_value 修正需要的 'plants' (W2~W5 小計合計) 與 'w5_subtotal'
+        """
+        w2_total = seg('2H180', '2KB41') + at('W2')
+        w3_total = seg('AJ320', '5KB28') + at('W3')
+        w41_utility = at('W4')
+        w42_utility = seg('9H110', '9H210') - seg('9H140', '9KB33')
+        w4_utility = w41_utility + w42_utility
+        w41_main = seg('AJ130', 'AJ170')
+        w4_total = w41_main + w4_utility
+        w5_subtotal = seg('3KA14', '2KB29') + at('W5')
+
+        nodes = {
+            'tw1': [
+                ((0,), w2_total),
+                ((0, 0), seg('2H180', '1H350')),
+                ((0, 2), seg('4KB19', '4KB29')),
+                ((0, 3), seg('2KA41', '2KB41')),
+                ((1,), w3_total),
+                ((1, 1), seg('5KA18', '5KB28')),
+                ((2,), w4_total),
+                ((2, 0), w41_main),
+                ((2, 1), w4_utility),
+                ((3,), w5_subtotal),
+                ((3, 0), seg('3KA14', '3KA15')),
+                ((3, 1), seg('3KA24', '3KA25')),
+                ((3, 2), seg('3KB12', '3KB28')),
+                ((3, 3), seg('3KA16', '3KB27')),
+                ((3, 4), seg('2KA19', '2KB29')),
+            ],
+            'tw2': [
+                ((0,), seg('9H140', '9KB33')),
+            ],
+            'tw3': [
+                ((0,), seg('2H120', '1H420')),
+                ((0, 0), seg('2H120', '2H220')),
+                ((0, 1), seg('5H120', '5H220')),
+                ((0, 2), seg('1H120', '1H220')),
+                ((0, 3), seg('1H320', '1H420')),
+                ((1,), seg('4KA18', '5KB19')),
+                ((1, 0), at('4KA18')),
+                ((1, 1), at('5KB19')),
+                ((2,), seg('4H120', '4H220')),
+                ((2, 0), at('4H120')),
+                ((2, 1), at('4H220')),
+            ],
+        }
+        totals = {'plants': w2_total + w3_total + w4_total + w5_subtotal, 'w5_subtotal': w5_subtotal}
+        return nodes, totals
+
+    def _set_nodes(self, tree, col, nodes, *, avg=False, b_map=None):
+        """
+        依 _tree_subtotals() 產生的 [(path, value), ...] 逐一呼叫 _set()。
+        :param b_map: {path: b}，個別節點要改用的 describe 索引
+        """
+        b_map = b_map or {}
+        for path, value in nodes:
+            b = b_map.get(path)
+            self._set(tree, col, path, value, avg=avg, pre_kwargs=None if b is None else dict(b=b))
+
+    def _frozen_dashboard(self, with_secondary=False):
+        """
+        即時/歷史更新會對 tw1~tw3、tableWidget_3 連續寫入數十格文字；
+        整批寫完前暫停重繪，結束後各元件只重繪一次。
+        :param with_secondary: 即時更新另外會同步寫入 tw1_2~tw3_2，設為 True 時一併暫停
+        """
+        widgets = [self.tw1, self.tw2, self.tw3, self.tableWidget_3]
+        if with_secondary:
+            widgets += [w for w in (getattr(self, n, None) for n in ("tw1_2", "tw2_2", "tw3_2")) if w is not None]
+        return frozen_widgets(*widgets)
 
     def update_history_to_tws(self, current_p):
         """
@@ -2724,320 +3321,104 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         :param current_p:
         :return:
         """
-        # tw1（歷史平均欄 col=2)
-        w2_total = current_p['2H180':'2KB41'].sum() + current_p['W2']
-        w3_total = current_p['AJ320':'5KB28'].sum() + current_p['W3']
-        w41_utility = current_p['W4']
-        w42_utility = current_p['9H110':'9H210'].sum() - current_p['9H140':'9KB33'].sum()
-        w4_utility = w41_utility + w42_utility
-        w41_main = current_p['AJ130':'AJ170'].sum()
-        w4_total = w41_main + w4_utility
-        w5_subtotal = current_p['3KA14':'2KB29'].sum() + current_p['W5']
-        self._set(self.tw1, 2, (0,), w2_total, avg=True)
-        self._set(self.tw1, 2, (0, 0,), current_p['2H180':'1H350'].sum(), avg=True)
-        self._set(self.tw1, 2, (0, 0, 0,), current_p['2H180'], avg=True)
-        self._set(self.tw1, 2, (0, 0, 1,), current_p['2H280'], avg=True)
-        self._set(self.tw1, 2, (0, 0, 2,), current_p['1H350'], avg=True)
-        self._set(self.tw1, 2, (0, 1,), current_p['4KA19'], avg=True)
-        self._set(self.tw1, 2, (0, 2,), current_p['4KB19':'4KB29'].sum(), avg=True)
-        self._set(self.tw1, 2, (0, 2, 0,), current_p['4KB19'], avg=True)
-        self._set(self.tw1, 2, (0, 2, 1,), current_p['4KB29'], avg=True)
-        self._set(self.tw1, 2, (0, 3,), current_p['2KA41':'2KB41'].sum(), avg=True)
-        self._set(self.tw1, 2, (0, 3, 0,), current_p['2KA41'], avg=True)
-        self._set(self.tw1, 2, (0, 3, 1,), current_p['2KB41'], avg=True)
-        self._set(self.tw1, 2, (0, 4,), current_p['W2'], avg=True)
-        self._set(self.tw1, 2, (1,), w3_total, avg=True)
-        self._set(self.tw1, 2, (1, 0,), current_p['AJ320'], avg=True)
-        self._set(self.tw1, 2, (1, 1,), current_p['5KA18':'5KB28'].sum(), avg=True)
-        self._set(self.tw1, 2, (1, 1, 0,), current_p['5KA18'], avg=True)
-        self._set(self.tw1, 2, (1, 1, 1,), current_p['5KA28'], avg=True)
-        self._set(self.tw1, 2, (1, 1, 2,), current_p['5KB18'], avg=True)
-        self._set(self.tw1, 2, (1, 1, 3,), current_p['5KB28'], avg=True)
-        self._set(self.tw1, 2, (1, 2,), current_p['W3'], avg=True)
-        self._set(self.tw1, 2, (2,), w4_total, pre_kwargs=dict(b=0), avg=True)
-        self._set(self.tw1, 2, (2, 0,), w41_main, pre_kwargs=dict(b=0), avg=True)
-        self._set(self.tw1, 2, (2, 1,), w4_utility, pre_kwargs=dict(b=0), avg=True)
-        self._set(self.tw1, 2, (3,), w5_subtotal, avg=True)
-        self._set(self.tw1, 2, (3,0,), current_p['3KA14':'3KA15'].sum(), avg=True)
-        self._set(self.tw1, 2, (3, 0, 0,), current_p['3KA14'], avg=True)
-        self._set(self.tw1, 2, (3, 0, 1,), current_p['3KA15'], avg=True)
-        self._set(self.tw1, 2, (3, 1,), current_p['3KA24':'3KA25'].sum(), avg=True)
-        self._set(self.tw1, 2, (3, 1, 0,), current_p['3KA24'], avg=True)
-        self._set(self.tw1, 2, (3, 1, 1,), current_p['3KA25'], avg=True)
-        self._set(self.tw1, 2, (3, 2,), current_p['3KB12':'3KB28'].sum(), avg=True)
-        self._set(self.tw1, 2, (3, 2, 0,), current_p['3KB12'], avg=True)
-        self._set(self.tw1, 2, (3, 2, 1,), current_p['3KB22'], avg=True)
-        self._set(self.tw1, 2, (3, 2, 2,), current_p['3KB28'], avg=True)
-        self._set(self.tw1, 2, (3, 3,), current_p['3KA16':'3KB27'].sum(), avg=True)
-        self._set(self.tw1, 2, (3, 3, 0,), current_p['3KA16'], avg=True)
-        self._set(self.tw1, 2, (3, 3, 1,), current_p['3KA26'], avg=True)
-        self._set(self.tw1, 2, (3, 3, 2,), current_p['3KA17'], avg=True)
-        self._set(self.tw1, 2, (3, 3, 3,), current_p['3KA27'], avg=True)
-        self._set(self.tw1, 2, (3, 3, 4,), current_p['3KB16'], avg=True)
-        self._set(self.tw1, 2, (3, 3, 5,), current_p['3KB26'], avg=True)
-        self._set(self.tw1, 2, (3, 3, 6,), current_p['3KB17'], avg=True)
-        self._set(self.tw1, 2, (3, 3, 7,), current_p['3KB27'], avg=True)
-        self._set(self.tw1, 2, (3, 4,), current_p['2KA19':'2KB29'].sum(), avg=True)
-        self._set(self.tw1, 2, (3, 4, 0,), current_p['2KA19'], avg=True)
-        self._set(self.tw1, 2, (3, 4, 1,), current_p['2KA29'], avg=True)
-        self._set(self.tw1, 2, (3, 4, 2,), current_p['2KB19'], avg=True)
-        self._set(self.tw1, 2, (3, 4, 3,), current_p['2KB29'], avg=True)
-        self._set(self.tw1, 2, (3, 5,), current_p['W5'], avg=True)
-        self._set(self.tw1, 2, (4,), current_p['WA'], avg=True)
-
-        # tw2（歷史平均欄 col=2)
-        self._set(self.tw2, 2, (0,), current_p['9H140':'9KB33'].sum(), pre_kwargs=dict(b=0), avg=True)
-        self._set(self.tw2, 2, (1,), current_p['AH120'], pre_kwargs=dict(b=0), avg=True)
-        self._set(self.tw2, 2, (2,), current_p['AH190'], pre_kwargs=dict(b=0), avg=True)
-        self._set(self.tw2, 2, (3,), current_p['AH130'], pre_kwargs=dict(b=0), avg=True)
-        self._set(self.tw2, 2, (4,), current_p['1H450'], pre_kwargs=dict(b=0), avg=True)
-        self._set(self.tw2, 2, (5,), current_p['1H360'], pre_kwargs=dict(b=0), avg=True)
-
-        # tw3（歷史平均欄 col=2)
-        self._set(self.tw3, 2, (0, ), current_p['2H120':'1H420'].sum(), avg=True)
-        self._set(self.tw3, 2, (0, 0,), current_p['2H120':'2H220'].sum(), avg=True)
-        self._set(self.tw3, 2, (0, 1,), current_p['5H120':'5H220'].sum(), avg=True)
-        self._set(self.tw3, 2, (0, 2,), current_p['1H120':'1H220'].sum(), avg=True)
-        self._set(self.tw3, 2, (0, 3,), current_p['1H320':'1H420'].sum(), avg=True)
-        self._set(self.tw3, 2, (1, ), current_p['4KA18':'5KB19'].sum(), avg=True)
-        self._set(self.tw3, 2, (1, 0,), current_p['4KA18'].sum(), avg=True)
-        self._set(self.tw3, 2, (1, 1,), current_p['5KB19'].sum(), avg=True)
-        self._set(self.tw3, 2, (2, ), current_p['4H120':'4H220'].sum(), avg=True)
-        self._set(self.tw3, 2, (2, 0,), current_p['4H120'].sum(), avg=True)
-        self._set(self.tw3, 2, (2, 1,), current_p['4H220'].sum(), avg=True)
-
-        sun_power = current_p['9KB25-4_2':'3KA12-1_2'].sum()
-        tai_power_demand = current_p['feeder 1510':'feeder 1520'].sum()
-        reversed_power = current_p['feeder 1510_s':'feeder 1520_s'].sum()
-        full_load = tai_power_demand - reversed_power + current_p['2H120':'5KB19'].sum() - sun_power
-
-
-        self.update_table_item(0, 2, self.pre_check2(full_load), self.average_back, self.average_text, bold=True)
-        self.update_table_item(1, 2, self.pre_check2(current_p['2H120':'5KB19'].sum()), self.average_back,
-                               self.average_text, bold=True)
-        self.update_table_item(2, 2, self.pre_check2(sun_power, b=5), self.average_back,
-                               self.average_text, bold=True)
-        self.update_table_item(3, 2, str(format(round(tai_power_demand,2))), self.average_back,
-                               self.average_text, bold=True)
+        seg, at = self._segment_summer(current_p)     # 連續 tag 區段的加總 (一次 cumsum，各區段 O(1))
+        nodes, totals = self._tree_subtotals(seg, at)   # 各小計節點的數值 (與即時更新共用同一份計算)
+
+        # 單一 tag 的顯示文字一次向量化算好，各節點直接取用
+        hist_text = self.pre_check2_series(current_p)
+        hist_text_b0 = self.pre_check2_series(current_p, b=0)
+
+        # tw1 / tw2 / tw3（歷史平均欄 col=2)
+        self._set_nodes(self.tw1, 2, nodes['tw1'], avg=True, b_map=_TW1_HIST_B)
+        self._set_leaves(self.tw1, 2, _TW1_LEAVES, hist_text)
+        self._set_nodes(self.tw2, 2, nodes['tw2'], avg=True, b_map=_TW2_B)
+        self._set_leaves(self.tw2, 2, _TW2_LEAVES, hist_text_b0)
+        self._set_nodes(self.tw3, 2, nodes['tw3'], avg=True)
+
+        sun_power = seg('9KB25-4_2', '3KA12-1_2')
+        tai_power_demand = seg('feeder 1510', 'feeder 1520')
+        reversed_power = seg('feeder 1510_s', 'feeder 1520_s')
+        full_load = tai_power_demand - reversed_power + seg('2H120', '5KB19') - sun_power
+
+
+        self.update_table_item(0, 2, self.pre_check2(full_load))
+        self.update_table_item(1, 2, self.pre_check2(seg('2H120', '5KB19')))
+        self.update_table_item(2, 2, self.pre_check2(sun_power, b=5))
+        self.update_table_item(3, 2, str(round(tai_power_demand, 2)))
 
         # error_value & w5_total correction
-        dynamic_load = current_p['AH120':'9KB33'].sum()
-        error_value = (full_load -w2_total - w3_total -w4_total - w5_subtotal - dynamic_load - current_p['WA'])
-        self.tw1.topLevelItem(3).child(6).setText(2, str(format(round(error_value, 2), '.2f')))
-        w5_total = w5_subtotal + error_value
-        self.tw1.topLevelItem(3).setText(2, self.pre_check2(w5_total))
+        dynamic_load = seg('AH120', '9KB33')
+        error_value = full_load - totals['plants'] - dynamic_load - at('WA')
+        _set_item_text(self._cached_item(self.tw1, (3, 6)), 2, f"{error_value:.2f}")
+        w5_total = totals['w5_subtotal'] + error_value
+        _set_item_text(self._cached_item(self.tw1, (3,)), 2, self.pre_check2(w5_total))
 
     def realtime_update_to_tws(self, current_p):
         """
         將電力系統的即時資訊，更新至對應的樹狀結構(tree widget)、表格結構(table widget)
+
+        效能說明：
+            每 11 秒一次，數值運算只有約 230 個 float 的一次 cumsum 與數十次查表相減，成本可忽略；
+            主要花費在 Python -> Qt 的呼叫 (tw1~tw3、tw1_2~tw3_2、tableWidget_3 約 140 格的 setText)
+            以及 pandas 的 label 查找。因此這裡的最佳化方向是：
+              - 減少 Qt 呼叫：節點快取 (_cached_item)、文字不變不寫 (_set_item_text)、整批暫停重繪 (_frozen_dashboard)
+              - 避免 label 查找：以 _label_positions() 的位置表取值 (_segment_summer)
+            資料量太小，SIMD / GPU 之類的數值加速在此不適用。
         :param current_p: 即時用電量。pd.Series
         :return:
         """
-
-        # tw1（即時欄 col=1）
-        w2_total = current_p['2H180':'2KB41'].sum() + current_p['W2']
-        w3_total = current_p['AJ320':'5KB28'].sum() + current_p['W3']
-        w41_utility = current_p['W4']
-        w42_utility = current_p['9H110':'9H210'].sum() - current_p['9H140':'9KB33'].sum()
-        w4_utility = w41_utility + w42_utility
-        w41_main = current_p['AJ130':'AJ170'].sum()
-        w4_total = w41_main + w4_utility
-        w5_subtotal = current_p['3KA14':'2KB29'].sum() + current_p['W5']
-
-        self._set(self.tw1, 1, (0,), w2_total)
-        self._set(self.tw1, 1, (0, 0,), current_p['2H180':'1H350'].sum())
-        self._set(self.tw1, 1, (0, 0, 0,), current_p['2H180'])
-        self._set(self.tw1, 1, (0, 0, 1,), current_p['2H280'])
-        self._set(self.tw1, 1, (0, 0, 2,), current_p['1H350'])
-        self._set(self.tw1, 1, (0, 1,), current_p['4KA19'])
-        self._set(self.tw1, 1, (0, 2,), current_p['4KB19':'4KB29'].sum())
-        self._set(self.tw1, 1, (0, 2, 0,), current_p['4KB19'])
-        self._set(self.tw1, 1, (0, 2, 1,), current_p['4KB29'])
-        self._set(self.tw1, 1, (0, 3,), current_p['2KA41':'2KB41'].sum())
-        self._set(self.tw1, 1, (0, 3, 0,), current_p['2KA41'])
-        self._set(self.tw1, 1, (0, 3, 1,), current_p['2KB41'])
-        self._set(self.tw1, 1, (0, 4,), current_p['W2'])
-        self._set(self.tw1, 1, (1,), w3_total)
-        self._set(self.tw1, 1, (1, 0,), current_p['AJ320'])
-        self._set(self.tw1, 1, (1, 1,), current_p['5KA18':'5KB28'].sum())
-        self._set(self.tw1, 1, (1, 1, 0,), current_p['5KA18'])
-        self._set(self.tw1, 1, (1, 1, 1,), current_p['5KA28'])
-        self._set(self.tw1, 1, (1, 1, 2,), current_p['5KB18'])
-        self._set(self.tw1, 1, (1, 1, 3,), current_p['5KB28'])
-        self._set(self.tw1, 1, (1, 2,), current_p['W3'])
-        self._set(self.tw1, 1, (2,), w4_total)
-        self._set(self.tw1, 1, (2, 0,), w41_main, pre_kwargs=dict(b=4))
-        self._set(self.tw1, 1, (2, 1,), w4_utility)
-        self._set(self.tw1, 1, (3,), w5_subtotal)
-        self._set(self.tw1, 1, (3,0,), current_p['3KA14':'3KA15'].sum())
-        self._set(self.tw1, 1, (3, 0, 0,), current_p['3KA14'])
-        self._set(self.tw1, 1, (3, 0, 1,), current_p['3KA15'])
-        self._set(self.tw1, 1, (3, 1,), current_p['3KA24':'3KA25'].sum())
-        self._set(self.tw1, 1, (3, 1, 0,), current_p['3KA24'])
-        self._set(self.tw1, 1, (3, 1, 1,), current_p['3KA25'])
-        self._set(self.tw1, 1, (3, 2,), current_p['3KB12':'3KB28'].sum())
-        self._set(self.tw1, 1, (3, 2, 0,), current_p['3KB12'])
-        self._set(self.tw1, 1, (3, 2, 1,), current_p['3KB22'])
-        self._set(self.tw1, 1, (3, 2, 2,), current_p['3KB28'])
-        self._set(self.tw1, 1, (3, 3,), current_p['3KA16':'3KB27'].sum())
-        self._set(self.tw1, 1, (3, 3, 0,), current_p['3KA16'])
-        self._set(self.tw1, 1, (3, 3, 1,), current_p['3KA26'])
-        self._set(self.tw1, 1, (3, 3, 2,), current_p['3KA17'])
-        self._set(self.tw1, 1, (3, 3, 3,), current_p['3KA27'])
-        self._set(self.tw1, 1, (3, 3, 4,), current_p['3KB16'])
-        self._set(self.tw1, 1, (3, 3, 5,), current_p['3KB26'])
-        self._set(self.tw1, 1, (3, 3, 6,), current_p['3KB17'])
-        self._set(self.tw1, 1, (3, 3, 7,), current_p['3KB27'])
-        self._set(self.tw1, 1, (3, 4,), current_p['2KA19':'2KB29'].sum())
-        self._set(self.tw1, 1, (3, 4, 0,), current_p['2KA19'])
-        self._set(self.tw1, 1, (3, 4, 1,), current_p['2KA29'])
-        self._set(self.tw1, 1, (3, 4, 2,), current_p['2KB19'])
-        self._set(self.tw1, 1, (3, 4, 3,), current_p['2KB29'])
-        self._set(self.tw1, 1, (3, 5,), current_p['W5'])
-        self._set(self.tw1, 1, (4,), current_p['WA'])
-
-        # tw2（即時欄 col=1)
-        self._set(self.tw2, 1, (0,), current_p['9H140':'9KB33'].sum(), pre_kwargs=dict(b=0))
-        self._set(self.tw2, 1, (1,), current_p['AH120'], pre_kwargs=dict(b=0))
-        self._set(self.tw2, 1, (2,), current_p['AH190'], pre_kwargs=dict(b=0))
-        self._set(self.tw2, 1, (3,), current_p['AH130'], pre_kwargs=dict(b=0))
-        self._set(self.tw2, 1, (4,), current_p['1H450'], pre_kwargs=dict(b=0))
-        self._set(self.tw2, 1, (5,), current_p['1H360'], pre_kwargs=dict(b=0))
-
-        # tw3（即時欄 col=1)
-        ng_to_power = get_ng_generation_cost_v2(self.unit_prices).get("convertible_power")
+        seg, at = self._segment_summer(current_p)     # 連續 tag 區段的加總 (一次 cumsum，各區段 O(1))
+        nodes, totals = self._tree_subtotals(seg, at)   # 各小計節點的數值只算一次，tw*、tw*_2 共用
+
+        # 單一 tag 的顯示文字一次向量化算好，各節點直接取用
+        rt_text = self.pre_check_series(current_p)
+        rt_text_b0 = self.pre_check_series(current_p, b=0)
+
+        # tw1~tw3 與同步顯示的 tw1_2~tw3_2（即時欄 col=1）寫入相同內容
+        for tw1, tw2, tw3 in ((self.tw1, self.tw2, self.tw3), (self.tw1_2, self.tw2_2, self.tw3_2)):
+            self._set_nodes(tw1, 1, nodes['tw1'], b_map=_TW1_RT_B)
+            self._set_leaves(tw1, 1, _TW1_LEAVES, rt_text)
+            self._set_nodes(tw2, 1, nodes['tw2'], b_map=_TW2_B)
+            self._set_leaves(tw2, 1, _TW2_LEAVES, rt_text_b0)
+            self._set_nodes(tw3, 1, nodes['tw3'])
+
+        ng_to_power = self.ng_generation_cost().get("convertible_power")
         #ng_to_power = self.unit_prices.loc['可轉換電力', 'current']
 
-        self._set(self.tw3, 1, (0, ), current_p['2H120':'1H420'].sum())
-        self._set(self.tw3, 1, (0, 0,), current_p['2H120':'2H220'].sum())
-        self._set(self.tw3, 1, (0, 1,), current_p['5H120':'5H220'].sum())
-        self._set(self.tw3, 1, (0, 2,), current_p['1H120':'1H220'].sum())
-        self._set(self.tw3, 1, (0, 3,), current_p['1H320':'1H420'].sum())
-        self._set(self.tw3, 1, (1, ), current_p['4KA18':'5KB19'].sum())
-        self._set(self.tw3, 1, (1, 0,), current_p['4KA18'].sum())
-        self._set(self.tw3, 1, (1, 1,), current_p['5KB19'].sum())
-        self._set(self.tw3, 1, (2, ), current_p['4H120':'4H220'].sum())
-        self._set(self.tw3, 1, (2, 0,), current_p['4H120'].sum())
-        self._set(self.tw3, 1, (2, 1,), current_p['4H220'].sum())
-
         # tw3 的TGs 及其子節點 TG1~TG4 的 NG貢獻電量、使用量，從原本顯示在最後兩個column，改為顯示在3rd 的tip
-        ng = pd.Series([current_p['TG1 NG':'TG4 NG'].sum(), current_p['TG1 NG'], current_p['TG2 NG'],
-                        current_p['TG3 NG'], current_p['TG4 NG'], ng_to_power])
+        ng = pd.Series([seg('TG1 NG', 'TG4 NG'), at('TG1 NG'), at('TG2 NG'),
+                        at('TG3 NG'), at('TG4 NG'), ng_to_power])
         self.update_tw3_tips_and_colors(ng)
 
         # 方式 2：table widget 3 利用 self.update_table_item 函式，在更新內容後，保留原本樣式不變
-        full_load = current_p['feeder 1510':'feeder 1520'].sum() + current_p['2H120':'5KB19'].sum() \
-                    - current_p['sp_real_time']
-        tai_power_demand = str(format(round(current_p['feeder 1510':'feeder 1520'].sum(), 2), '.2f')) + ' MW'
+        full_load = seg('feeder 1510', 'feeder 1520') + seg('2H120', '5KB19') \
+                    - at('sp_real_time')
+        tai_power_demand = _PRE_CHECK_FMT['power'](seg('feeder 1510', 'feeder 1520'))
 
-        self.update_table_item(0, 1, self.pre_check(full_load), self.real_time_back, self.real_time_text)
-        self.update_table_item(1, 1, self.pre_check(current_p['2H120':'5KB19'].sum()), self.real_time_back, self.real_time_text)  # 即時量
-        self.update_table_item(2, 1, self.pre_check(current_p['sp_real_time'], b=5), self.real_time_back, self.real_time_text)
-        self.update_table_item(3, 1, tai_power_demand , self.real_time_back, self.real_time_text)
+        self.update_table_item(0, 1, self.pre_check(full_load))
+        self.update_table_item(1, 1, self.pre_check(seg('2H120', '5KB19')))  # 即時量
+        self.update_table_item(2, 1, self.pre_check(at('sp_real_time'), b=5))
+        self.update_table_item(3, 1, tai_power_demand)
 
         # error_value & w5_total correction
-        dynamic_load = current_p['AH120':'9KB33'].sum()
-        error_value = (full_load -w2_total - w3_total -w4_total - w5_subtotal - dynamic_load - current_p['WA'])
-        self.tw1.topLevelItem(3).child(6).setText(1, str(format(round(error_value, 2), '.2f'))+ ' MW')
-        w5_total = w5_subtotal + error_value
-        self.tw1.topLevelItem(3).setText(1, self.pre_check(w5_total))
-
-
-        # tw1_2（同步即時欄 col=1）
-        self._set(self.tw1_2, 1, (0,), w2_total)
-        self._set(self.tw1_2, 1, (0, 0,), current_p['2H180':'1H350'].sum())
-        self._set(self.tw1_2, 1, (0, 0, 0,), current_p['2H180'])
-        self._set(self.tw1_2, 1, (0, 0, 1,), current_p['2H280'])
-        self._set(self.tw1_2, 1, (0, 0, 2,), current_p['1H350'])
-        self._set(self.tw1_2, 1, (0, 1,), current_p['4KA19'])
-        self._set(self.tw1_2, 1, (0, 2,), current_p['4KB19':'4KB29'].sum())
-        self._set(self.tw1_2, 1, (0, 2, 0,), current_p['4KB19'])
-        self._set(self.tw1_2, 1, (0, 2, 1,), current_p['4KB29'])
-        self._set(self.tw1_2, 1, (0, 3,), current_p['2KA41':'2KB41'].sum())
-        self._set(self.tw1_2, 1, (0, 3, 0,), current_p['2KA41'])
-        self._set(self.tw1_2, 1, (0, 3, 1,), current_p['2KB41'])
-        self._set(self.tw1_2, 1, (0, 4,), current_p['W2'])
-
-        self._set(self.tw1_2, 1, (1,), w3_total)
-        self._set(self.tw1_2, 1, (1, 0,), current_p['AJ320'])
-        self._set(self.tw1_2, 1, (1, 1,), current_p['5KA18':'5KB28'].sum())
-        self._set(self.tw1_2, 1, (1, 1, 0,), current_p['5KA18'])
-        self._set(self.tw1_2, 1, (1, 1, 1,), current_p['5KA28'])
-        self._set(self.tw1_2, 1, (1, 1, 2,), current_p['5KB18'])
-        self._set(self.tw1_2, 1, (1, 1, 3,), current_p['5KB28'])
-        self._set(self.tw1_2, 1, (1, 2,), current_p['W3'])
-
-        self._set(self.tw1_2, 1, (2,), w4_total)
-        self._set(self.tw1_2, 1, (2, 0,), w41_main, pre_kwargs=dict(b=4))
-        self._set(self.tw1_2, 1, (2, 1,), w4_utility)
-
-        self._set(self.tw1_2, 1, (3,), w5_subtotal)
-        self._set(self.tw1_2, 1, (3,0,), current_p['3KA14':'3KA15'].sum())
-        self._set(self.tw1_2, 1, (3, 0, 0,), current_p['3KA14'])
-        self._set(self.tw1_2, 1, (3, 0, 1,), current_p['3KA15'])
-        self._set(self.tw1_2, 1, (3, 1,), current_p['3KA24':'3KA25'].sum())
-        self._set(self.tw1_2, 1, (3, 1, 0,), current_p['3KA24'])
-        self._set(self.tw1_2, 1, (3, 1, 1,), current_p['3KA25'])
-        self._set(self.tw1_2, 1, (3, 2,), current_p['3KB12':'3KB28'].sum())
-        self._set(self.tw1_2, 1, (3, 2, 0,), current_p['3KB12'])
-        self._set(self.tw1_2, 1, (3, 2, 1,), current_p['3KB22'])
-        self._set(self.tw1_2, 1, (3, 2, 2,), current_p['3KB28'])
-        self._set(self.tw1_2, 1, (3, 3,), current_p['3KA16':'3KB27'].sum())
-        self._set(self.tw1_2, 1, (3, 3, 0,), current_p['3KA16'])
-        self._set(self.tw1_2, 1, (3, 3, 1,), current_p['3KA26'])
-        self._set(self.tw1_2, 1, (3, 3, 2,), current_p['3KA17'])
-        self._set(self.tw1_2, 1, (3, 3, 3,), current_p['3KA27'])
-        self._set(self.tw1_2, 1, (3, 3, 4,), current_p['3KB16'])
-        self._set(self.tw1_2, 1, (3, 3, 5,), current_p['3KB26'])
-        self._set(self.tw1_2, 1, (3, 3, 6,), current_p['3KB17'])
-        self._set(self.tw1_2, 1, (3, 3, 7,), current_p['3KB27'])
-        self._set(self.tw1_2, 1, (3, 4,), current_p['2KA19':'2KB29'].sum())
-        self._set(self.tw1_2, 1, (3, 4, 0,), current_p['2KA19'])
-        self._set(self.tw1_2, 1, (3, 4, 1,), current_p['2KA29'])
-        self._set(self.tw1_2, 1, (3, 4, 2,), current_p['2KB19'])
-        self._set(self.tw1_2, 1, (3, 4, 3,), current_p['2KB29'])
-        self._set(self.tw1_2, 1, (3, 5,), current_p['W5'])
-        self._set(self.tw1_2, 1, (4,), current_p['WA'])
-        # tw2_2（同步即時欄 col=1）
-        self._set(self.tw2_2, 1, (0,), current_p['9H140':'9KB33'].sum(), pre_kwargs=dict(b=0))
-        self._set(self.tw2_2, 1, (1,), current_p['AH120'], pre_kwargs=dict(b=0))
-        self._set(self.tw2_2, 1, (2,), current_p['AH190'], pre_kwargs=dict(b=0))
-        self._set(self.tw2_2, 1, (3,), current_p['AH130'], pre_kwargs=dict(b=0))
-        self._set(self.tw2_2, 1, (4,), current_p['1H450'], pre_kwargs=dict(b=0))
-        self._set(self.tw2_2, 1, (5,), current_p['1H360'], pre_kwargs=dict(b=0))
-        # tw3_2（同步即時欄 col=1）
-        self._set(self.tw3_2, 1, (0, ), current_p['2H120':'1H420'].sum())
-        self._set(self.tw3_2, 1, (0, 0,), current_p['2H120':'2H220'].sum())
-        self._set(self.tw3_2, 1, (0, 1,), current_p['5H120':'5H220'].sum())
-        self._set(self.tw3_2, 1, (0, 2,), current_p['1H120':'1H220'].sum())
-        self._set(self.tw3_2, 1, (0, 3,), current_p['1H320':'1H420'].sum())
-        self._set(self.tw3_2, 1, (1, ), current_p['4KA18':'5KB19'].sum())
-        self._set(self.tw3_2, 1, (1, 0,), current_p['4KA18'].sum())
-        self._set(self.tw3_2, 1, (1, 1,), current_p['5KB19'].sum())
-        self._set(self.tw3_2, 1, (2, ), current_p['4H120':'4H220'].sum())
-        self._set(self.tw3_2, 1, (2, 0,), current_p['4H120'].sum())
-        self._set(self.tw3_2, 1, (2, 1,), current_p['4H220'].sum())
-
-    def update_table_item(self, row, column, text, background_color, text_color, bold=False):
-        """
-        更新 tableWidget_3 的數據，並確保樣式不變
+        dynamic_load = seg('AH120', '9KB33')
+        error_value = full_load - totals['plants'] - dynamic_load - at('WA')
+        _set_item_text(self._cached_item(self.tw1, (3, 6)), 1, _PRE_CHECK_FMT['power'](error_value))
+        w5_total = totals['w5_subtotal'] + error_value
+        _set_item_text(self._cached_item(self.tw1, (3,)), 1, self.pre_check(w5_total))
+
+    def update_table_item(self, row, column, text):
+        """
+        更新 tableWidget_3 的數據。
+        即時量/平均值欄的背景、文字顏色、字型與對齊由 beautify_table_widgets() 安裝的 TableValueDelegate 負責，
+        這裡只更新文字。
         """
         item = self.tableWidget_3.item(row, column)
         if item is None:
-            item = QtWidgets.QTableWidgetItem()
+            item = QtWidgets.QTableWidgetItem(text)
             self.tableWidget_3.setItem(row, column, item)
-
-        item.setText(text)
-        item.setBackground(QtGui.QBrush(QtGui.QColor(background_color)))
-        item.setForeground(QtGui.QBrush(QtGui.QColor(text_color)))
-
-        # 設定微軟正黑體，平均值 (column 3) 需要加粗
-        font = QtGui.QFont('微軟正黑體', 12)
-        if bold:
-            font.setBold(True)
-        item.setFont(font)
-
-        item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignRight)
+        elif item.text() != text:
+            item.setText(text)
 
     def update_tw3_tips_and_colors(self, ng):
         """
@@ -3049,49 +3430,48 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         tg_item = self.tw3.topLevelItem(0)  # TGs 節點
 
-        # 定義顏色
-        default_color = QtGui.QColor(0, 0, 0)  # 黑色 (預設)
-        highlight_color = QtGui.QColor(255, 0, 0)  # 紅色 (NG 貢獻電量 > 0)
-
+        # 顏色：黑色 (預設)、紅色 (NG 貢獻電量 > 0)，使用模組層級的共用筆刷
         # 取得 Nm3/hr 轉 MW 的係數
         conversion_factor = ng[5]
 
-        # 計算 TGs 的 NG 貢獻電量
-        tgs_ng_contribution = (ng[0] * conversion_factor) / 1000
-
-        # 設定 TGs 的美化 Tip 訊息
-        tgs_tooltip = f"""
-        <div style="background-color:#FFFFCC; padding:5px; border-radius:5px;">
-            <b>NG 流量:</b> <span style="color:#0000FF;">{ng[0]:.2f} Nm³/hr</span><br>
-            <b>NG 貢獻電量:</b> <span style="color:#FF0000;">{tgs_ng_contribution:.2f} MW</span>
-        </div>
-        """
-        tg_item.setToolTip(1, tgs_tooltip)  # TGs 的即時量 Tooltip
-
-        # 變更 TGs 的字體顏色
-        tg_item.setForeground(1, QtGui.QBrush(highlight_color if tgs_ng_contribution > 0 else default_color))
-
-        # 遍歷 TG1 ~ TG4
-        for i in range(tg_item.childCount()):
-            tg_child = tg_item.child(i)
-
-            # 取得 NG 使用量
-            ng_usage = ng[i + 1]  # TG1~TG4 NG 使用量
-
-            # 計算 NG 貢獻電量
-            ng_contribution = (ng_usage * conversion_factor) / 1000
-
-            # 設定美化的 Tip 訊息
-            tooltip_text = f"""
-            <div style="background-color:#F0F0F0; padding:5px; border-radius:5px;">
-                <b>NG 流量:</b> <span style="color:#0000FF;">{ng_usage:.2f} Nm³/hr</span><br>
-                <b>NG 貢獻電量:</b> <span style="color:#FF0000;">{ng_contribution:.2f} MW</span>
-            </div>
-            """
-            tg_child.setToolTip(1, tooltip_text)  # 針對 2nd column (即時量) 設定美化 Tooltip
-
-            # 變更字體顏色
-            tg_child.setForeground(1, QtGui.QBrush(highlight_color if ng_contribution > 0 else default_color))
+        # 巢狀在即時更新的 frozen_widgets 裡時，離開後會還原成外層的 (暫停) 狀態，不會提早重繪
+        with frozen_widgets(self.tw3):
+            # 計算 TGs 的 NG 貢獻電量
+            tgs_ng_contribution = (ng[0] * conversion_factor) / 1000
+
+            # 設定 TGs 的美化 Tip 訊息 (NG 流量與係數都沒變時，沿用原本的 tooltip，不再重新產生 HTML)
+            tip_key = (ng[0], conversion_factor)
+            if self._tg_tip.get(-1) != tip_key:
+                tg_item.setToolTip(1, _TT_TEMPLATE_TGS.format(flow=ng[0], mw=tgs_ng_contribution))  # TGs 的即時量 Tooltip
+                self._tg_tip[-1] = tip_key
+
+            # 變更 TGs 的字體顏色 (只在跨過 0 的門檻時才重設)
+            active = tgs_ng_contribution > 0
+            if self._tg_state.get(-1) != active:
+                tg_item.setForeground(1, _BRUSH_RED if active else _BRUSH_BLACK)
+                self._tg_state[-1] = active
+
+            # 遍歷 TG1 ~ TG4
+            for i in range(tg_item.childCount()):
+                tg_child = tg_item.child(i)
+
+                # 取得 NG 使用量
+                ng_usage = ng[i + 1]  # TG1~TG4 NG 使用量
+
+                # 計算 NG 貢獻電量
+                ng_contribution = (ng_usage * conversion_factor) / 1000
+
+                # 設定美化的 Tip 訊息 (數值未變時略過)
+                tip_key = (ng_usage, conversion_factor)
+                if self._tg_tip.get(i) != tip_key:
+                    tg_child.setToolTip(1, _TT_TEMPLATE_TG_CHILD.format(flow=ng_usage, mw=ng_contribution))  # 2nd column (即時量)
+                    self._tg_tip[i] = tip_key
+
+                # 變更字體顏色 (只在跨過 0 的門檻時才重設)
+                active = ng_contribution > 0
+                if self._tg_state.get(i) != active:
+                    tg_child.setForeground(1, _BRUSH_RED if active else _BRUSH_BLACK)
+                    self._tg_state[i] = active
 
     def tw3_expanded_event(self):
         """
@@ -3100,60 +3480,43 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             並將其第二欄文字前景色設為透明（隱藏文字）。
           - 當收縮時，第一欄置中，第二欄恢復為黑色。
         """
-        b_transparent = QtGui.QBrush(QtGui.QColor(0, 0, 0, 0))
-        b_solid = QtGui.QBrush(QtGui.QColor(0, 0, 0, 255))
-
         # 遍歷 tw3 的所有 top-level 項目 (例如：TGs, TRTs, CDQs)
-        for i in range(self.tw3.topLevelItemCount()):
-            item = self.tw3.topLevelItem(i)
-            if item.isExpanded():
-                item.setTextAlignment(0, QtCore.Qt.AlignmentFlag.AlignLeft)
-                item.setForeground(1, b_transparent)
-            else:
-                item.setTextAlignment(0, QtCore.Qt.AlignmentFlag.AlignCenter)
-                item.setForeground(1, b_solid)
+        for item in self._toggle_nodes(self.tw3, range(self.tw3.topLevelItemCount()), ()):
+            expanded = item.isExpanded()
+            item.setTextAlignment(0, _ALIGN_EXPANDED[expanded][0])
+            item.setForeground(1, _BRUSH_EXPANDED[expanded])
+        self._tg_state.clear()  # 前景色已被改寫，下次 update_tw3_tips_and_colors 需重新套用
 
     def tw1_expanded_event(self):
         """
         處理 tw1 展開與收縮事件，根據各層項目是否展開，設定文字對齊方式及前景色：
           - 當 top-level 項目展開時，第一欄與第二欄皆置左，
             否則第一欄置中，第二欄置右。
-          - 對於特定子項目，若展開則將其文字設為透明，不展開則恢復為不透明（黑色）。
+          - 對於特定子項目 (_TW1_TOGGLE_CHILDREN)，若展開則將其文字設為透明，不展開則恢復為不透明（黑色）。
         """
-        b_transparent = QtGui.QBrush(QtGui.QColor(0, 0, 0, 0))
-        b_solid = QtGui.QBrush(QtGui.QColor(0, 0, 0, 255))
-
-        def update_alignment(item):
-            if item.isExpanded():
-                item.setTextAlignment(0, QtCore.Qt.AlignmentFlag.AlignLeft)
-                item.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignLeft)
-            else:
-                item.setTextAlignment(0, QtCore.Qt.AlignmentFlag.AlignCenter)
-                item.setTextAlignment(1, QtCore.Qt.AlignmentFlag.AlignRight)
+        tops = range(self.tw1.topLevelItemCount())
+        for item in self._toggle_nodes(self.tw1, tops, ()):
+            align_0, align_1 = _ALIGN_EXPANDED[item.isExpanded()]
+            item.setTextAlignment(0, align_0)
+            item.setTextAlignment(1, align_1)
+        for child in self._toggle_nodes(self.tw1, (), _TW1_TOGGLE_CHILDREN):
+            child.setForeground(1, _BRUSH_EXPANDED[child.isExpanded()])
 
-        def update_child_foreground(parent, child_index):
-            child = parent.child(child_index)
-            if child.isExpanded():
-                child.setForeground(1, b_transparent)
-            else:
-                child.setForeground(1, b_solid)
-
-        # 建立 top-level 項目與其需更新的子項目索引對應關係
-        update_children = {
-            0: [0, 2, 3],  # w2: 依序更新「鼓風機群」、「#2 燒結風車群」與「#2 屋頂風扇&runner 群」
-            1: [1],  # w3: 更新「轉爐除塵」
-            # 項目 2 (w4) 僅更新對齊，不需處理子項
-            3: [0, 1, 2, 3, 4]  # w5: 分別更新 O2#1、O2#2、O2#3、空壓機群 與 IDF 群
-        }
-
-        # 遍歷所有 top-level 項目，更新對齊方式及子項前景色
-        for i in range(self.tw1.topLevelItemCount()):
-            top_item = self.tw1.topLevelItem(i)
-            update_alignment(top_item)
-            if i in update_children:
-                for child_idx in update_children[i]:
-                    if top_item.childCount() > child_idx:
-                        update_child_foreground(top_item, child_idx)
+    @staticmethod
+    def _toggle_nodes(tree, tops, children):
+        """
+        依規格表產生展開事件要處理的節點：tops 為 top-level 索引，children 為 (top-level 索引, 子項索引)。
+        不存在的節點略過。
+        """
+        n_top = tree.topLevelItemCount()
+        for i in tops:
+            if i < n_top:
+                yield tree.topLevelItem(i)
+        for i, j in children:
+            if i < n_top:
+                top_item = tree.topLevelItem(i)
+                if j < top_item.childCount():
+                    yield top_item.child(j)
 
     def handle_selection_changed(self):
         """
@@ -3162,14 +3525,10 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         :return:
         """
         a = self.tableWidget_2.selectedItems()  # 1
-        sum_of_selection = list()
-        for i in range(len(a)):     # 2
-            if (a[i].column() % 2 != 0) & (a[i].text() != ''):
-                sum_of_selection.append(a[i].text())
-        b = pd.Series(sum_of_selection, dtype=float)
-        self.label_6.setText(str(b.mean()))
-        self.label_6.setStyleSheet("color:green; font-size:12pt;")
-        self.label_8.setText(str(len(b)))
+        vals = [float(item.text()) for item in a if (item.column() & 1) and item.text()]    # 2
+        self.label_6.setText(f'{sum(vals) / len(vals):.3f}' if vals else 'nan')
+        _restyle(self.label_6, "color:green; font-size:12pt;")
+        self.label_8.setText(str(len(vals)))
 
     def query_demand(self):
         """
@@ -3212,59 +3571,86 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             raw_data.insert(0, 'TPC', (raw_data.iloc[:, 0] + raw_data.iloc[:,1]))
             demand_15min = raw_data
 
-        for j in range(6):          # 1
-            for i in range(16):
-                item1 = QtWidgets.QTableWidgetItem(pd.Timestamp(demand_15min.index[i + j * 16]).strftime('%H:%M'))  #2
-                font = QtGui.QFont()
-                font.setPointSize(10)
+        font = _ui_font(10, family=None)     # 預設字型族系，僅指定 10 pt
+
+        # 96 格的時間文字、需量文字與是否為未來時段先整批算好，迴圈內只建立 item 與 setItem
+        index = demand_15min.index
+        times = index.strftime('%H:%M').tolist()                                   # 2
+        values = demand_15min.iloc[:, 0].to_numpy(dtype=float, na_value=np.nan)
+        texts = ['' if v != v else str(round(v, 3)) for v in values.tolist()]     # 5
+        naive = index.tz_localize(None) if index.tz is not None else index
+        is_future = (naive + pd.offsets.Minute(15) > pd.Timestamp.now()).tolist()  # 6
+
+        with frozen_widgets(self.tableWidget_2):      # 96 格一次填完後才重繪
+            for k in range(96):         # 1
+                i, j = k % 16, k // 16
+                item1 = _centered_item(times[k])    # 4
                 item1.setFont(font)         # 3
-                self.tableWidget_2.setItem(i, 0 + j * 2,item1)
-                self.tableWidget_2.item(i, 0 + j * 2).setTextAlignment(4 | 4)       # 4
+                self.tableWidget_2.setItem(i, 0 + j * 2, item1)
 
-                if pd.isnull(demand_15min.iloc[i + j * 16, 0]):             # 5
-                    item2 = QtWidgets.QTableWidgetItem(str(''))
-                else:
-                    item2 = QtWidgets.QTableWidgetItem(str(round(demand_15min.iloc[i + j * 16,0], 3)))
-                if pd.Timestamp.now() < (demand_15min.index[i + j * 16].tz_localize(None) + pd.offsets.Minute(15)):
-                    brush = QtGui.QBrush(QtGui.QColor(255, 0, 0))       # 6
-                else:
-                    brush = QtGui.QBrush(QtGui.QColor(0, 0, 255))
-                item2.setForeground(brush)                              # 2
+                item2 = _centered_item(texts[k])    # 4
+                item2.setForeground(_BRUSH_RED if is_future[k] else _BRUSH_BLUE)
                 self.tableWidget_2.setItem(i, 1 + j * 2, item2)
-                self.tableWidget_2.item(i, 1 + j * 2).setTextAlignment(4 |4)         # 4
-        self.tableWidget_2.resizeColumnsToContents()   # 7
-        self.tableWidget_2.resizeRowsToContents()
+        if not self._tw2_sized:     # 7 欄位內容寬度固定，只需在第一次查詢時依內容調整
+            self.tableWidget_2.resizeColumnsToContents()
+            self.tableWidget_2.resizeRowsToContents()
+            self._tw2_sized = True
 
     def query_cbl(self):
         """
             查詢特定條件的 基準用電容量(CBL)
         :return:
         """
-        if self.spinBox.value() == 0:
+        # UI 設定值在開頭各讀一次，之後都用區域變數
+        n_days = self.spinBox.value()
+        n_hours = self.spinBox_2.value()
+        t0 = self.timeEdit.time()
+        if n_days == 0:
             self.show_box(content='參考天數不可為0！')
             return
-        if self.spinBox_2.value() == 0:
+        if n_hours == 0:
             self.show_box(content='時間長度不可為0！')
             return
         start_date_time = pd.Timestamp(str(self.dateEdit_2.date().toPyDate() +
-                                           pd.offsets.Hour(self.timeEdit.time().hour())))
-        end_date_time = start_date_time + pd.offsets.Hour(self.spinBox_2.value())
+                                           pd.offsets.Hour(t0.hour())))
+        end_date_time = start_date_time + pd.offsets.Hour(n_hours)
         self.tz_changed()  # 調整timezone
         if self.radioButton_2.isChecked():
-            if self.listWidget.count() == 0:
+            n_listed = self.listWidget.count()
+            if n_listed == 0:
                 self.show_box(content='未指定任何參考日')
                 return
-            if (self.listWidget.count != 0) & (self.spinBox.value() != self.listWidget.count()):
+            if n_days != n_listed:
                 self.show_box(content='參考日數量與天數不相符')
                 return
-        a = pd.Timestamp(str(self.timeEdit.time().toString()))
-        b = a + pd.offsets.Hour(self.spinBox_2.value())
+        a = pd.Timestamp(str(t0.toString()))
+        b = a + pd.offsets.Hour(n_hours)
         if b.day > a.day:
             self.show_box(content='時間長度不可跨至隔天')
             return
 
-        demands = self.calculate_demand(e_date_time=end_date_time)  # DataFrame
-        cbl = demands.mean(axis=0, skipna=True)  # Series
+        # PI 查詢與 pandas 運算交給 CblThread，結果由 on_cbl_ready() 在主執行緒填入表格；
+        # 連續查詢時以遞增的序號辨識，只有最後一次送出的結果會被採用
+        self._cbl_token += 1
+        self._cbl_n_days = n_days
+        thread = CblThread(self._cbl_token, self._cbl_params(end_date_time), parent=self)
+        thread.result_ready.connect(self.on_cbl_ready)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def on_cbl_ready(self, token: int, result: object):
+        """
+        CblThread 計算完成時的槽函式。序號不是最新一次查詢的結果直接丟棄；
+        result 為 Exception 時彈出錯誤對話框，否則計算 CBL 並更新 tableWidget 與 label_10。
+        """
+        if token != self._cbl_token:
+            return
+        if isinstance(result, Exception):
+            QtWidgets.QMessageBox.critical(self, "CBL 查詢錯誤", f"CBL 需量計算失敗：{result}")
+            return
+        n_days = self._cbl_n_days
+        demands = result                            # DataFrame
+        cbl = demands.mean(axis=0, skipna=True)     # Series
         """
             1. 用來設定每一row 有幾個columns
             2. 依cbl 參考日數量設定表格 row、column 的數量
@@ -3275,29 +3661,37 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             7. 將表格的高度、寬度自動依內容調整   
         """
         max_column = 5                          # 1
-        a = math.ceil(self.spinBox.value()/max_column)
-        self.tableWidget.clear()
-        self.tableWidget.setColumnCount(max_column)
-        self.tableWidget.setRowCount(a*2)       # 2
-        for y in range(a):                      # 3
-            for x in range(max_column):
-                count = x + y * max_column               # 4
-                item = QtWidgets.QTableWidgetItem(str(demands.columns[count])) # 日期
-                self.tableWidget.setItem(y * 2, x, item)
-                self.tableWidget.item(y * 2, x).setTextAlignment(4 | 4)       # 5
-                item = QtWidgets.QTableWidgetItem(str(round(cbl[count], 3)))  # 平均值
-                self.tableWidget.setItem(y * 2 + 1, x, item)
-                self.tableWidget.item(y * 2 + 1, x).setTextAlignment(4 | 4)   # 5
-                if count == (self.spinBox.value() - 1):
-                    break
+        a = math.ceil(n_days/max_column)
+        dates = [str(d) for d in demands.columns[:n_days]]                  # 日期
+        means = [str(round(v, 3)) for v in cbl.to_numpy()[:n_days].tolist()]   # 平均值
+        table = self.tableWidget
+        with frozen_widgets(table):
+            # 不再 clear() 後全部重建：格子已有 item 時只改文字，只有新增的格子才建立 item
+            table.setColumnCount(max_column)
+            table.setRowCount(a*2)       # 2
+            for count in range(a * max_column):     # 3, 4
+                y, x = divmod(count, max_column)
+                for row, texts in ((y * 2, dates), (y * 2 + 1, means)):
+                    if count >= n_days:             # 最後一列多出來的格子，清掉上一次查詢留下的內容
+                        table.takeItem(row, x)
+                        continue
+                    item = table.item(row, x)
+                    if item is None:
+                        table.setItem(row, x, _centered_item(texts[count]))    # 5
+                    else:
+                        item.setText(texts[count])
         self.label_10.setText(str(round(cbl.mean(),3)))     # 6
-        self.label_10.setStyleSheet("color:blue")
-        self.tableWidget.resizeColumnsToContents()  # 7
-        self.tableWidget.resizeRowsToContents()     # 7
+        _restyle(self.label_10, "color:blue")
+        shape = (self.tableWidget.rowCount(), self.tableWidget.columnCount())
+        if self._tw_sized_shape != shape:           # 7 表格大小有變動時才重新依內容調整
+            self.tableWidget.resizeColumnsToContents()
+            self.tableWidget.resizeRowsToContents()
+            self._tw_sized_shape = shape
 
     def calculate_demand(self, e_date_time):
         """
         計算 CBL（基準用電量）所需的「多個參考日、指定時段」之 15 分鐘需量，並回傳為 DataFrame。
+        在主執行緒同步計算；query_cbl() 改由 CblThread 在背景呼叫 _cbl_demands()，兩者結果相同。
 
         參數
         ----
@@ -3305,128 +3699,93 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             欲計算的「結束時間」；開始時間由 UI 的日期與時間（dateEdit_2, timeEdit）決定，
             長度由 spinBox_2（小時數）決定。當現在時間已超過 e_date_time 時，參考日區間向後平移一天。
 
-        計算方式
-        --------
-        - 參考日：呼叫 define_cbl_date() 取得一組日期清單（由 UI 決定天數／指定日）。
-        - kWh 模式（radioButton_5 勾選）：
-            讀取 1510/1520 兩條 kWh tag，將同時刻兩者相加後乘以 4，視為 15 分鐘需量序列。
-        - P 模式（radioButton_5 未勾選）：
-            以 summary="AVERAGE", interval='6s' 讀取功率，將負值剪成 0，並做 resample('15T').mean()，
-            再把兩條迴路相加為該時刻之 15 分鐘需量。
-
         回傳
         ----
         pandas.DataFrame
-            欄為各參考日（日期），列為該參考日中「指定時段」涵蓋的 15 分鐘需量。
-            該結果通常會再被 mean(axis=0, skipna=True) 取得 CBL。
+            欄為各參考日（日期），列為該參考日中「指定時段」涵蓋的 15 分鐘需量，詳見 _cbl_demands()。
+        """
+        return _cbl_demands(**self._cbl_params(e_date_time))
 
-        備註
-        ----
-        - P 模式先 clip(lower=0) 再平均，確保需量不被負值拉低。
-        - 取樣起訖時刻會依 UI 的開始時間與時長（不可跨日）逐一切片組成。
+    def _cbl_params(self, e_date_time) -> dict:
+        """
+        讀出 _cbl_demands() 需要的 UI 設定值 (參考日、kWh/P 模式、開始時間、時數、天數)。
+        define_cbl_date() 會更新 listWidget，必須在主執行緒呼叫；之後的 PI 查詢與 pandas 運算就只用這些值。
         """
         if pd.Timestamp.now() > e_date_time:  # 1
             cbl_date = self.define_cbl_date(e_date_time.date() + pd.offsets.Day(1))
         else:
             cbl_date = self.define_cbl_date(e_date_time.date())
-
-        # 根據radioButton_5，判斷用kwh 或p 計算需量。
-        if self.radioButton_5.isChecked():
-            tags=('W511_MS1/161KV/1510/kwh11', 'W511_MS1/161KV/1520/kwh11')
-            # 2
-            buffer2 = pi_client.query(st=pd.Timestamp(cbl_date[-1]),
-                                      et=pd.Timestamp(cbl_date[0] + pd.offsets.Day(1)), tags=tags)
-            row_data = (buffer2.iloc[:, 0] + buffer2.iloc[:, 1]) * 4  # 3
-        else:
-            tags=('W511_MS1/161KV/1510/P', 'W511_MS1/161KV/1520/P')
-            # 2
-            buffer2 = pi_client.query(st=pd.Timestamp(cbl_date[-1]),
-                                         et=pd.Timestamp(cbl_date[0] + pd.offsets.Day(1)),
-                                         tags=tags, summary="AVERAGE", interval='6s')
-            buffer2 = buffer2.clip(lower=0)
-            buffer2 = buffer2.resample('15T').mean()
-            row_data = (buffer2.iloc[:, 0] + buffer2.iloc[:, 1])  # 3
-
-        """
-            1. 每天要取樣的起始時間點, 存成list
-            2. 將指定時間長度的需量，一天為一筆(pd.Series 的型態) 儲存至list
-            3. 將list 中每筆Series name 更改為日期
-        """
-        period_start = [(cbl_date[i] + pd.Timedelta(str(self.timeEdit.time().toPyTime())))
-                        for i in range(self.spinBox.value())]       # 1
-
-        demands_buffer = list()
-        for i in range(self.spinBox.value()):
-            s_point = str(period_start[i])
-            e_point = str(period_start[i] + pd.offsets.Minute((self.spinBox_2.value() * 4 - 1) * 15))
-            demands_buffer.append(row_data.loc[s_point: e_point])                   # 2
-            demands_buffer[i].rename(cbl_date[i].date(), inplace=True, copy=False)  # 3
-        demands = pd.concat([s for s in demands_buffer], axis=1)
-
-        return demands
+        return dict(cbl_date=cbl_date,
+                    by_kwh=self.radioButton_5.isChecked(),
+                    start_time=pd.Timedelta(str(self.timeEdit.time().toPyTime())),
+                    n_hours=self.spinBox_2.value(),
+                    n_days=self.spinBox.value())
 
     def define_cbl_date(self, date):    #回傳list
         """
         :param date: 此參數數必需是TimeStamp 或 datetime, 用來當作往前找出參考日的起始點
         :return: 將定義好的CBL 參考日以list 的方式回傳
         """
-        pending_date = date
         cbl_date = list()
-        i = 0
         if self.radioButton.isChecked():            # 找出適當的參考日，並顯示在list widget 中
             self.listWidget.clear()     # 清空list widget
             days = self.spinBox.value()  # 取樣天數
-            while i < days:
-                pending_date = pending_date - pd.tseries.offsets.BDay(1)
-                if self.is_special_date(pending_date):  # 呼叫判斷特殊日的函式
-                    continue    # 如果為特殊日，跳過後續流程，再換下一天繼續判斷
-                cbl_date.append(pending_date)
-                self.listWidget.addItem(str(cbl_date[-1].date()))
-                i = i + 1
+            # 由 date 往前數的第 1 ~ days 個「平日且非特殊日」；特殊日當作 holidays，一次算出全部參考日
+            start = np.datetime64(pd.Timestamp(date).date(), 'D')
+            picked = np.busday_offset(start, -np.arange(1, days + 1), roll='forward',
+                                      busdaycal=self._cbl_calendar)
+            cbl_date = pd.to_datetime(picked).tolist()
+            self.listWidget.addItems([str(d.date()) for d in cbl_date])
         else:
             for i in range(self.listWidget.count()):
                 cbl_date.append(pd.Timestamp(self.listWidget.item(i).text()))
         return cbl_date
 
+    def _refresh_special_dates(self):
+        """
+        special_dates 載入 (或重新載入) 後呼叫一次：把第 1 欄與第 2 欄 (去除空值) 的特殊日合併成 set，
+        供 is_special_date() 以雜湊查詢，不必每次判斷都重新 concat 再逐一比對。
+        """
+        special_date = pd.concat([self.special_dates.iloc[:, 0], self.special_dates.iloc[:, 1]],
+                                 axis=0, ignore_index=True).dropna()
+        self._special_date_set = frozenset(special_date.tolist())
+        # 以同一批特殊日 (datetime64[D]) 為 holidays 的營業日曆，給 define_cbl_date() 的 np.busday_offset() 使用；
+        # busdaycalendar 會先排序、去重並排除週末的特殊日，之後每次查詢不必再重新整理 holidays
+        self._cbl_calendar = np.busdaycalendar(
+            holidays=pd.to_datetime(special_date).to_numpy().astype('datetime64[D]'))
+
     def is_special_date(self, pending_date):
         """
             用來判斷傳入的日期否，是為特殊日的函式. argument 為待判斷日期
         :param pending_date: 待判斷的日期 (dtype:TimeStamp)
         :return: 用 bool 的方式回傳是或不是
         """
-        special_date = pd.concat([self.special_dates.iloc[:,0], self.special_dates.iloc[:,1].dropna()],
-                                 axis=0, ignore_index=True)
-        for sdate in special_date:      # 將傳進來的日期與special_date 逐一比對，有一樣的就回傳true
-            if pending_date == sdate:
-                return True
-        return False
+        return pending_date in self._special_date_set
 
     def remove_item_from_cbl_list(self):
         selected = self.listWidget.currentRow() # 取得目前被點撃item 的index
         self.listWidget.takeItem(selected) # 將指定index 的item 刪除
 
     def add_item_to_cbl_list(self):
-        pending_date = pd.Timestamp(self.dateEdit_2.date().toString())
-        if pending_date.date() >= pd.Timestamp.today().date():      # datetime格式比較
+        pending_date = self.dateEdit_2.date().toPyDate()
+        if pending_date >= pd.Timestamp.today().date():      # datetime格式比較
             self.show_box(content='不可指定今天或未來日期作為CBL參考日期！')
             return
-        for i in range(self.listWidget.count()):
-            if pending_date == pd.Timestamp(self.listWidget.item(i).text()):
-                self.show_box(content='不可重複指定同一天為CBL參考日期！')
-                return
-        self.listWidget.addItem(str(self.dateEdit_2.date().toPyDate()))  #Add special day to listWidget
+        # list widget 內的日期文字一律為 'YYYY-MM-DD' (str(date))，以文字完全比對交給 Qt 搜尋，不必逐項轉成 Timestamp
+        text = str(pending_date)
+        if self.listWidget.findItems(text, QtCore.Qt.MatchFlag.MatchExactly):
+            self.show_box(content='不可重複指定同一天為CBL參考日期！')
+            return
+        self.listWidget.addItem(text)  #Add special day to listWidget
 
     def tz_changed(self):
         self.label_3.setText(self.timeEdit.time().toString())
-        self.label_3.setStyleSheet("color:blue")
+        _restyle(self.label_3, "color:blue")
         lower_limit = pd.Timestamp(self.timeEdit.time().toString()) + pd.offsets.Hour(self.spinBox_2.value())
         self.label_4.setText(str(lower_limit.time()))
         a = pd.Timestamp(str(self.timeEdit.time().toString()))
         b = a + pd.offsets.Hour(self.spinBox_2.value())
-        if b.day > a.day:
-            self.label_4.setStyleSheet("color:red")
-        else:
-            self.label_4.setStyleSheet("color:blue")
+        _restyle(self.label_4, "color:red" if b.day > a.day else "color:blue")
 
     def show_box(self, content):
         mbox = QtWidgets.QMessageBox(self)
@@ -3445,6 +3804,22 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         minutes = remainder // 60
         self.label_26.setText(f"{int(hours):02d}時{int(minutes):02d}分")
 
+    def ng_generation_cost(self, target_datetime=None) -> dict:
+        """
+        get_ng_generation_cost_v2(self.unit_prices, target_datetime) 的快取版本。
+        查表結果只與日期有關，因此以日期為 key；self.unit_prices 重新載入(換成新物件)時快取自動清空。
+        回傳的 dict 為共用物件，呼叫端只能讀取不可修改。
+        """
+        if self._ng_cost_cache_src is not self.unit_prices:
+            self._ng_cost_cache_src = self.unit_prices
+            self._ng_cost_cache = {}
+        day = (target_datetime if target_datetime is not None else datetime.now()).date()
+        par = self._ng_cost_cache.get(day)
+        if par is None:
+            par = get_ng_generation_cost_v2(self.unit_prices, target_datetime)
+            self._ng_cost_cache[day] = par
+        return par
+
     @log_exceptions()
     @timeit(level=20)
     def benefit_appraisal(self, *_):
@@ -3501,7 +3876,16 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         ng_cost_versions = []
         ng_cost_keys = set()
 
-        for ind in cost_benefit.index:
+        # ** 每筆適用的單價先寫入預先配置的陣列，迴圈結束後再一次性寫回 cost_benefit **
+        n = len(cost_benefit)
+        ng_price_arr, convertible_arr, ng_cost_arr, sale_price_arr, unit_price_arr, tg_cost_arr, carbon_cost_arr = (
+            np.full(n, np.nan) for _ in range(7))
+        rate_labels = np.empty(n, dtype=object)
+
+        def as_float(v):
+            return np.nan if v is None else v
+
+        for i, ind in enumerate(cost_benefit.index):
             # ** 根據 index 的時間，讀取適用各種日期版本的的單價 **
             """
             if par1:
@@ -3525,7 +3909,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             else:
                 par2 = get_current_rate_type_v6(self.time_of_use, special_date, self.unit_prices, ind)
             """
-            par1 = get_ng_generation_cost_v2(self.unit_prices, ind)
+            par1 = self.ng_generation_cost(ind)
             par2 = get_current_rate_type_v6(self.time_of_use, special_date, self.unit_prices, ind)
 
             # 🔹 交集版本期間：開始為最大值，結束為最小值
@@ -3590,90 +3974,34 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                 }
             }
 
-            cost_benefit.loc[ind, 'NG 購入成本'] = cost_benefit.loc[ind, 'NG 總用量'] * par1.get('ng_price') / 3600 * t_resolution
-            cost_benefit.loc[ind, 'NG 增加的發電度數'] = (cost_benefit.loc[ind, 'NG 總用量'] * par1.get('convertible_power')
-                                            / 3600 * t_resolution)
-            cost_benefit.loc[ind, 'NG 增加的發電量'] = cost_benefit.loc[ind, 'NG 增加的發電度數'] / 1000 * 3600 / t_resolution
-            cost_benefit.loc[ind, 'TG 增加的維運成本'] = cost_benefit.loc[ind, 'NG 增加的發電度數'] * par1.get('tg_maintain_cost')
-            cost_benefit.loc[ind, '增加的碳費'] = cost_benefit.loc[ind, 'NG 增加的發電度數'] * par1.get('carbon_cost')
-            cost_benefit.loc[ind, '原始TPC'] = cost_benefit.loc[ind, '即時TPC'] + cost_benefit.loc[ind, 'NG 增加的發電量']
-            cost_benefit.loc[ind, '時段'] = par2.get('rate_label')
-            # ** 根據原始TPC 是否處於逆送電，計算各種效益 **
-            if cost_benefit.loc[ind, 'NG 總用量'] != 0:
-                # ** 還原後TPC 處於逆送電時 **
-                if cost_benefit.loc[ind, '原始TPC'] <= 0:
-                    """ 
-                        增加的售電收入 = NG 增加的發電量 * 躉售電售
-                        增加售電的NG購入成本 = NG 增加的發電量 * NG發電成本
-                        增加售電的TG 維運成本 = NG 增加的發電量 * TG 維運成本
-                        增加售電的碳費 = NG 增加的發電量 * 碳費                        
-                        降低的購電費用 = 0
-                        降低購電的NG購入成本 = 0
-                        降低購電的TG 維運成本 = 0
-                        降低購電的碳費 = 0     
-                    """
-                    cost_benefit.loc[ind, '增加的售電收入'] = cost_benefit.loc[ind, 'NG 增加的發電量'] * par2.get('sale_price') * coefficient
-                    cost_benefit.loc[ind, '增加售電的NG購入成本'] = cost_benefit.loc[ind, 'NG 增加的發電量'] * par1.get('ng_cost') * coefficient
-                    cost_benefit.loc[ind, '增加售電的TG維運成本'] = cost_benefit.loc[ind, 'NG 增加的發電量'] * par1.get('tg_maintain_cost') * coefficient
-                    cost_benefit.loc[ind, '增加售電的碳費'] = cost_benefit.loc[ind, 'NG 增加的發電量'] * par1.get('carbon_cost') * coefficient
-                    cost_benefit.loc[ind, '降低的購電費用'] = 0
-                    cost_benefit.loc[ind, '降低購電的NG購入成本'] = 0
-                    cost_benefit.loc[ind, '降低購電的TG維運成本'] = 0
-                    cost_benefit.loc[ind, '降低購電的碳費'] = 0
-                # ** 還原後TPC 處於購電時 **
-                else:
-                    # ** NG 發電量 > 還原後的TPC **
-                    if cost_benefit.loc[ind, 'NG 增加的發電量'] > cost_benefit.loc[ind, '原始TPC']:
-                        """ 
-                            增加的售電收入 = (NG 增加的發電量- 原TPC) * 躉售電售
-                            增加售電的NG購入成本 = (NG 增加的發電量- 原TPC) * NG發電成本
-                            增加售電的TG 維運成本 = (NG 增加的發電量- 原TPC) * TG 維運成本
-                            增加售電的碳費 = (NG 增加的發電量- 原TPC) * 碳費                            
-                            降低的購電費用 = 原TPC * 時段購電價
-                            降低購電的NG購入成本 = 原TPC * NG發電成本
-                            降低購電的TG 維運成本 = 原TPC * TG 維運成本
-                            降低購電的碳費 = 原TPC * 碳費
-                        """
-                        cost_benefit.loc[ind, '增加的售電收入'] = (cost_benefit.loc[ind, 'NG 增加的發電量'] - cost_benefit.loc[ind, '原始TPC']) * par2.get('sale_price') * coefficient
-                        cost_benefit.loc[ind, '增加售電的NG購入成本'] = (cost_benefit.loc[ind, 'NG 增加的發電量'] - cost_benefit.loc[ind, '原始TPC']) * par1.get('ng_cost') * coefficient
-                        cost_benefit.loc[ind, '增加售電的TG維運成本'] = (cost_benefit.loc[ind, 'NG 增加的發電量'] - cost_benefit.loc[ind, '原始TPC']) * par1.get('tg_maintain_cost') * coefficient
-                        cost_benefit.loc[ind, '增加售電的碳費'] = (cost_benefit.loc[ind, 'NG 增加的發電量'] - cost_benefit.loc[ind, '原始TPC']) * par1.get('carbon_cost') * coefficient
-
-                        cost_benefit.loc[ind, '降低的購電費用'] = cost_benefit.loc[ind, '原始TPC'] * par2.get('unit_price') * coefficient
-                        cost_benefit.loc[ind, '降低購電的NG購入成本'] = cost_benefit.loc[ind, '原始TPC'] * par1.get('ng_cost') * coefficient
-                        cost_benefit.loc[ind, '降低購電的TG維運成本'] = cost_benefit.loc[ind, '原始TPC'] * par1.get('tg_maintain_cost') * coefficient
-                        cost_benefit.loc[ind, '降低購電的碳費'] = cost_benefit.loc[ind, '原始TPC'] * par1.get('carbon_cost') * coefficient
-
-                    # ** NG 發電量 <= 還原後的TPC
-                    else:
-                        """ 
-                            增加的售電收入 = 0
-                            增加售電的NG購入成本 = 0
-                            增加售電的TG 維運成本 = 0
-                            增加售電的碳費 = 0
-                            降低的購電費用 = NG 增加的發電量 * 時段購電價
-                            降低購電的NG購入成本 = NG 增加的發電量 * NG發電成本
-                            降低購電的TG 維運成本 = NG 增加的發電量 * TG 維運成本
-                            降低購電的碳費 = NG 增加的發電量 * 碳費
-                        """
-                        cost_benefit.loc[ind, '增加的售電收入'] = 0
-                        cost_benefit.loc[ind, '增加售電的NG購入成本'] = 0
-                        cost_benefit.loc[ind, '增加售電的TG維運成本'] = 0
-                        cost_benefit.loc[ind, '增加售電的碳費'] = 0
-                        cost_benefit.loc[ind, '降低的購電費用'] = cost_benefit.loc[ind, 'NG 增加的發電量'] * par2.get('unit_price') * coefficient
-                        cost_benefit.loc[ind, '降低購電的NG購入成本'] = cost_benefit.loc[ind, 'NG 增加的發電量'] * par1.get('ng_cost') * coefficient
-                        cost_benefit.loc[ind, '降低購電的TG維運成本'] = cost_benefit.loc[ind, 'NG 增加的發電量'] * par1.get('tg_maintain_cost') * coefficient
-                        cost_benefit.loc[ind, '降低購電的碳費'] = cost_benefit.loc[ind, 'NG 增加的發電量'] * par1.get('carbon_cost') * coefficient
-
-            else:
-                cost_benefit.loc[ind, '增加的售電收入'] = 0
-                cost_benefit.loc[ind, '增加售電的NG購入成本'] = 0
-                cost_benefit.loc[ind, '增加售電的TG維運成本'] = 0
-                cost_benefit.loc[ind, '增加售電的碳費'] = 0
-                cost_benefit.loc[ind, '降低的購電費用'] = 0
-                cost_benefit.loc[ind, '降低購電的NG購入成本'] = 0
-                cost_benefit.loc[ind, '降低購電的TG維運成本'] = 0
-                cost_benefit.loc[ind, '降低購電的碳費'] = 0
+            ng_price_arr[i] = as_float(par1.get('ng_price'))
+            convertible_arr[i] = as_float(par1.get('convertible_power'))
+            ng_cost_arr[i] = as_float(par1.get('ng_cost'))
+            tg_cost_arr[i] = as_float(par1.get('tg_maintain_cost'))
+            carbon_cost_arr[i] = as_float(par1.get('carbon_cost'))
+            unit_price_arr[i] = as_float(par2.get('unit_price'))
+            sale_price_arr[i] = as_float(par2.get('sale_price'))
+            rate_labels[i] = par2.get('rate_label')
+
+        # ** NG 用量換算成購入成本、發電度數/發電量，並還原未補 NG 時的原始TPC (整欄一次寫入) **
+        ng_total = cost_benefit['NG 總用量'].to_numpy(dtype=np.float64)
+        ng_inc_kwh = ng_total * convertible_arr / 3600 * t_resolution
+        ng_inc_gen = ng_inc_kwh / 1000 * 3600 / t_resolution
+        orig_tpc = cost_benefit['即時TPC'].to_numpy(dtype=np.float64) + ng_inc_gen
+        cost_benefit['NG 購入成本'] = ng_total * ng_price_arr / 3600 * t_resolution
+        cost_benefit['NG 增加的發電度數'] = ng_inc_kwh
+        cost_benefit['NG 增加的發電量'] = ng_inc_gen
+        cost_benefit['TG 增加的維運成本'] = ng_inc_kwh * tg_cost_arr
+        cost_benefit['增加的碳費'] = ng_inc_kwh * carbon_cost_arr
+        cost_benefit['原始TPC'] = orig_tpc
+        cost_benefit['時段'] = pd.Categorical(rate_labels, dtype=_TOU_PERIOD_DTYPE)   # 以整數代碼比對/分組時段
+
+        # ** 根據原始TPC 是否處於逆送電，計算各種效益 (三分支邏輯見 benefit_kernel.compute_benefit) **
+        outputs = [np.empty(n, dtype=np.float64) for _ in BENEFIT_COLUMNS]
+        compute_benefit(ng_total, orig_tpc, ng_inc_gen, ng_cost_arr, sale_price_arr, unit_price_arr,
+                        tg_cost_arr, carbon_cost_arr, coefficient, *outputs)
+        cost_benefit[list(BENEFIT_COLUMNS)] = np.column_stack(outputs)
+        cost_benefit[_BENEFIT_F32_COLUMNS] = cost_benefit[_BENEFIT_F32_COLUMNS].astype(np.float32)
 
         self.update_benefit_tables(cost_benefit, t_resolution, version_used = self.version_used)
         self.trend_chart.plot_from_dataframe(cost_benefit)
@@ -3681,19 +4009,220 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.statusBar().clearMessage()
 
     def update_benefit_tables(self, cost_benefit=None, t_resolution=None, version_used=None, initialize_only=False):
-        def color_config(name):
-            return {
-                '減少外購電金額': ('#8064A2', '#DDD0EC', 'white', 'blue'),
-                '增加外售電金額': ('#769d64', '#D8E4BC', 'white', 'blue'),
-                'NG 發電成本': ('#F79646', '#FBE4D5', 'white', 'red'),
-                'TG 維運成本': ('#F79646', '#FBE4D5', 'white', 'red'),
-                '總效益': ('#D9D9D9', '#EAF1FA', 'black', None)
-            }.get(name, ('#FFFFFF', '#FFFFFF', 'black', 'black'))
-
-        # 加深格線色
-        self.tableWidget_4.setStyleSheet("QTableWidget { gridline-color: #666666; }")
-        self.tableWidget_5.setStyleSheet("QTableWidget { gridline-color: #666666; }")
+        # 加深格線色（樣式表內容相同時不重設，避免每次更新都觸發整個元件重新套用樣式）
+        for table in (self.tableWidget_4, self.tableWidget_5):
+            _restyle(table, "QTableWidget { gridline-color: #666666; }")
+
+        # 表格結構（列/欄數、欄寬、兩層表頭與合併儲存格）固定不變，只在第一次呼叫時建立
+        if not self._benefit_layout_ready:
+            self.setup_benefit_tables_layout()
+            self._benefit_layout_ready = True
+
+        # 🧩 NG 發電成本與 TG 維運成本版本資料（多版本）
+        if not initialize_only and version_used and "ng_cost_versions" in version_used:
+            cost_tip = self.build_cost_tooltip(version_used["ng_cost_versions"])
+            self.tableWidget_5.item(1, 3).setToolTip(cost_tip)
+            self.tableWidget_5.item(1, 7).setToolTip(cost_tip)
+
+        if initialize_only:
+            self.tableWidget_4.setRowCount(5)
+            self.tableWidget_4.setColumnCount(2)
+            items = ['減少外購電金額', '增加外售電金額', 'NG 發電成本', 'TG 維運成本', '總效益']
+            for row, name in enumerate(items):
+                bg_name, bg_value, fg_name, fg_value = _BENEFIT_COLOR_CONFIG.get(name, _BENEFIT_DEFAULT)
+                set_table_item(self.tableWidget_4, row, 0, name, fg_color=fg_name, bg_color=bg_name, align='center',
+                               font_size=11)
+                set_table_item(self.tableWidget_4, row, 1, "$0", fg_color=fg_value or 'black', bg_color=bg_value,
+                               align='right', font_size=11)
+            periods = ['夏尖峰', '夏半尖峰', '夏離峰', '夏週六半', '非夏半尖峰', '非夏離峰', '非夏週六半','小計']
+            for i, period in enumerate(periods):
+                row = i + 2
+                bg = self.get_period_background(period)
+                set_table_item(self.tableWidget_5, row, 0, period, bg_color=bg)
+
+            self.tableWidget_4.setStyleSheet("QTableWidget { background-color: #FFFFFF; gridline-color: #666666; }")
+            self.tableWidget_5.setStyleSheet("QTableWidget { background-color: #FFFFFF; gridline-color: #666666; }")
+            self.auto_resize(self.tableWidget_4)
+            self.auto_resize(self.tableWidget_5)
+            return
+
+        with frozen_widgets(self.tableWidget_4, self.tableWidget_5):
+            # ===== 資料填入 tableWidget_4 =====
+            summary_data = [
+                ('減少外購電金額', cost_benefit['降低的購電費用'].sum()),
+                ('增加外售電金額', cost_benefit['增加的售電收入'].sum()),
+                ('NG 發電成本', cost_benefit['降低購電的NG購入成本'].sum() + cost_benefit['增加售電的NG購入成本'].sum()),
+                ('TG 維運成本', cost_benefit['降低購電的TG維運成本'].sum() + cost_benefit['增加售電的TG維運成本'].sum()),
+            ]
+            total_benefit = summary_data[0][1] + summary_data[1][1] - summary_data[2][1] - summary_data[3][1]
+            summary_data.append(('總效益', total_benefit))
+
+            for row, (name, value) in enumerate(summary_data):
+                bg_name, bg_value, fg_name, fg_value = _BENEFIT_COLOR_CONFIG.get(name, _BENEFIT_DEFAULT)
+                if name == '總效益':
+                    fg_value = 'blue' if value >= 0 else 'red'
+                set_table_item(self.tableWidget_4, row, 0, name, fg_color=fg_name, bg_color=bg_name, align='center',
+                               font_size=11)
+                set_table_item(self.tableWidget_4, row, 1, f"${value:,.0f}", fg_color=fg_value, bg_color=bg_value,
+                               align='right', font_size=11)
+                # 套用 NG 發電成本 / TG 維運成本 tooltip
+                if name in ["NG 發電成本", "TG 維運成本"] and version_used:
+                    ng_cost_versions = version_used.get("ng_cost_versions", [])
+                    tooltip_html = self.build_ng_table4_tooltip(name, ng_cost_versions)
+                    self.tableWidget_4.item(row, 0).setToolTip(tooltip_html)
+
+            # ===== 表格 5 資料填入（每個時段） =====
+            periods = list(_TOU_PERIODS)
+
+            # 以時段的 Categorical 代碼做 np.bincount 取代 groupby：只加總「降低的購電費用 > 0」、「增加的售電收入 > 0」的列，
+            # 不必先建立 where() 遮罩後的 DataFrame 副本
+            r_mask = cost_benefit['降低的購電費用'].to_numpy() > 0
+            i_mask = cost_benefit['增加的售電收入'].to_numpy() > 0
+            # 分組依 Categorical 的全部類別 (七個時段 + '未知分類')，缺值另成最後一組；
+            # 前七組即各時段列，全部組別加總即小計列 (與原本以遮罩篩出全部資料加總的結果相同)
+            n_bins = len(_TOU_PERIOD_DTYPE.categories) + 1
+            codes = cost_benefit['時段'].cat.codes.to_numpy().astype(np.intp)     # astype 複製一份，不改到原本的代碼
+            codes[codes < 0] = n_bins - 1
+
+            def period_sum(col, mask):
+                weights = np.nan_to_num(cost_benefit[col].to_numpy()[mask], nan=0.0)  # 與 pandas sum 一樣略過 NaN
+                return np.bincount(codes[mask], weights=weights, minlength=n_bins)
+
+            agg_all = pd.DataFrame({
+                'ra': period_sum('降低的購電費用', r_mask),
+                'rc_ng': period_sum('降低購電的NG購入成本', r_mask),
+                'rc_tg': period_sum('降低購電的TG維運成本', r_mask),
+                'rh': np.bincount(codes[r_mask], minlength=n_bins),
+                'ia': period_sum('增加的售電收入', i_mask),
+                'ic_ng': period_sum('增加售電的NG購入成本', i_mask),
+                'ic_tg': period_sum('增加售電的TG維運成本', i_mask),
+                'ih': np.bincount(codes[i_mask], minlength=n_bins),
+            })
+            agg = agg_all.iloc[:len(periods)].set_axis(periods)
+            hr_factor = t_resolution / 3600.0      # 每筆資料代表的小時數
+            r_index_by_period = cost_benefit.index[r_mask].groupby(cost_benefit.loc[r_mask, '時段'].to_numpy())
+            i_index_by_period = cost_benefit.index[i_mask].groupby(cost_benefit.loc[i_mask, '時段'].to_numpy())
+            empty_index = cost_benefit.index[:0]
+
+            # 先把 version_info 依 cost_benefit.index 對應成兩個 Series，時段內只需以索引取值再去重
+            up_ver = pd.Series({k: v.get('unit_price') for k, v in self.version_info.items()},
+                               dtype=object).reindex(cost_benefit.index)
+            sp_ver = pd.Series({k: v.get('sale_price') for k, v in self.version_info.items()},
+                               dtype=object).reindex(cost_benefit.index)
+
+            for i, period in enumerate(periods):
+                row = i + 2
+                p_agg = agg.loc[period]
+                r_index = r_index_by_period.get(period, empty_index)
+                i_index = i_index_by_period.get(period, empty_index)
+
+                rh = p_agg['rh'] * hr_factor
+                ra = p_agg['ra']
+                rc_ng, rc_tg = p_agg['rc_ng'], p_agg['rc_tg']
+                rc = rc_ng + rc_tg
+                rb = ra - rc
+
+                ih = p_agg['ih'] * hr_factor
+                ia = p_agg['ia']
+                ic_ng, ic_tg = p_agg['ic_ng'], p_agg['ic_tg']
+                ic = ic_ng + ic_tg
+                ib = ia - ic
+
+                bg_color = self.get_period_background(period)
+                set_table_item(self.tableWidget_5, row, 0, period, bg_color=bg_color)
+                set_table_item(self.tableWidget_5, row, 1, f"{rh:.1f} hr", bg_color="#DDD0EC")
+                set_table_item(self.tableWidget_5, row, 2, f"${ra:,.0f}", fg_color='blue', align='right',
+                               bg_color="#DDD0EC")
+                set_table_item(self.tableWidget_5, row, 3, f"${rc:,.0f}", fg_color='red', align='right', bg_color="#FBE4D5")
+                # 替代動態顏色判斷，改為統一顏色
+                set_table_item(self.tableWidget_5, row, 4, f"${rb:,.0f}",
+                               fg_color='black', bg_color='#EAF1FA', align='right')
+
+                set_table_item(self.tableWidget_5, row, 5, f"{ih:.1f} hr", bg_color="#D8E4BC")
+                set_table_item(self.tableWidget_5, row, 6, f"${ia:,.0f}", fg_color='blue', align='right',
+                               bg_color="#D8E4BC")
+                set_table_item(self.tableWidget_5, row, 7, f"${ic:,.0f}", fg_color='red', align='right', bg_color="#FBE4D5")
+                # 替代動態顏色判斷，改為統一顏色
+                set_table_item(self.tableWidget_5, row, 8, f"${ib:,.0f}",
+                               fg_color='black', bg_color='#EAF1FA', align='right')
+
+                # 🔹 該時段沒有任何符合的資料時，不建立版本清單與 tooltip，並清除上一次查詢留在這些儲存格的 tooltip
+                #    (版本清單為空時 build_price_tooltip 回傳 ""，同樣會清掉舊內容)
+                if len(r_index):
+                    # 建立購電版本清單（去重並保留出現順序）
+                    purchase_versions = _unique_versions(up_ver.loc[r_index])
+                    self.tableWidget_5.item(row, 2).setToolTip(self.build_price_tooltip(period, purchase_versions))
+
+                    # ➤ 減少外購電成本 tooltip
+                    self.tableWidget_5.item(row, 3).setToolTip(self.build_cost_cell_tooltip(rc_ng, rc_tg))
+                else:
+                    self.tableWidget_5.item(row, 2).setToolTip("")
+                    self.tableWidget_5.item(row, 3).setToolTip("")
+
+                if len(i_index):
+                    # 建立售電版本清單
+                    sale_versions = _unique_versions(sp_ver.loc[i_index])
+                    self.tableWidget_5.item(row, 6).setToolTip(
+                        self.build_price_tooltip(period, sale_versions, is_sale=True))
+
+                    # ➤ 增加外售電成本 tooltip
+                    self.tableWidget_5.item(row, 7).setToolTip(self.build_cost_cell_tooltip(ic_ng, ic_tg))
+                else:
+                    self.tableWidget_5.item(row, 6).setToolTip("")
+                    self.tableWidget_5.item(row, 7).setToolTip("")
+
+            # ===== 小計列 =====
+            row = len(periods) + 2
+            # 直接由各組加總再合計，不必再掃描一次 cost_benefit
+            totals = agg_all.sum()
+
+            rh = totals['rh'] * hr_factor
+            ra = totals['ra']
+            rc = totals['rc_ng'] + totals['rc_tg']
+            rb = ra - rc
+
+            ih = totals['ih'] * hr_factor
+            ia = totals['ia']
+            ic = totals['ic_ng'] + totals['ic_tg']
+            ib = ia - ic
+
+            set_table_item(self.tableWidget_5, row, 0, "小計", bold=True, bg_color="#D9D9D9")
+            set_table_item(self.tableWidget_5, row, 1, f"{rh:.1f} hr", bg_color="#DDD0EC")
+            set_table_item(self.tableWidget_5, row, 2, f"${ra:,.0f}", fg_color='blue', align='right', bold=True,
+                           bg_color="#DDD0EC")
+            set_table_item(self.tableWidget_5, row, 3, f"${rc:,.0f}", fg_color='red', align='right', bold=True,
+                           bg_color="#FBE4D5")
+            set_table_item(self.tableWidget_5, row, 4, f"${rb:,.0f}", fg_color='blue' if rb >= 0 else 'red',
+                           align='right', bold=True, bg_color="#EAF1FA")
+            set_table_item(self.tableWidget_5, row, 5, f"{ih:.1f} hr", bg_color="#D8E4BC")
+            set_table_item(self.tableWidget_5, row, 6, f"${ia:,.0f}", fg_color='blue', align='right', bold=True,
+                           bg_color="#D8E4BC")
+            set_table_item(self.tableWidget_5, row, 7, f"${ic:,.0f}", fg_color='red', align='right', bold=True,
+                           bg_color="#FBE4D5")
+            set_table_item(self.tableWidget_5, row, 8, f"${ib:,.0f}", fg_color='blue' if ib >= 0 else 'red',
+                           align='right', bold=True, bg_color="#EAF1FA")
+
+            # ** 計算及顯示指定期間的NG 使用量
+            ng_arr = cost_benefit['NG 總用量'].to_numpy()
+            ng_mask = ng_arr > 0                   # 同一個遮罩同時用於計算時數與平均用量
+            ng_count = int(np.count_nonzero(ng_mask))
+            ng_duration_secs = ng_count * t_resolution
+            mean_ng = ng_arr[ng_mask].mean() if ng_count else 0.0
+            ng_amount = mean_ng * ng_duration_secs / 3600
+            par1 = self.ng_generation_cost(cost_benefit.index[0])
+            ng_kwh = ng_amount * par1.get('convertible_power')
+            self.label_30.setText(f"{ng_amount:,.0f} Nm3\n({ng_kwh:,.0f} kWH)")
+            self.label_30.setStyleSheet("color: #004080; font-size:12pt; font_weight: bold;")
+            self.label_30.setToolTip("查詢區間內 NG 總使用量（單位：Nm³）")
+
+            self.auto_resize(self.tableWidget_4)
+            self.auto_resize(self.tableWidget_5)
 
+    def setup_benefit_tables_layout(self):
+        """
+        建立 tableWidget_4 / tableWidget_5 的固定結構：列/欄數、欄寬、表頭與說明用 tooltip。
+        結構與資料分離，之後每次更新效益表只需填入資料儲存格。
+        """
         # 表頭與欄寬初始設定
         self.tableWidget_4.setRowCount(5)
         self.tableWidget_4.setColumnCount(2)
@@ -3720,179 +4249,12 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         # 呼叫函式進行tableWidget_5 的表頭設計
         self.set_tablewidget5_header()
 
-        # 🧩 NG 發電成本與 TG 維運成本版本資料（多版本）
-        if not initialize_only and version_used and "ng_cost_versions" in version_used:
-            cost_tip = self.build_cost_tooltip(version_used["ng_cost_versions"])
-            self.tableWidget_5.item(1, 3).setToolTip(cost_tip)
-            self.tableWidget_5.item(1, 7).setToolTip(cost_tip)
-
         # ** 在模擬表頭的tooltip 增加說明 **
         self.tableWidget_5.item(1, 2).setToolTip("減少外購電金額：\n對應時段的總金額")
         self.tableWidget_5.item(1, 4).setToolTip("減少外購電效益：\n金額 - 成本")
         self.tableWidget_5.item(1, 6).setToolTip("增加外售電金額：\n對應時段的總金額")
         self.tableWidget_5.item(1, 8).setToolTip("增加外售電效益：\n金額 - 成本")
 
-        if initialize_only:
-            self.tableWidget_4.setRowCount(5)
-            self.tableWidget_4.setColumnCount(2)
-            items = ['減少外購電金額', '增加外售電金額', 'NG 發電成本', 'TG 維運成本', '總效益']
-            for row, name in enumerate(items):
-                bg_name, bg_value, fg_name, fg_value = color_config(name)
-                self.tableWidget_4.setItem(row, 0,
-                                           make_item(name, fg_color=fg_name, bg_color=bg_name, align='center',
-                                                          font_size=11))
-                self.tableWidget_4.setItem(row, 1, make_item("$0", fg_color=fg_value or 'black', bg_color=bg_value,
-                                                                  align='right', font_size=11))
-            periods = ['夏尖峰', '夏半尖峰', '夏離峰', '夏週六半', '非夏半尖峰', '非夏離峰', '非夏週六半','小計']
-            for i, period in enumerate(periods):
-                row = i + 2
-                bg = self.get_period_background(period)
-                self.tableWidget_5.setItem(row, 0, make_item(period, bg_color=bg))
-
-            self.tableWidget_4.setStyleSheet("QTableWidget { background-color: #FFFFFF; gridline-color: #666666; }")
-            self.tableWidget_5.setStyleSheet("QTableWidget { background-color: #FFFFFF; gridline-color: #666666; }")
-            self.auto_resize(self.tableWidget_4)
-            self.auto_resize(self.tableWidget_5)
-            return
-
-        # ===== 資料填入 tableWidget_4 =====
-        summary_data = [
-            ('減少外購電金額', cost_benefit['降低的購電費用'].sum()),
-            ('增加外售電金額', cost_benefit['增加的售電收入'].sum()),
-            ('NG 發電成本', cost_benefit['降低購電的NG購入成本'].sum() + cost_benefit['增加售電的NG購入成本'].sum()),
-            ('TG 維運成本', cost_benefit['降低購電的TG維運成本'].sum() + cost_benefit['增加售電的TG維運成本'].sum()),
-        ]
-        total_benefit = summary_data[0][1] + summary_data[1][1] - summary_data[2][1] - summary_data[3][1]
-        summary_data.append(('總效益', total_benefit))
-
-        for row, (name, value) in enumerate(summary_data):
-            bg_name, bg_value, fg_name, fg_value = color_config(name)
-            if name == '總效益':
-                fg_value = 'blue' if value >= 0 else 'red'
-            self.tableWidget_4.setItem(row, 0, make_item(name, fg_color=fg_name, bg_color=bg_name, align='center',
-                                                              font_size=11))
-            self.tableWidget_4.setItem(row, 1, make_item(f"${value:,.0f}", fg_color=fg_value, bg_color=bg_value,
-                                                              align='right', font_size=11))
-            # 套用 NG 發電成本 / TG 維運成本 tooltip
-            if name in ["NG 發電成本", "TG 維運成本"] and version_used:
-                ng_cost_versions = version_used.get("ng_cost_versions", [])
-                tooltip_html = self.build_ng_table4_tooltip(name, ng_cost_versions)
-                self.tableWidget_4.item(row, 0).setToolTip(tooltip_html)
-
-        # ===== 表格 5 資料填入（每個時段） =====
-        periods = ['夏尖峰', '夏半尖峰', '夏離峰', '夏週六半', '非夏半尖峰', '非夏離峰', '非夏週六半']
-        for i, period in enumerate(periods):
-            row = i + 2
-            pd_data = cost_benefit[cost_benefit['時段'] == period]
-
-            r_data = pd_data[pd_data['降低的購電費用'] > 0]
-            rh = len(r_data) * t_resolution / 3600
-            ra = r_data['降低的購電費用'].sum()
-            rc = r_data['降低購電的NG購入成本'].sum() + r_data['降低購電的TG維運成本'].sum()
-            rb = ra - rc
-
-            i_data = pd_data[pd_data['增加的售電收入'] > 0]
-            ih = len(i_data) * t_resolution / 3600
-            ia = i_data['增加的售電收入'].sum()
-            ic = i_data['增加售電的NG購入成本'].sum() + i_data['增加售電的TG維運成本'].sum()
-            ib = ia - ic
-
-            bg_color = self.get_period_background(period)
-            self.tableWidget_5.setItem(row, 0, make_item(period, bg_color=bg_color))
-            self.tableWidget_5.setItem(row, 1, make_item(f"{rh:.1f} hr", bg_color="#DDD0EC"))
-            self.tableWidget_5.setItem(row, 2, make_item(f"${ra:,.0f}", fg_color='blue', align='right',
-                                                              bg_color="#DDD0EC"))
-            self.tableWidget_5.setItem(row, 3,
-                                       make_item(f"${rc:,.0f}", fg_color='red', align='right', bg_color="#FBE4D5"))
-            # 替代動態顏色判斷，改為統一顏色
-            self.tableWidget_5.setItem(row, 4, make_item(f"${rb:,.0f}",
-                                                         fg_color='black', bg_color='#EAF1FA', align='right'))
-
-            self.tableWidget_5.setItem(row, 5, make_item(f"{ih:.1f} hr", bg_color="#D8E4BC"))
-            self.tableWidget_5.setItem(row, 6, make_item(f"${ia:,.0f}", fg_color='blue', align='right',
-                                                              bg_color="#D8E4BC"))
-            self.tableWidget_5.setItem(row, 7, make_item(f"${ic:,.0f}", fg_color='red', align='right', bg_color="#FBE4D5"))
-            # 替代動態顏色判斷，改為統一顏色
-            self.tableWidget_5.setItem(row, 8, make_item(f"${ib:,.0f}",
-                                                         fg_color='black', bg_color='#EAF1FA', align='right'))
-
-            # 🔹 建立購電/售電版本清單（避免重複）
-            purchase_versions = []
-            sale_versions = []
-
-            for idx in r_data.index:
-                ver = self.version_info.get(idx, {}).get("unit_price")
-                if ver and ver not in purchase_versions:
-                    purchase_versions.append(ver)
-
-            for idx in i_data.index:
-                ver = self.version_info.get(idx, {}).get("sale_price")
-                if ver and ver not in sale_versions:
-                    sale_versions.append(ver)
-
-            # 🔹 套用 tooltip
-            if purchase_versions:
-                tooltip_html = self.build_price_tooltip(period, purchase_versions)
-                self.tableWidget_5.item(row, 2).setToolTip(tooltip_html)
-
-            if sale_versions:
-                tooltip_html = self.build_price_tooltip(period, sale_versions, is_sale=True)
-                self.tableWidget_5.item(row, 6).setToolTip(tooltip_html)
-
-            # ➤ 減少外購電成本 tooltip
-            rc_ng = r_data['降低購電的NG購入成本'].sum()
-            rc_tg = r_data['降低購電的TG維運成本'].sum()
-            self.tableWidget_5.item(row, 3).setToolTip(self.build_cost_cell_tooltip(rc_ng, rc_tg))
-
-            # ➤ 增加外售電成本 tooltip
-            ic_ng = i_data['增加售電的NG購入成本'].sum()
-            ic_tg = i_data['增加售電的TG維運成本'].sum()
-            self.tableWidget_5.item(row, 7).setToolTip(self.build_cost_cell_tooltip(ic_ng, ic_tg))
-
-        # ===== 小計列 =====
-        row = len(periods) + 2
-        reduce_all = cost_benefit[cost_benefit['降低的購電費用'] > 0]
-        increase_all = cost_benefit[cost_benefit['增加的售電收入'] > 0]
-
-        rh = len(reduce_all) * t_resolution / 3600
-        ra = reduce_all['降低的購電費用'].sum()
-        rc = reduce_all['降低購電的NG購入成本'].sum() + reduce_all['降低購電的TG維運成本'].sum()
-        rb = ra - rc
-
-        ih = len(increase_all) * t_resolution / 3600
-        ia = increase_all['增加的售電收入'].sum()
-        ic = increase_all['增加售電的NG購入成本'].sum() + increase_all['增加售電的TG維運成本'].sum()
-        ib = ia - ic
-
-        subtotal = [
-            make_item("小計", bold=True, bg_color="#D9D9D9"),
-            make_item(f"{rh:.1f} hr", bg_color="#DDD0EC"),
-            make_item(f"${ra:,.0f}", fg_color='blue', align='right', bold=True, bg_color="#DDD0EC"),
-            make_item(f"${rc:,.0f}", fg_color='red', align='right', bold=True, bg_color="#FBE4D5"),
-            make_item(f"${rb:,.0f}", fg_color='blue' if rb >= 0 else 'red', align='right', bold=True,
-                           bg_color="#EAF1FA"),
-            make_item(f"{ih:.1f} hr", bg_color="#D8E4BC"),
-            make_item(f"${ia:,.0f}", fg_color='blue', align='right', bold=True, bg_color="#D8E4BC"),
-            make_item(f"${ic:,.0f}", fg_color='red', align='right', bold=True, bg_color="#FBE4D5"),
-            make_item(f"${ib:,.0f}", fg_color='blue' if ib >= 0 else 'red', align='right', bold=True,
-                           bg_color="#EAF1FA")
-        ]
-        for col, item in enumerate(subtotal):
-            self.tableWidget_5.setItem(row, col, item)
-
-        # ** 計算及顯示指定期間的NG 使用量
-        ng_active = cost_benefit[cost_benefit['NG 總用量'] > 0]
-        ng_duration_secs = len (ng_active) * t_resolution
-        ng_amount = cost_benefit.loc[cost_benefit['NG 總用量']>0, 'NG 總用量'].mean() * ng_duration_secs / 3600
-        par1 = get_ng_generation_cost_v2(self.unit_prices, cost_benefit.index[0])
-        ng_kwh = ng_amount * par1.get('convertible_power')
-        self.label_30.setText(f"{ng_amount:,.0f} Nm3\n({ng_kwh:,.0f} kWH)")
-        self.label_30.setStyleSheet("color: #004080; font-size:12pt; font_weight: bold;")
-        self.label_30.setToolTip("查詢區間內 NG 總使用量（單位：Nm³）")
-
-        self.auto_resize(self.tableWidget_4)
-        self.auto_resize(self.tableWidget_5)
-
     def set_tablewidget5_header(self):
         # 第一層表頭
         header_row1 = ["時段", "減少外購電", "", "", "", "增加外售電", "", "", ""]
@@ -3918,17 +4280,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
     @staticmethod
     def get_period_background(period):
-        color_map = {
-            '夏尖峰': '#FFD9B3',
-            '夏半尖峰': '#FFE5CC',
-            '夏離峰': '#FFF1E0',
-            '夏週六半': '#FFF8F0',
-            '非夏半尖峰': '#D0E6FF',
-            '非夏離峰': '#E3F0FF',
-            '非夏週六半': '#F0F8FF',
-            '小計': '#D9D9D9'
-        }
-        return color_map.get(period, '#FFFFFF')
+        return _PERIOD_BACKGROUND.get(period, '#FFFFFF')
 
     @staticmethod
     def get_benefit_colors(value) -> Tuple[str, str]:  # 用 typing.Tuple 替代 tuple[str, str]
@@ -3942,38 +4294,23 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         if not ng_cost_versions or name not in ["NG 發電成本", "TG 維運成本"]:
             return ""
 
-        tooltip_lines = [f"{name}："]
-
-        for v in ng_cost_versions:
-            if name == "NG 發電成本" and v.get("value") is not None:
-                tooltip_lines.append(
-                    f"<span style='color:#004080;'>{v['value']:.4f} 元/kWH</span> "
-                    f"<span style='color:#999999;'>（適用：{v['start']} ~ {v['end']}）</span>"
-                )
-            elif name == "TG 維運成本" and v.get("tg_cost") is not None:
-                tooltip_lines.append(
-                    f"<span style='color:#004080;'>{v['tg_cost']:.4f} 元/kWH</span> "
-                    f"<span style='color:#999999;'>（適用：{v['start']} ~ {v['end']}）</span>"
-                )
-
-        return (
-                "<html><body><div style='white-space:pre; font-size:9pt;'>"
-                + "<br>".join(tooltip_lines)
-                + "</div></body></html>"
+        field = "value" if name == "NG 發電成本" else "tg_cost"
+        body = "<br>".join(
+            _VERSION_LINE.format(price=v[field], start=v['start'], end=v['end'])
+            for v in ng_cost_versions if v.get(field) is not None
         )
+        return _TOOLTIP_WRAP.format(f"{name}：<br>{body}" if body else f"{name}：")
 
     @staticmethod
     def build_cost_cell_tooltip(ng_cost: float, tg_cost: float) -> str:
         """
         回傳 NG 與 TG 成本組成的 tooltip HTML 文字。
-        金額為紅色，格式固定。
+        金額為紅色，格式固定。快取以原始數值為鍵 (轉成 float，讓 numpy 純量與 Python float 共用同一筆)，
+        不先取整，避免不同的輸入共用同一筆快取。
         """
-        return (
-            "<html><body><div style='white-space:pre; font-size:9pt;'>"
-            f"NG 發電成本：<span style='color:#C00000;'>${ng_cost:,.0f}</span> 元<br>"
-            f"TG 維運成本：<span style='color:#C00000;'>${tg_cost:,.0f}</span> 元"
-            "</div></body></html>"
-        )
+        if math.isfinite(ng_cost) and math.isfinite(tg_cost):
+            return _cost_cell_tooltip_html(float(ng_cost), float(tg_cost))
+        return _cost_cell_tooltip_html.__wrapped__(ng_cost, tg_cost)
 
     @staticmethod
     def build_cost_tooltip(ng_cost_list):
@@ -3986,29 +4323,14 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         tooltip_lines = [
             "減少外購電成本：(1) + (2)",
-            "<b>(1) NG 發電成本單價：</b>"
+            "<b>(1) NG 發電成本單價：</b>",
+            *(_VERSION_LINE.format(price=ver['value'], start=ver['start'], end=ver['end'])
+              for ver in ng_cost_list if ver.get("value") is not None),
+            "<b>(2) TG 維運成本單價：</b>",
+            *(_VERSION_LINE.format(price=ver['tg_cost'], start=ver['start'], end=ver['end'])
+              for ver in ng_cost_list if ver.get("tg_cost") is not None),
         ]
-
-        for ver in ng_cost_list:
-            if ver.get("value") is not None:
-                tooltip_lines.append(
-                    f"<span style='color:#004080;'>{ver['value']:.4f} 元/kWH</span> "
-                    f"<span style='color:#999999;'>（適用：{ver['start']} ~ {ver['end']}）</span>"
-                )
-
-        tooltip_lines.append("<b>(2) TG 維運成本單價：</b>")
-        for ver in ng_cost_list:
-            if ver.get("tg_cost") is not None:
-                tooltip_lines.append(
-                    f"<span style='color:#004080;'>{ver['tg_cost']:.4f} 元/kWH</span> "
-                    f"<span style='color:#999999;'>（適用：{ver['start']} ~ {ver['end']}）</span>"
-                )
-
-        return (
-                "<html><body><div style='white-space:pre; font-size:9pt;'>"
-                + "<br>".join(tooltip_lines)
-                + "</div></body></html>"
-        )
+        return _TOOLTIP_WRAP.format("<br>".join(tooltip_lines))
 
     @staticmethod
     def build_price_tooltip(period, ver_list, is_sale=False):
@@ -4021,13 +4343,13 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         else:
             header = period
 
+        # 表頭 + 單價列表
         lines = [f"<b>{header}單價：</b>"]
-
-        # 單價列表
-        for ver in sorted(ver_list, key=lambda x: x['version']):
-            price_str = f"<span style='color:#004080;'>${ver['value']:.4f}</span>"
-            range_str = f"<span style='color:#999999;'>（適用：{ver['version']}）</span>"
-            lines.append(f"{price_str}{range_str}")
+        lines.extend(
+            f"<span style='color:#004080;'>${ver['value']:.4f}</span>"
+            f"<span style='color:#999999;'>（適用：{ver['version']}）</span>"
+            for ver in sorted(ver_list, key=lambda x: x['version'])
+        )
 
         # 判斷是否為 NG 成本欄位（非欄位本身而是 tooltip 顯示）
         if ver_list and isinstance(ver_list[0], dict):
@@ -4052,7 +4374,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                     f"</div>"
                 )
 
-        return "<html><body><div style='white-space:pre; font-size:9pt;'>" + "<br>".join(lines) + "</div></body></html>"
+        return _TOOLTIP_WRAP.format("<br>".join(lines))
 
     @staticmethod
     def auto_resize(table: QtWidgets.QTableWidget, min_height: int = 60):
@@ -4066,8 +4388,8 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         scroll_w = table.verticalScrollBar().sizeHint().width() if table.verticalScrollBar().isVisible() else 0
         scroll_h = table.horizontalScrollBar().sizeHint().height() if table.horizontalScrollBar().isVisible() else 0
 
-        # 寬度：總欄寬 + 邊框 + scrollbar
-        total_w = sum(table.columnWidth(c) for c in range(table.columnCount())) + 2 * frame + scroll_w
+        # 寬度：總欄寬 + 邊框 + scrollbar (總欄寬直接取水平表頭長度，與高度的算法一致，不必逐欄呼叫 columnWidth)
+        total_w = table.horizontalHeader().length() + 2 * frame + scroll_w
         table.setFixedWidth(total_w)
 
         # 高度：根據是否有 row 調整
@@ -4086,18 +4408,23 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         :param b:若數值接近 0，預設回傳'停機'的述述。
         :return: 回傳值為文字型態。
         """
-        describe = ['--', '停機', '資料異常', '未使用', '0 MW', '未發電']
-        if pd.isnull(pending_data):
-            return describe[2]
+        if pending_data is None or pending_data != pending_data:     # None 或 NaN (NaN 不等於自己)
+            return _DESCRIBE[2]
         if pending_data > 0.1:
-            if c == 'gas':
-                return str(format(round(pending_data, 1), '.1f'))
-            elif c == 'h':
-                return str(format(round(pending_data, 2), '.2f'))
-            else:
-                return str(format(round(pending_data, 2), '.2f')) + ' MW'
+            return _PRE_CHECK_FMT.get(c, _PRE_CHECK_FMT['power'])(pending_data)
         else:
-            return describe[b]
+            return _DESCRIBE[b]
+
+    @staticmethod
+    def pre_check_series(pending_data, b=1):
+        """
+        pre_check (c='power') 的向量化版本：一次把整個 Series 轉成即時資料的顯示文字，
+        規則與 pre_check 相同 (NaN -> '資料異常'、> 0.1 取兩位小數加 ' MW'、其餘 -> _DESCRIBE[b])。
+        :param pending_data: pd.Series (index 為 tag 名稱)
+        :param b: 用來指定用那一個describe，預設為'停機'
+        :return: 與 pending_data 相同 index 的文字 Series
+        """
+        return _describe_texts(pending_data, '%.2f MW', b)
 
     @staticmethod
     def pre_check2(pending_data, b=1):
@@ -4107,13 +4434,23 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         :param pending_data:
         :return:
         """
-        describe = ['--', '停機', '資料異常', '未使用', '0 MW', '未發電']
-        if pd.isnull(pending_data):
-            return describe[2]
+        if pending_data is None or pending_data != pending_data:     # None 或 NaN
+            return _DESCRIBE[2]
         if pending_data > 0.1:
-            return str(format(round(pending_data, 2), '.2f'))
+            return f"{pending_data:.2f}"
         else:
-            return describe[b]
+            return _DESCRIBE[b]
+
+    @staticmethod
+    def pre_check2_series(pending_data, b=1):
+        """
+        pre_check2 的向量化版本：一次把整個 Series 轉成歷史資料的顯示文字，
+        規則與 pre_check2 相同 (NaN -> '資料異常'、> 0.1 取兩位小數、其餘 -> _DESCRIBE[b])。
+        :param pending_data: pd.Series (index 為 tag 名稱)
+        :param b: 用來指定用那一個describe，預設為'停機'
+        :return: 與 pending_data 相同 index 的文字 Series
+        """
+        return _describe_texts(pending_data, '%.2f', b)
 
     @staticmethod
     def _item_at(tree, path):
@@ -4147,7 +4484,7 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             path:
                 項目對應在樹狀結構的index，例如 (0, 3, 1) 代表 top(0) -> child(3) -> child(1)。
             value:
-                接收要更新的內容
+                接收要更新的內容；若已是文字 (str) 則直接顯示，不再經過 pre_check / pre_check2
             avg:
                 False 走 self.pre_check，True 走 self.pre_check2
             pre_kwargs:
@@ -4159,12 +4496,40 @@ class MyMainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         回傳：
             無
         """
-        pre_kwargs = pre_kwargs or {}
-        fmt = self.pre_check2 if avg else self.pre_check
-        text = fmt(value, **pre_kwargs)
+        if isinstance(value, str):      # 已由 pre_check2_series 預先格式化的文字
+            text = value
+        else:
+            pre_kwargs = pre_kwargs or {}
+            fmt = self.pre_check2 if avg else self.pre_check
+            text = fmt(value, **pre_kwargs)
         if suffix:
             text = f"{text}{suffix}"
-        self._item_at(tree, path).setText(col, text)
+        _set_item_text(self._cached_item(tree, path), col, text)
+
+    def _cached_item(self, tree, path):
+        """
+            與 _item_at 相同，但把找到的節點依 (tree, path) 記住；tw1~tw3 的節點建立後不會被 clear()，
+            每次即時/歷史更新不必再從 topLevelItem() 一層層 child() 走下去。
+        """
+        key = (id(tree), path)
+        item = self._tree_item_cache.get(key)
+        if item is None:
+            item = self._tree_item_cache[key] = self._item_at(tree, path)
+        return item
+
+    def _set_leaves(self, tree, col, leaves, text):
+        """
+            依 leaves 規格表 ((path, tag), ...) 把 text[tag] 寫入 tree 各葉節點的 col 欄。
+            節點參照只在第一次解析，之後直接走訪 item 清單；tag 位置由 _label_positions() 快取。
+        """
+        key = (id(tree), id(leaves))
+        items = self._leaf_items.get(key)
+        if items is None:
+            items = self._leaf_items[key] = [self._cached_item(tree, path) for path, _ in leaves]
+        _, last = _label_positions(text.index)
+        values = text.to_numpy()
+        for item, (_, tag) in zip(items, leaves):
+            _set_item_text(item, col, values[last[tag]])
 
 if __name__ == "__main__":
     sys.excepthook = handle_uncaught
@@ -1,5 +1,5 @@
 from PyQt6 import QtCore, QtWidgets, QtGui
-from typing import Sequence, Union, Optional
+from typing import Sequence, Union, Optional, Dict, Tuple
 from logging_utils import get_logger
 logger = get_logger(__name__)
 
@@ -10,10 +10,29 @@ _ALIGN_MAP = {
     "right":  QtCore.Qt.AlignmentFlag.AlignRight  | QtCore.Qt.AlignmentFlag.AlignVCenter,
 }
 
+# 同樣的色碼 / 字型組合在每次更新表格時會重複出現，建立一次後重複使用
+_BRUSH_CACHE: Dict[str, QtGui.QBrush] = {}
+_FONT_CACHE: Dict[Tuple[int, bool, bool], QtGui.QFont] = {}
+
 def _qbrush(color: Optional[str]) -> Optional[QtGui.QBrush]:
     if not color:
         return None
-    return QtGui.QBrush(QtGui.QColor(color))
+    brush = _BRUSH_CACHE.get(color)
+    if brush is None:
+        brush = QtGui.QBrush(QtGui.QColor(color))
+        _BRUSH_CACHE[color] = brush
+    return brush
+
+def _qfont(size: int, bold: bool, italic: bool) -> QtGui.QFont:
+    key = (int(size), bool(bold), bool(italic))
+    font = _FONT_CACHE.get(key)
+    if font is None:
+        font = QtGui.QFont()     # 需在 QApplication 建立後才呼叫 (第一次使用時才建立)
+        font.setPointSize(key[0])
+        font.setBold(key[1])
+        font.setItalic(key[2])
+        _FONT_CACHE[key] = font
+    return font
 
 def _to_align(a: Alignment) -> QtCore.Qt.AlignmentFlag:
     if isinstance(a, QtCore.Qt.AlignmentFlag):
@@ -49,11 +68,8 @@ def make_item(
         item = QtWidgets.QTreeWidgetItem(texts)
 
         aligns = list(align) if isinstance(align, (list, tuple)) else [align] * len(texts)
+        f = _qfont(font_size, bold, italic)
         for col in range(len(texts)):
-            f = QtGui.QFont()
-            f.setPointSize(int(font_size))
-            f.setBold(bool(bold))
-            f.setItalic(bool(italic))
             item.setFont(col, f)
             if fg:
                 item.setForeground(col, fg)
@@ -65,14 +81,51 @@ def make_item(
     # ---- Table: str -> QTableWidgetItem ----
     text = "" if text_or_texts is None else str(text_or_texts)
     item = QtWidgets.QTableWidgetItem(text)
-    f = item.font()
-    f.setPointSize(int(font_size))
-    f.setBold(bool(bold))
-    f.setItalic(bool(italic))
-    item.setFont(f)
+    item.setFont(_qfont(font_size, bold, italic))
+    if fg:
+        item.setForeground(fg)
+    if bg:
+        item.setBackground(bg)
+    item.setTextAlignment(_to_align(align))
+    return item
+
+def set_table_item(
+    table: QtWidgets.QTableWidget,
+    row: int,
+    col: int,
+    text: str,
+    *,
+    bold: bool = False,
+    italic: bool = False,
+    fg_color: Optional[str] = None,
+    bg_color: Optional[str] = None,
+    align: Alignment = "center",
+    font_size: int = 10,
+) -> QtWidgets.QTableWidgetItem:
+    """
+    與 table.setItem(row, col, make_item(text, ...)) 結果相同，但儲存格已有 item 時直接沿用：
+    只更新文字與樣式，不重新建立 QTableWidgetItem、也不轉移所有權給 Qt。
+    沿用時會清除舊的 tooltip 與未指定的前景/背景色，讓結果與新建立的 item 一致。
+    """
+    item = table.item(row, col)
+    if item is None:
+        item = make_item(text, bold=bold, italic=italic, fg_color=fg_color, bg_color=bg_color,
+                         align=align, font_size=font_size)
+        table.setItem(row, col, item)
+        return item
+
+    item.setText("" if text is None else str(text))
+    item.setFont(_qfont(font_size, bold, italic))
+    fg = _qbrush(fg_color)
+    bg = _qbrush(bg_color)
     if fg:
         item.setForeground(fg)
+    else:
+        item.setData(QtCore.Qt.ItemDataRole.ForegroundRole, None)
     if bg:
         item.setBackground(bg)
+    else:
+        item.setData(QtCore.Qt.ItemDataRole.BackgroundRole, None)
     item.setTextAlignment(_to_align(align))
-    return item
\ No newline at end of file
+    item.setToolTip("")
+    return item
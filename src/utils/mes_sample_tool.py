@@ -326,16 +326,17 @@ def use_mes_snapshots(
 
     keys = tuple(routes.keys())
 
-    def _fake_fetch_soup(url: str, pool=None):
+    def _fake_fetch_soup(url: str, pool=None, parse_only=None):
         token = _detect_page_token(url or "", keys)
         snap = routes.get(token) if token else None
         if snap and snap.exists():
             try:
                 html = snap.read_text(encoding=encoding, errors="replace")
-                return BeautifulSoup(html, "html.parser")
+                return BeautifulSoup(html, getattr(ss, "_HTML_PARSER", "html.parser"),   # 與線上抓取使用相同解析器
+                                     parse_only=parse_only)
             except Exception as e:
                 logger.warning("Failed to parse snapshot (%s), fallback to original", e)
-        return _orig_fetch_soup(url, pool)
+        return _orig_fetch_soup(url, pool, parse_only=parse_only)
 
     patcher = patch.object(ss, "_fetch_soup", side_effect=_fake_fetch_soup)
 